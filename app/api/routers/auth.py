@@ -8,14 +8,15 @@ from datetime import datetime, timedelta
 
 from app.db import get_db  # Motor database
 from app.security.auth import (
-    hash_password,
-    verify_password,
+    ahash_password,
+    averify_password,
     create_access_token,
     generate_otp,
     hash_str,
     verify_str,
     create_reset_token,
     verify_reset_token,
+    invalidate_user,
     OTP_TTL_MIN,
 )
 
@@ -66,7 +67,7 @@ async def signup(data: SignupIn, db: AsyncIOMotorDatabase = Depends(get_db)):
     doc = {
         "email": email,
         "name": (data.name or "").strip(),           # <--- store name
-        "hashed_password": hash_password(data.password),
+        "hashed_password": await ahash_password(data.password),
         "is_admin": False,
         "created_at": now,
         "updated_at": now,
@@ -87,7 +88,7 @@ async def signup(data: SignupIn, db: AsyncIOMotorDatabase = Depends(get_db)):
 async def login(data: LoginIn, db: AsyncIOMotorDatabase = Depends(get_db)):
     email = str(data.email).lower()
     u = await db.users.find_one({"email": email})
-    if not u or not verify_password(data.password, u.get("hashed_password", "")):
+    if not u or not await averify_password(data.password, u.get("hashed_password", "")):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
 
     token = create_access_token({"sub": str(u["_id"])})
@@ -183,8 +184,9 @@ async def reset_password(data: ResetIn, db: AsyncIOMotorDatabase = Depends(get_d
         raise HTTPException(status_code=400, detail="Invalid token subject")
 
     # Update password
-    new_hash = hash_password(data.new_password)
+    new_hash = await ahash_password(data.new_password)
     await db.users.update_one({"_id": oid}, {"$set": {"hashed_password": new_hash}})
+    invalidate_user(user_id)
 
     # Do NOT auto-login; require explicit login afterwards
     return {"ok": True}
@@ -1,24 +1,37 @@
 # app/api/routers/chat.py
 from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
 from datetime import datetime
+import asyncio
 import json
-import anyio
+import logging
 from bson import ObjectId
 
 from app.db import get_db, doc_with_id
+from app.persistence import Exchange, persist_exchange
+from app.traces import encode_trace
 from app.security.auth import get_current_user
-from src.orchestrator.coordinator import run_conversation
+from src.llm.guards.pii_redaction import PII_REDACTION, redact, redact_obj
+from src.memory.episodic import Episode, Window, default_memory
+from src.orchestrator.coordinator import aiter_conversation, arun_conversation
+from src.rag.preprocess.chunk import count_tokens
+from src.utils.schema import FinalDecision
 
 router = APIRouter(prefix="/api", tags=["chat"])
+log = logging.getLogger(__name__)
+
+# streamed turns run to completion (and are persisted) even if the client goes away
+_turns: set[asyncio.Task] = set()
 
 class ChatMessage(BaseModel):
     role: str
     content: str
 
 class ChatRequest(BaseModel):
+    # for an existing conversation only the new turn is needed; history comes from episodic memory
     messages: List[ChatMessage]
     mode: str = "assist"
     game_id: Optional[str] = None
@@ -32,7 +45,8 @@ class ChatResponse(BaseModel):
 def json_dumps(obj: Any) -> str:
     return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
 
-async def _ensure_conversation(db, user_id: str, conversation_id: Optional[str], title_hint: str) -> dict:
+async def _ensure_conversation(db, user_id: str, conversation_id: Optional[str], title_hint: str) -> tuple[dict, bool]:
+    """Return (conversation, created)."""
     if conversation_id:
         try:
             oid = ObjectId(conversation_id)
@@ -41,82 +55,171 @@ async def _ensure_conversation(db, user_id: str, conversation_id: Optional[str],
         conv = await db.conversations.find_one({"_id": oid})
         if not conv or str(conv.get("owner_id")) != user_id:
             raise HTTPException(status_code=404, detail="Conversation not found")
-        return doc_with_id(conv)
+        return doc_with_id(conv), False
 
     title = (title_hint or "New conversation").strip()[:200]
+    now = datetime.utcnow().isoformat()
     conv = {
         "title": title,
         "owner_id": ObjectId(user_id),
         "folder_id": None,
-        "created_at": datetime.utcnow().isoformat(),
-        "updated_at": datetime.utcnow().isoformat(),
+        "created_at": now,
+        "updated_at": now,
     }
     res = await db.conversations.insert_one(conv)
-    conv = await db.conversations.find_one({"_id": res.inserted_id})
-    return doc_with_id(conv)
-
-async def _persist_exchange(db, conv: dict, req: ChatRequest, result: Dict[str, Any]) -> None:
+    return doc_with_id({**conv, "_id": res.inserted_id}), True
+
+def _new_messages(req: ChatRequest, created: bool) -> List[ChatMessage]:
+    """
+    Messages this turn adds. Older clients resend the whole history, which is
+    already stored for an existing conversation: keep only the trailing
+    messages after the last assistant reply.
+    """
+    msgs = [m for m in req.messages if m.role in {"user", "assistant"}]
+    if created:
+        return msgs
+    for i in range(len(msgs) - 1, -1, -1):
+        if msgs[i].role == "assistant":
+            return msgs[i + 1:]
+    return msgs
+
+async def _context(db, conv: dict, created: bool, new_messages: List[ChatMessage]) -> Window:
+    """Token-budgeted context: episodic summary + recent stored turns + this turn."""
+    memory = default_memory()
+    episode = Episode(conv["id"]) if created else await memory.load(db, conv)
+    return memory.window(episode, [m.dict() for m in new_messages])
+
+async def _persist_exchange(conv: dict, new_messages: List[ChatMessage], result: Dict[str, Any],
+                            memory: Optional[Dict[str, Any]] = None) -> None:
     conv_oid = ObjectId(conv["id"])
-
-    # incoming messages
-    to_insert = []
-    for m in req.messages:
-        if m.role in {"user", "assistant"}:
-            to_insert.append({
-                "conversation_id": conv_oid,
-                "role": m.role,
-                "content": m.content,
-                "created_at": datetime.utcnow().isoformat(),
-            })
-    if to_insert:
-        await db.messages.insert_many(to_insert)
+    now = datetime.utcnow().isoformat()
+    steps, final = result.get("steps", []), result.get("final") or {}
+    if PII_REDACTION:
+        # only the stored copies; the caller still returns / has streamed the raw result
+        steps, final = redact_obj(steps), redact_obj(final)
+
+    # new incoming messages
+    docs = [{
+        "conversation_id": conv_oid,
+        "role": m.role,
+        "content": redact(m.content) if PII_REDACTION else m.content,
+        "created_at": now,
+    } for m in new_messages]
 
     # assistant summary as message
-    assistant_summary = (result.get("final") or {}).get("summary", "")
+    assistant_summary = final.get("summary", "")
     if assistant_summary:
-        await db.messages.insert_one({
+        docs.append({
             "conversation_id": conv_oid,
             "role": "assistant",
             "content": assistant_summary,
-            "created_at": datetime.utcnow().isoformat(),
+            "created_at": now,
         })
+    for d in docs:
+        d["tokens"] = count_tokens(d["content"])  # spares episodic memory a recount every turn
 
     # trace
-    await db.traces.insert_one({
-        "conversation_id": conv_oid,
-        "steps_json": json_dumps(result.get("steps", [])),
-        "final_json": json_dumps(result.get("final", {})),
-        "created_at": datetime.utcnow().isoformat(),
-    })
-
-    await db.conversations.update_one(
-        {"_id": conv_oid},
-        {"$set": {"updated_at": datetime.utcnow().isoformat()}}
+    trace = encode_trace(
+        conv_oid,
+        ObjectId(conv["owner_id"]),
+        steps,
+        final,
+        now,
     )
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat(req: ChatRequest, user=Depends(get_current_user)):
+    await persist_exchange(Exchange(conversation_id=conv_oid, updated_at=now, messages=docs, trace=trace, memory=memory))
+
+def _last_user_message(req: ChatRequest) -> str:
     if not req.messages:
         raise HTTPException(status_code=400, detail="messages cannot be empty")
+    return next((m.content for m in reversed(req.messages) if m.role == "user"), "New conversation")
 
-    last_user_msg = next((m.content for m in reversed(req.messages) if m.role == "user"), "New conversation")
+@router.post("/chat", response_model=ChatResponse)
+async def chat(req: ChatRequest, user=Depends(get_current_user)):
+    last_user_msg = _last_user_message(req)
 
     db = get_db()
-    conv = await _ensure_conversation(db, user["id"], req.conversation_id, last_user_msg)
+    conv, created = await _ensure_conversation(db, user["id"], req.conversation_id, last_user_msg)
+    new_messages = _new_messages(req, created)
+    window = await _context(db, conv, created, new_messages)
 
     # Orchestrator call; pass plain list of dicts
-    result = await anyio.to_thread.run_sync(
-        run_conversation,
-        [m.dict() for m in req.messages],
+    result = await arun_conversation(
+        window.messages,
         req.mode,
         req.game_id,
+        owner_id=user["id"],
     )
     result = result or {}
 
-    await _persist_exchange(db, conv, req, result)
+    await _persist_exchange(conv, new_messages, result, window.state)
 
     return ChatResponse(
         conversation_id=conv["id"],
         steps=result.get("steps", []),
         final=result.get("final", {}),
     )
+
+# ---- streaming variant (NDJSON) ----
+# One JSON object per line:
+#   {"type":"conversation","conversation_id":...}
+#   {"type":"step","step":{...}}        (one per agent, as soon as it finishes)
+#   {"type":"final","final":{...}}
+#   {"type":"done"}                      (after the exchange is persisted)
+# The turn runs in its own task and feeds the response through a queue, so a
+# client that disconnects mid-stream stops the response, not the turn: the
+# agents finish and the exchange is still stored.
+def _ndjson(event: str, **data: Any) -> bytes:
+    return (json_dumps({"type": event, **data}) + "\n").encode("utf-8")
+
+async def _stream_turn(queue: asyncio.Queue, conv: dict, new_messages: List[ChatMessage], window: Window,
+                       req: ChatRequest, owner_id: str) -> None:
+    steps: list[Dict[str, Any]] = []
+    final: Dict[str, Any] = {}
+    try:
+        # each step is handed over as soon as its agent finishes
+        async for item in aiter_conversation(window.messages, req.mode, req.game_id, owner_id=owner_id):
+            if isinstance(item, FinalDecision):
+                final = item.model_dump()
+                queue.put_nowait(("final", final))
+            else:
+                step = item.model_dump()
+                steps.append(step)
+                queue.put_nowait(("step", step))
+        await _persist_exchange(conv, new_messages, {"steps": steps, "final": final}, window.state)
+    except Exception as e:
+        log.exception("streamed turn for conversation %s failed", conv["id"])
+        queue.put_nowait(("error", e))
+        return
+    queue.put_nowait(("done", None))
+
+@router.post("/chat/stream")
+async def chat_stream(req: ChatRequest, user=Depends(get_current_user)):
+    last_user_msg = _last_user_message(req)
+
+    db = get_db()
+    conv, created = await _ensure_conversation(db, user["id"], req.conversation_id, last_user_msg)
+    new_messages = _new_messages(req, created)
+    window = await _context(db, conv, created, new_messages)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    turn = asyncio.create_task(_stream_turn(queue, conv, new_messages, window, req, user["id"]))
+    _turns.add(turn)
+    turn.add_done_callback(_turns.discard)
+
+    async def events() -> AsyncIterator[bytes]:
+        yield _ndjson("conversation", conversation_id=conv["id"])
+        while True:
+            event, data = await queue.get()
+            if event == "error":
+                raise data
+            if event == "done":
+                yield _ndjson("done")
+                return
+            yield _ndjson(event, **{event: data})
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,14 +1,44 @@
 # app/api/routers/data.py
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+from typing import AsyncIterator, Literal, Optional
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from bson import ObjectId
 
-from app.db import get_db, doc_with_id, docs_with_id
+from app.db import get_db, doc_with_id, docs_with_id, encode_cursor, decode_cursor
 from app.security.auth import get_current_user
+from app.traces import decode_trace, trace_filter
 
 router = APIRouter(prefix="/data", tags=["data"])
 
+# ----- Pagination -----
+# Listings are keyset-paginated: pass the X-Next-Cursor header of one page as
+# `after` to get the next. The body stays a plain JSON list.
+DEFAULT_PAGE = 100
+MAX_PAGE = 500
+
+# sidebar views only need what the UI renders
+FOLDER_SIDEBAR_FIELDS = {"name": 1, "created_at": 1}
+CONVERSATION_SIDEBAR_FIELDS = {"title": 1, "folder_id": 1, "created_at": 1, "updated_at": 1}
+
+def _cursor_or_400(after: str) -> dict:
+    try:
+        cur = decode_cursor(after)
+        cur["i"] = ObjectId(cur["i"])
+        return cur
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
+
+async def _page(response: Response, cur, limit: int, make_cursor) -> list[dict]:
+    # fetch one extra row to know whether another page exists
+    items = await cur.limit(limit + 1).to_list(limit + 1)
+    if len(items) > limit:
+        items = items[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(make_cursor(items[-1]))
+    return docs_with_id(items)
+
 # ----- Folders -----
 class FolderIn(BaseModel):
     name: str
@@ -26,11 +56,20 @@ async def create_folder(payload: FolderIn, user=Depends(get_current_user)):
     return doc_with_id(created)
 
 @router.get("/folders")
-async def list_folders(user=Depends(get_current_user)):
+async def list_folders(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE, ge=1, le=MAX_PAGE),
+    view: Literal["sidebar", "full"] = "sidebar",
+    user=Depends(get_current_user),
+):
     db = get_db()
-    cur = db.folders.find({"owner_id": ObjectId(user["id"])}).sort([("_id", -1)])
-    items = await cur.to_list(1000)
-    return docs_with_id(items)
+    q: dict = {"owner_id": ObjectId(user["id"])}
+    if after:
+        q["_id"] = {"$lt": _cursor_or_400(after)["i"]}
+    projection = FOLDER_SIDEBAR_FIELDS if view == "sidebar" else None
+    cur = db.folders.find(q, projection).sort([("_id", -1)])
+    return await _page(response, cur, limit, lambda d: {"i": str(d["_id"])})
 
 # ----- Conversations -----
 class ConversationIn(BaseModel):
@@ -62,8 +101,67 @@ async def create_conversation(payload: ConversationIn, user=Depends(get_current_
     return doc_with_id(created)
 
 @router.get("/conversations")
-async def list_conversations(user=Depends(get_current_user)):
+async def list_conversations(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE, ge=1, le=MAX_PAGE),
+    view: Literal["sidebar", "full"] = "sidebar",
+    user=Depends(get_current_user),
+):
     db = get_db()
-    cur = db.conversations.find({"owner_id": ObjectId(user["id"])}).sort([("updated_at", -1)])
-    items = await cur.to_list(1000)
-    return docs_with_id(items)
+    q: dict = {"owner_id": ObjectId(user["id"])}
+    if after:
+        c = _cursor_or_400(after)
+        # keyset on (updated_at desc, _id desc); served by ix_conversations_owner_updated
+        q["$or"] = [
+            {"updated_at": {"$lt": c.get("u")}},
+            {"updated_at": c.get("u"), "_id": {"$lt": c["i"]}},
+        ]
+    projection = CONVERSATION_SIDEBAR_FIELDS if view == "sidebar" else {"episodic": 0}
+    cur = db.conversations.find(q, projection).sort([("updated_at", -1), ("_id", -1)])
+    return await _page(response, cur, limit, lambda d: {"u": d.get("updated_at"), "i": str(d["_id"])})
+
+# ----- Traces -----
+# Streamed as NDJSON, one decoded trace per line, so large histories never
+# sit in memory on either side.
+MAX_TRACES = 5000
+
+def _stream_traces(cur) -> StreamingResponse:
+    async def lines() -> AsyncIterator[bytes]:
+        async for doc in cur:
+            yield (json.dumps(decode_trace(doc), separators=(",", ":"), ensure_ascii=False, default=str) + "\n").encode("utf-8")
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/conversations/{conversation_id}/traces")
+async def conversation_traces(
+    conversation_id: str,
+    agent: Optional[str] = None,
+    policy_hit: Optional[str] = None,
+    user=Depends(get_current_user),
+):
+    db = get_db()
+    try:
+        conv_oid = ObjectId(conversation_id)
+    except Exception:
+        raise HTTPException(400, "Invalid conversation id")
+    conv = await db.conversations.find_one({"_id": conv_oid}, {"owner_id": 1})
+    if not conv or str(conv["owner_id"]) != user["id"]:
+        raise HTTPException(404, "Conversation not found")
+
+    q = {"conversation_id": conv_oid, **trace_filter(agent=agent, policy_hit=policy_hit)}
+    return _stream_traces(db.traces.find(q).sort([("created_at", 1)]))
+
+@router.get("/traces")
+async def search_traces(
+    agent: Optional[str] = None,
+    policy_hit: Optional[str] = None,
+    since: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=MAX_TRACES),
+    user=Depends(get_current_user),
+):
+    """e.g. /data/traces?policy_hit=flag_not_allowed&since=2025-01-01 (or the full flag_not_allowed:-sU); admins see all owners."""
+    db = get_db()
+    q = trace_filter(agent=agent, policy_hit=policy_hit, since=since)
+    if not user.get("is_admin"):
+        q["owner_id"] = ObjectId(user["id"])
+    return _stream_traces(db.traces.find(q).sort([("created_at", -1)]).limit(limit))
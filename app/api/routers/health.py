@@ -0,0 +1,27 @@
+# app/api/routers/health.py
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.persistence import writer
+from app.security.auth import get_current_user, user_cache
+from app.security.hashing import hash_pool
+from src.llm.runners.registry import all_cached_runners, all_runners
+from src.orchestrator.policies import engine as tool_policy
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+@router.get("")
+async def health():
+    return {"ok": True}
+
+@router.get("/metrics")
+async def metrics(user=Depends(get_current_user)):
+    if not user.get("is_admin"):
+        raise HTTPException(status_code=403, detail="Admin only")
+    return {
+        "user_cache": user_cache.stats(),
+        "hash_pool": hash_pool.stats(),
+        "persistence": writer.stats(),
+        "llm_runners": [r.stats() for r in all_runners()],
+        "llm_cache": {c.runner.name: c.stats() for c in all_cached_runners()},
+        "tool_policy": tool_policy.stats(),
+    }
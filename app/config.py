@@ -15,5 +15,10 @@ JWT_SECRET = os.getenv("JWT_SECRET", "CHANGE_ME")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 JWT_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES", "10080"))
 
+# Chat persistence: "sync" acknowledges after the exchange is written,
+# "async" acknowledges immediately and lets the write-behind batcher persist it
+CHAT_PERSIST_MODE = os.getenv("CHAT_PERSIST_MODE", "sync")
+PERSIST_MAX_BATCH = int(os.getenv("PERSIST_MAX_BATCH", "256"))
+
 def jwt_expiration():
     return timedelta(minutes=JWT_EXPIRE_MINUTES) 
@@ -1,5 +1,7 @@
 # app/db.py
-from typing import AsyncGenerator
+import base64
+import json
+from typing import Any, AsyncGenerator
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from bson import ObjectId
 
@@ -36,6 +38,23 @@ def doc_with_id(doc: dict | None) -> dict | None:
 def docs_with_id(docs: list[dict]) -> list[dict]:
     return [doc_with_id(d) for d in docs]
 
+# ---- keyset pagination cursors ----
+# Opaque token holding the sort key of the last item on a page.
+def encode_cursor(values: dict[str, Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(token: str) -> dict[str, Any]:
+    """Raise ValueError on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+    if not isinstance(values, dict):
+        raise ValueError("invalid cursor")
+    return values
+
 # ---- idempotent index creator ----
 async def ensure_index(
     coll,
@@ -69,9 +88,16 @@ async def init_db() -> None:
     await ensure_index(db.users, [("email", 1)], name="uq_users_email", unique=True)
     await ensure_index(db.conversations, [("owner_id", 1)], name="ix_conversations_owner")
     await ensure_index(db.conversations, [("updated_at", -1)], name="ix_conversations_updated_at_desc")
+    # sidebar listing: equality on owner, keyset on (updated_at, _id)
+    await ensure_index(db.conversations, [("owner_id", 1), ("updated_at", -1), ("_id", -1)], name="ix_conversations_owner_updated")
     await ensure_index(db.messages, [("conversation_id", 1), ("created_at", 1)], name="ix_messages_conv_created")
     await ensure_index(db.folders, [("owner_id", 1)], name="ix_folders_owner")
+    await ensure_index(db.folders, [("owner_id", 1), ("_id", -1)], name="ix_folders_owner_id_desc")
     await ensure_index(db.traces, [("conversation_id", 1), ("created_at", 1)], name="ix_traces_conv_created")
+    # structured traces: multikey lookups by policy hit / agent, newest first
+    await ensure_index(db.traces, [("policy_hits", 1), ("created_at", -1)], name="ix_traces_policy_hits_created")
+    await ensure_index(db.traces, [("agents", 1), ("created_at", -1)], name="ix_traces_agents_created")
+    await ensure_index(db.traces, [("owner_id", 1), ("created_at", -1)], name="ix_traces_owner_created")
 
 # FastAPI dependency if you want DI-style access
 async def get_db_dep() -> AsyncGenerator[AsyncIOMotorDatabase, None]:
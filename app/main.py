@@ -3,12 +3,19 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
 import os
 
 from app.api.routers.chat import router as chat_router
 from app.api.routers.auth import router as auth_router
 from app.api.routers.data import router as data_router
+from app.api.routers.health import router as health_router
 from app.db import init_db
+from app.persistence import writer
+from app.security.hashing import hash_pool
+from src.intel.normalizers import default_index
+from src.llm.runners.base import close_http_client
+from src.memory.kv_store import close_default_kv
 
 def add_middlewares(app: FastAPI):
     app.add_middleware(
@@ -17,12 +24,14 @@ def add_middlewares(app: FastAPI):
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
 
 def add_routers(app: FastAPI):
     app.include_router(auth_router)
     app.include_router(data_router)
     app.include_router(chat_router)
+    app.include_router(health_router)
 
 def mount_static(app: FastAPI):
     static_dir = os.path.join(os.path.dirname(__file__), "ui", "web")
@@ -32,7 +41,12 @@ def mount_static(app: FastAPI):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()   # <- important: create indexes on startup
+    await asyncio.to_thread(default_index)  # load the indicator file before the first Defender turn
     yield
+    await writer.close()   # flush pending write-behind exchanges
+    await close_default_kv()
+    hash_pool.shutdown()
+    await close_http_client()
     # optional: close clients etc.
 
 def create_app() -> FastAPI:
@@ -0,0 +1,143 @@
+# app/persistence.py
+"""
+Write-behind batcher for chat exchanges.
+
+Each turn produces messages, a trace and a conversation `updated_at` bump
+(plus, when older turns were folded, the conversation's episodic summary).
+Instead of 3-4 sequential awaits per request, exchanges are queued and a
+single background task flushes everything queued so far as one insert_many
+per collection plus one bulk_write of conversation touches, issued
+concurrently. Under load many requests share one flush; when idle a flush
+starts immediately, so there is no added batching delay.
+
+A flush that fails for any reason fails every waiting submit() in its
+batch; the task carries on with the next batch. If the task ever stops,
+the next submit() restarts it on the same queue, so nothing queued is lost.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.config import CHAT_PERSIST_MODE, PERSIST_MAX_BATCH
+from app.db import get_db
+
+log = logging.getLogger(__name__)
+
+@dataclass
+class Exchange:
+    conversation_id: ObjectId
+    updated_at: str
+    messages: list[dict[str, Any]] = field(default_factory=list)
+    trace: Optional[dict[str, Any]] = None
+    memory: Optional[dict[str, Any]] = None  # episodic state to $set on the conversation
+
+class WriteBehindBatcher:
+    def __init__(self, max_batch: int = PERSIST_MAX_BATCH, db: Optional[Callable[[], Any]] = None):
+        self.max_batch = max(1, max_batch)
+        self._db = db  # database factory; app.db.get_db unless given (e.g. a stand-in for benchmarks)
+        self._queue: asyncio.Queue | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self.flushes = 0
+        self.exchanges = 0
+        self.failures = 0
+
+    def _ensure_started(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            # a queue is bound to its loop; one left on a closed loop has nobody to flush it
+            self._queue, self._loop = asyncio.Queue(), loop
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run(), name="persist-write-behind")
+        return self._queue
+
+    async def submit(self, ex: Exchange, wait: bool = True) -> None:
+        """Queue an exchange; with wait=True return once it is written (or raise)."""
+        queue = self._ensure_started()
+        fut = asyncio.get_running_loop().create_future() if wait else None
+        queue.put_nowait((ex, fut))
+        if fut is not None:
+            await fut
+
+    async def close(self) -> None:
+        """Flush whatever is queued and stop the background task."""
+        if self._task is None or self._task.done():
+            return
+        self._queue.put_nowait(None)
+        await self._task
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            item = await queue.get()
+            stop = item is None
+            batch = [] if stop else [item]
+            # take everything that piled up while the previous flush was in flight
+            while len(batch) < self.max_batch and not queue.empty():
+                nxt = queue.get_nowait()
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+            if batch:
+                await self._flush(batch)
+            if stop:
+                return
+
+    async def _flush(self, batch: list[tuple[Exchange, Optional[asyncio.Future]]]) -> None:
+        self.flushes += 1
+        self.exchanges += len(batch)
+        try:
+            await self._write(batch)
+        except Exception as e:
+            self.failures += 1
+            log.exception("write-behind flush of %d exchanges failed", len(batch))
+            for _, fut in batch:
+                if fut is not None and not fut.done():
+                    fut.set_exception(e)
+            return
+        for _, fut in batch:
+            if fut is not None and not fut.done():
+                fut.set_result(None)
+
+    async def _write(self, batch: list[tuple[Exchange, Optional[asyncio.Future]]]) -> None:
+        db = (self._db or get_db)()
+        messages = [m for ex, _ in batch for m in ex.messages]
+        traces = [ex.trace for ex, _ in batch if ex.trace]
+        touched: dict[ObjectId, str] = {}
+        for ex, _ in batch:
+            touched[ex.conversation_id] = max(ex.updated_at, touched.get(ex.conversation_id, ""))
+
+        ops = []
+        if messages:
+            ops.append(db.messages.insert_many(messages, ordered=True))  # keep turn order in _id
+        if traces:
+            ops.append(db.traces.insert_many(traces, ordered=False))
+        updates = [UpdateOne({"_id": oid}, {"$max": {"updated_at": ts}}) for oid, ts in touched.items()]
+        # episodic state only moves forward: a concurrent turn that folded further wins
+        updates += [UpdateOne({"_id": ex.conversation_id, "episodic.folded": {"$not": {"$gte": ex.memory["folded"]}}},
+                              {"$set": {"episodic": ex.memory}})
+                    for ex, _ in batch if ex.memory]
+        if updates:
+            ops.append(db.conversations.bulk_write(updates, ordered=False))
+        await asyncio.gather(*ops)
+
+    def stats(self) -> dict:
+        return {
+            "mode": CHAT_PERSIST_MODE,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "flushes": self.flushes,
+            "exchanges": self.exchanges,
+            "failures": self.failures,
+            "avg_batch": (self.exchanges / self.flushes) if self.flushes else 0.0,
+        }
+
+writer = WriteBehindBatcher()
+
+async def persist_exchange(ex: Exchange) -> None:
+    await writer.submit(ex, wait=CHAT_PERSIST_MODE != "async")
@@ -1,4 +1,5 @@
 # app/security/auth.py
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -8,11 +9,16 @@ from jose import jwt, JWTError
 from passlib.context import CryptContext
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+import hashlib
+import hmac
 import os
 import secrets
+import time
+import uuid
 
 from app.config import JWT_SECRET, JWT_ALGORITHM, JWT_EXPIRE_MINUTES
 from app.db import get_db
+from app.security.hashing import hash_pool
 import bcrypt
 
 # Patch: make passlib not choke on bcrypt >=4
@@ -31,15 +37,95 @@ def verify_password(plain: str, hashed: str) -> bool:
 def hash_password(p: str) -> str:
     return pwd_context.hash(p)
 
+# async variants for request handlers: run on the bounded hash pool, never on the event loop
+async def averify_password(plain: str, hashed: str) -> bool:
+    return await hash_pool.run(pwd_context.verify, plain, hashed)
+
+async def ahash_password(p: str) -> str:
+    return await hash_pool.run(pwd_context.hash, p)
+
 # ========== Access token (login) ==========
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 def create_access_token(data: dict, minutes: int = JWT_EXPIRE_MINUTES) -> str:
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=minutes)
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    expire = now + timedelta(minutes=minutes)
+    to_encode.update({"exp": expire, "iat": int(now.timestamp()), "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+# ========== Authenticated-user cache ==========
+# In-process TTL/LRU cache of the public user projection, keyed by
+# (user id, token iat, token jti). Per worker; the TTL bounds staleness
+# across workers, invalidate() clears it locally on password/admin changes.
+USER_CACHE_TTL_SEC = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+USER_PROJECTION = {"email": 1, "name": 1, "is_admin": 1, "created_at": 1}
+
+class UserCache:
+    def __init__(self, ttl_sec: float = USER_CACHE_TTL_SEC, max_entries: int = USER_CACHE_MAX):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._items: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+        self._by_user: dict[str, set[tuple]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> Optional[dict]:
+        item = self._items.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return dict(item[1])
+
+    def put(self, key: tuple, user: dict) -> None:
+        if self.ttl_sec <= 0 or self.max_entries <= 0:
+            return
+        self._items[key] = (time.monotonic() + self.ttl_sec, dict(user))
+        self._items.move_to_end(key)
+        self._by_user.setdefault(key[0], set()).add(key)
+        while len(self._items) > self.max_entries:
+            self._drop(next(iter(self._items)))
+            self.evictions += 1
+
+    def invalidate(self, user_id: str) -> None:
+        for key in self._by_user.pop(user_id, set()):
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._by_user.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
+
+    def _drop(self, key: tuple) -> None:
+        self._items.pop(key, None)
+        keys = self._by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[key[0]]
+
+user_cache = UserCache()
+
+def invalidate_user(user_id: str) -> None:
+    """Call after anything that changes a user's auth state (password, is_admin)."""
+    user_cache.invalidate(str(user_id))
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncIOMotorDatabase = Depends(get_db),     # <--- FIX: use Depends
@@ -58,29 +144,51 @@ async def get_current_user(
     except (JWTError, Exception):
         raise cred_exc
 
-    user = await db.users.find_one({"_id": oid})
+    cache_key = (str(oid), payload.get("iat"), payload.get("jti"))
+    cached = user_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    user = await db.users.find_one({"_id": oid}, USER_PROJECTION)
     if not user:
         raise cred_exc
 
     # Return dict the rest of the app can use (include name)
-    return {
+    public = {
         "id": str(user["_id"]),
         "email": user.get("email", ""),
         "name": user.get("name", ""),           # <--- include name
         "is_admin": bool(user.get("is_admin", False)),
         "created_at": user.get("created_at"),
     }
+    user_cache.put(cache_key, public)
+    return public
 
 # ========== OTP + Reset token flow ==========
 # OTP config
 OTP_TTL_MIN = int(os.getenv("RESET_OTP_EXPIRE_MINUTES", "10"))  # 10 minutes
 OTP_LEN = int(os.getenv("RESET_OTP_LENGTH", "6"))
 
+# OTPs are short-lived and attempt-limited, so a keyed HMAC (secret never stored
+# in Mongo) replaces the bcrypt round: microseconds instead of ~200 ms.
+OTP_HMAC_SECRET = os.getenv("OTP_HMAC_SECRET", JWT_SECRET).encode("utf-8")
+_OTP_SCHEME = "hmac-sha256"
+
+def _otp_digest(salt: str, s: str) -> str:
+    return hmac.new(OTP_HMAC_SECRET, f"{salt}:{s}".encode("utf-8"), hashlib.sha256).hexdigest()
+
 def hash_str(s: str) -> str:
-    return pwd_context.hash(s)
+    salt = secrets.token_hex(8)
+    return f"{_OTP_SCHEME}${salt}${_otp_digest(salt, s)}"
 
 def verify_str(s: str, h: str) -> bool:
-    return pwd_context.verify(s, h)
+    try:
+        scheme, salt, digest = h.split("$", 2)
+    except ValueError:
+        return False  # e.g. a pre-HMAC bcrypt OTP; it expires within OTP_TTL_MIN anyway
+    if scheme != _OTP_SCHEME:
+        return False
+    return hmac.compare_digest(digest, _otp_digest(salt, s))
 
 def generate_otp(length: int = OTP_LEN) -> str:
     # digits-only OTP
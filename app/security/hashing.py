@@ -0,0 +1,90 @@
+# app/security/hashing.py
+"""
+Bounded worker pool for CPU-heavy password hashing (bcrypt).
+
+bcrypt releases the GIL while hashing, so a small thread pool gives real
+parallelism without blocking the event loop. Admission is capped: once
+`max_pending` calls are queued or running, new ones are rejected with 503
+instead of piling up behind a login burst.
+
+A call leaves `in_flight` when its hash actually finishes (or is dropped
+from the queue), not when the awaiting request goes away: a cancelled
+request's bcrypt keeps a worker busy, and admission has to see that.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from fastapi import HTTPException, status
+
+T = TypeVar("T")
+
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_POOL_MAX_PENDING = int(os.getenv("HASH_POOL_MAX_PENDING", str(HASH_POOL_WORKERS * 8)))
+HASH_POOL_RETRY_AFTER_SEC = int(os.getenv("HASH_POOL_RETRY_AFTER_SECONDS", "1"))
+
+class HashPool:
+    def __init__(self, workers: int = HASH_POOL_WORKERS, max_pending: int = HASH_POOL_MAX_PENDING):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()  # counters are updated from the worker threads
+        self.in_flight = 0   # queued + running
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hash")
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry",
+                headers={"Retry-After": str(HASH_POOL_RETRY_AFTER_SEC)},
+            )
+        with self._lock:
+            self.in_flight += 1
+        try:
+            fut = self._pool().submit(fn, *args)
+        except BaseException:
+            with self._lock:
+                self.in_flight -= 1
+            raise
+        fut.add_done_callback(self._done)
+        # cancelling the await cancels the hash only if it has not started yet
+        return await asyncio.wrap_future(fut)
+
+    def _done(self, fut: Future) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if fut.cancelled():
+                return
+            if fut.exception() is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "queue_depth": max(0, self.in_flight - self.workers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+hash_pool = HashPool()
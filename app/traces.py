@@ -0,0 +1,159 @@
+# app/traces.py
+"""
+Compact, queryable encoding of agent traces.
+
+A trace document keeps each TraceStep as a sub-document with short keys and
+the agent name interned to a small int. Step outputs above a size threshold
+are compressed (zstd when installed, zlib otherwise). Top-level `agents` and
+`policy_hits` arrays carry multikey indexes, so "turns where X fired" is an
+index scan instead of parsing every blob.
+"""
+import json
+import os
+import re
+import zlib
+from datetime import datetime
+from typing import Any, Callable
+
+from bson import Binary, ObjectId
+
+try:  # optional: better ratio and speed than zlib
+    import zstandard as _zstd
+except ImportError:  # pragma: no cover
+    _zstd = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("TRACE_COMPRESS_MIN_BYTES", "1024"))
+
+# interned agent names; append only, codes are persisted
+AGENT_CODES = ["intel_analyst", "attacker", "defender", "toolsmith", "decider", "semantic_memory", "prompt_guard"]
+_AGENT_TO_CODE = {name: i for i, name in enumerate(AGENT_CODES)}
+
+def agent_code(name: str) -> int | str:
+    return _AGENT_TO_CODE.get(name, name)
+
+def agent_name(code: int | str) -> str:
+    return AGENT_CODES[code] if isinstance(code, int) and 0 <= code < len(AGENT_CODES) else str(code)
+
+def _pack(obj: Any) -> Any:
+    raw = json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(raw) < COMPRESS_MIN_BYTES:
+        return obj
+    if _zstd is not None:
+        return {"zc": "zstd", "zd": Binary(_zstd.ZstdCompressor(level=3).compress(raw))}
+    return {"zc": "zlib", "zd": Binary(zlib.compress(raw, 6))}
+
+def _unpack(val: Any) -> Any:
+    if not (isinstance(val, dict) and "zc" in val and "zd" in val):
+        return val
+    data = bytes(val["zd"])
+    if val["zc"] == "zstd":
+        if _zstd is None:
+            raise RuntimeError("trace output is zstd-compressed but zstandard is not installed")
+        raw = _zstd.ZstdDecompressor().decompress(data)
+    else:
+        raw = zlib.decompress(data)
+    return json.loads(raw)
+
+def encode_trace(conversation_id: ObjectId, owner_id: ObjectId, steps: list[dict], final: dict, created_at: str) -> dict:
+    enc_steps = []
+    agents: list[int | str] = []
+    hits: list[str] = []
+    for s in steps:
+        code = agent_code(s.get("agent", ""))
+        step_hits = list(s.get("policy_hits") or [])
+        enc = {"id": s.get("step_id"), "a": code, "r": s.get("rationale", ""), "o": _pack(s.get("outputs") or {})}
+        if s.get("tool_calls"):
+            enc["tc"] = s["tool_calls"]
+        if step_hits:
+            enc["ph"] = step_hits
+        if s.get("confidence") is not None:
+            enc["c"] = s["confidence"]
+        if s.get("latency_ms") is not None:
+            enc["ms"] = s["latency_ms"]
+        enc_steps.append(enc)
+        if code not in agents:
+            agents.append(code)
+        hits.extend(h for h in step_hits if h not in hits)
+    return {
+        "conversation_id": conversation_id,
+        "owner_id": owner_id,
+        "created_at": created_at,
+        "agents": agents,
+        "policy_hits": hits,
+        "steps": enc_steps,
+        "final": final,
+    }
+
+def decode_trace(doc: dict) -> dict:
+    """Inverse of encode_trace; also reads legacy steps_json/final_json documents."""
+    out = {
+        "id": str(doc["_id"]) if "_id" in doc else None,
+        "conversation_id": str(doc.get("conversation_id", "")),
+        "created_at": doc.get("created_at"),
+    }
+    if "steps_json" in doc:
+        out["steps"] = json.loads(doc.get("steps_json") or "[]")
+        out["final"] = json.loads(doc.get("final_json") or "{}")
+        return out
+    out["steps"] = [{
+        "step_id": s.get("id"),
+        "agent": agent_name(s.get("a")),
+        "rationale": s.get("r", ""),
+        "outputs": _unpack(s.get("o", {})),
+        "tool_calls": s.get("tc", []),
+        "policy_hits": s.get("ph", []),
+        "confidence": s.get("c"),
+        "latency_ms": s.get("ms"),
+    } for s in doc.get("steps", [])]
+    out["final"] = doc.get("final", {})
+    return out
+
+def redacted_trace_fields(doc: dict, scrub: Callable[[Any], Any]) -> dict | None:
+    """
+    $set applying `scrub` (e.g. PIIRedactor.redact_obj) to the text of a
+    stored trace, or None when nothing changes. Compressed step outputs are
+    unpacked, scrubbed and packed again; legacy JSON blobs are re-serialized.
+    """
+    upd: dict = {}
+    if "steps_json" in doc:
+        for key in ("steps_json", "final_json"):
+            if doc.get(key):
+                obj = json.loads(doc[key])
+                clean = scrub(obj)
+                if clean != obj:
+                    upd[key] = json.dumps(clean)
+        return upd or None
+    steps, changed = [], False
+    for s in doc.get("steps", []):
+        s2 = dict(s)
+        for key in ("r", "tc"):
+            if key in s:
+                s2[key] = scrub(s[key])
+        out = _unpack(s.get("o", {}))
+        clean = scrub(out)
+        if clean != out:
+            s2["o"] = _pack(clean)
+        changed = changed or s2 != s
+        steps.append(s2)
+    if changed:
+        upd["steps"] = steps
+    final = scrub(doc.get("final", {}))
+    if final != doc.get("final", {}):
+        upd["final"] = final
+    return upd or None
+
+def trace_filter(agent: str | None = None, policy_hit: str | None = None, since: datetime | None = None) -> dict:
+    """
+    Mongo filter served by the agents/policy_hits indexes. Stored hits carry
+    a detail suffix ("flag_not_allowed:-sU"), so `policy_hit` matches a hit
+    equal to it or starting with it plus ":" (an anchored prefix regex,
+    which still scans only that index range).
+    """
+    q: dict = {}
+    if agent:
+        q["agents"] = agent_code(agent)
+    if policy_hit:
+        q["policy_hits"] = {"$regex": "^" + re.escape(policy_hit) + "(?::|$)"}
+    if since:
+        q["created_at"] = {"$gte": since.isoformat()}
+    return q
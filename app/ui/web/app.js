@@ -129,8 +129,9 @@ function debounce(fn, ms = 120) {
 
 // ======================= API wrapper =======================
 async function api(path, opts = {}) {
+  const { onResponse, ...fetchOpts } = opts;
   const res = await fetch(path, {
-    ...opts,
+    ...fetchOpts,
     headers: { ...(opts.headers || {}), ...authHeaders() },
   });
 
@@ -152,36 +153,55 @@ async function api(path, opts = {}) {
     throw err;
   }
 
+  if (onResponse) onResponse(res);
   if (res.status === 204) return null; // not used now, but harmless
   return res.json();
 }
 
+// Keyset-paginated list endpoints: one page per call; `next` is the
+// X-Next-Cursor to pass as `after` for the following page (null on the last).
+async function apiPage(path, after = null) {
+  let next = null;
+  const url = path + (after ? `${path.includes("?") ? "&" : "?"}after=${encodeURIComponent(after)}` : "");
+  const items = await api(url, { onResponse: (res) => (next = res.headers.get("X-Next-Cursor")) });
+  return { items, next };
+}
+
+// cursor of the next unloaded page per sidebar list (not persisted)
+const cursors = { folders: null, history: null };
+
 // ======================= Data fetchers =======================
-async function loadFolders() {
-  const folders = await api("/data/folders");
-  state.folders = {};
-  state.folderOrder = [];
-  folders.forEach((f) => {
+// loadX() (re)loads the newest page; loadMoreX() appends the next one.
+async function loadFolders(after = null) {
+  const { items, next } = await apiPage("/data/folders", after);
+  if (!after) {
+    state.folders = {};
+    state.folderOrder = [];
+  }
+  items.forEach((f) => {
     state.folders[f.id] = { ...f, chatIds: f.chatIds || [] };
-    state.folderOrder.unshift(f.id);
+    state.folderOrder.push(f.id);
   });
+  cursors.folders = next;
 }
 
-async function loadHistory() {
-  const list = await api("/data/conversations");
-  state.conversations = {};
-  state.order = [];
-  list.forEach((c) => {
+async function loadHistory(after = null) {
+  // newest first (updated_at, then id), so later pages append
+  const { items, next } = await apiPage("/data/conversations", after);
+  if (!after) {
+    state.conversations = {};
+    state.order = [];
+  }
+  items.forEach((c) => {
     state.conversations[c.id] = { ...c, messages: [] };
     state.order.push(c.id);
   });
-  state.order.sort((a, b) =>
-    (state.conversations[b].updated_at || "").localeCompare(
-      state.conversations[a].updated_at || ""
-    )
-  );
+  cursors.history = next;
 }
 
+const loadMoreFolders = () => cursors.folders && loadFolders(cursors.folders);
+const loadMoreHistory = () => cursors.history && loadHistory(cursors.history);
+
 async function createFolder(name) {
   const f = await api("/data/folders", {
     method: "POST",
@@ -294,6 +314,7 @@ function redrawFolders() {
     });
     foldersList.appendChild(li);
   });
+  if (cursors.folders) foldersList.appendChild(moreItem(loadMoreFolders));
 }
 
 function redrawHistory(filter = "") {
@@ -313,6 +334,42 @@ function redrawHistory(filter = "") {
       </button>`;
     historyList.appendChild(li);
   });
+  // with a search filter, auto-loading would pull page after page of non-matches
+  if (cursors.history) historyList.appendChild(moreItem(loadMoreHistory, !filter));
+}
+
+// "Load more" row closing a paged list; fetches the next page when clicked
+// or (autoload) when it scrolls into view.
+function moreItem(loadMore, autoload = true) {
+  const li = document.createElement("li");
+  li.className = "more";
+  li.innerHTML = `<button class="btn small tiny">Load more</button>`;
+  let busy = false;
+  const fetchMore = async () => {
+    if (busy) return;
+    busy = true;
+    try {
+      await loadMore();
+      redrawHistory(searchInput?.value.trim() || "");
+      redrawFolders();
+      attachHistoryEvents();
+      storage.save(state);
+    } catch (e) {
+      console.error(e);
+      busy = false;
+    }
+  };
+  li.querySelector("button").addEventListener("click", fetchMore);
+  if (autoload && "IntersectionObserver" in window) {
+    const io = new IntersectionObserver((entries) => {
+      if (entries.some((e) => e.isIntersecting)) {
+        io.disconnect();
+        fetchMore();
+      }
+    });
+    io.observe(li);
+  }
+  return li;
 }
 
 function attachHistoryEvents() {
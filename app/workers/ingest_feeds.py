@@ -0,0 +1,49 @@
+# app/workers/ingest_feeds.py
+"""
+Poll the CTI feeds (src/intel/feeds.yaml) into the RAG pipeline.
+
+Every --interval seconds: one conditional / since-cursor fetch of every feed,
+dedup, append to the ingest spool, then run the downstream stages so the new
+items become searchable by IntelAnalyst.
+
+    uv run python -m app.workers.ingest_feeds --once
+"""
+import argparse
+import asyncio
+import os
+
+from src.intel.cti_feeds import CTI_FEEDS_PATH, FeedCollector, FeedStore, ingest_feeds, load_feeds
+from src.rag.pipeline import PIPELINE_WORK_DIR, STAGES, PipelineState
+from src.rag.stages import run_named_stage
+
+CTI_POLL_SECONDS = float(os.getenv("CTI_POLL_SECONDS", "900"))
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--feeds", default=CTI_FEEDS_PATH)
+    ap.add_argument("--work-dir", default=PIPELINE_WORK_DIR)
+    ap.add_argument("--interval", type=float, default=CTI_POLL_SECONDS)
+    ap.add_argument("--once", action="store_true")
+    ap.add_argument("--no-index", action="store_true", help="only append to the ingest spool")
+    args = ap.parse_args()
+
+    feeds, host_rates = load_feeds(args.feeds)
+    state = PipelineState(args.work_dir)
+    collector = FeedCollector(FeedStore.for_state(state), host_rates=host_rates)
+    try:
+        while True:
+            stats = await ingest_feeds(state, feeds, collector)
+            print(stats, flush=True)
+            if stats.new and not args.no_index:
+                for stage in STAGES[1:]:
+                    print(run_named_stage(state, stage), flush=True)
+            if args.once:
+                break
+            await asyncio.sleep(args.interval)
+    finally:
+        await collector.aclose()
+        collector.store.close()
+        state.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,10 @@
+# pipelines/04_embed/run.py
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from src.rag.stages import stage_main
+
+if __name__ == "__main__":
+    stage_main("embed")
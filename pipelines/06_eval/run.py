@@ -0,0 +1,263 @@
+# pipelines/06_eval/run.py
+"""
+Offline eval: retrieval quality and per-stage latency.
+
+Builds fixtures/corpus through the RAG pipeline into a scratch work dir (or
+uses --index-dir), then replays fixtures/cases.jsonl. Each prompt goes
+through the hybrid retriever (recall@k and MRR against the case's relevant
+doc ids) and through a full run_conversation turn (per-agent latency from
+the trace). Each turn is then persisted through the app's write-behind
+batcher into a stand-in database that BSON-encodes every document as the
+driver would, so "persist" covers everything but the network and mongod.
+
+With --llm stub (the default) a FakeLLMServer answers every runner call,
+query embeddings included, so results are deterministic and need no GPU.
+Results go to --out as JSON; --baseline compares against an earlier run and
+--fail-on-regression turns a quality drop or a p95 slowdown into exit 1.
+
+    python pipelines/06_eval/run.py --out data/eval/latest.json --baseline data/eval/main.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import bson
+from bson import ObjectId
+
+from app.persistence import Exchange, WriteBehindBatcher
+from app.traces import encode_trace
+from src.config.settings import LLM_MODEL
+from src.llm.runners.base import close_http_client
+from src.llm.runners.fake_server import FakeLLMServer
+from src.llm.runners.registry import get_runner
+from src.orchestrator.coordinator import arun_conversation
+from src.rag.embedding import EMBED_DIM, RunnerEmbedder, make_embedder
+from src.rag.pipeline import STAGES, PipelineState
+from src.rag.retriever import HybridRetriever, parse_filters, set_retriever
+from src.rag.stages import run_named_stage
+
+HERE = Path(__file__).resolve().parent
+
+def load_cases(path: Path) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def build_index(work_dir: Path, corpus: Path) -> Path:
+    state = PipelineState(str(work_dir))
+    try:
+        for stage in STAGES:
+            run_named_stage(state, stage, source=str(corpus))
+    finally:
+        state.close()
+    return work_dir / "index"
+
+def ranked_docs(passages) -> list[str]:
+    seen: list[str] = []
+    for p in passages:
+        doc = p.meta.get("doc_id") or p.chunk_id.split("::", 1)[0]
+        if doc not in seen:
+            seen.append(doc)
+    return seen
+
+def percentiles(ms: list[float]) -> dict:
+    a = np.asarray(ms, dtype=np.float64)
+    return {"n": len(a), "mean": round(float(a.mean()), 3), "p50": round(float(np.percentile(a, 50)), 3),
+            "p90": round(float(np.percentile(a, 90)), 3), "p95": round(float(np.percentile(a, 95)), 3),
+            "p99": round(float(np.percentile(a, 99)), 3), "max": round(float(a.max()), 3)}
+
+def _ms(t0: float) -> float:
+    return (time.perf_counter() - t0) * 1000
+
+class _EncodingCollection:
+    def __init__(self):
+        self.docs = 0
+        self.bytes = 0
+
+    async def insert_many(self, docs, ordered=True):
+        for d in docs:
+            d.setdefault("_id", ObjectId())
+            self.bytes += len(bson.encode(d))
+        self.docs += len(docs)
+        await asyncio.sleep(0)  # the driver's round trip, minus the network
+
+    async def bulk_write(self, ops, ordered=True):
+        self.docs += len(ops)
+        await asyncio.sleep(0)
+
+class EncodingDB:
+    """Mongo stand-in for the persist timing: encodes what the driver would send, stores nothing."""
+
+    def __init__(self):
+        self.messages, self.traces, self.conversations = (_EncodingCollection() for _ in range(3))
+
+async def persist_turn(writer: WriteBehindBatcher, prompt: str, result: dict) -> None:
+    """What the chat router does after a turn: message docs, encoded trace, one write-behind submit."""
+    conv, now = ObjectId(), datetime.now(timezone.utc).isoformat()
+    docs = [{"conversation_id": conv, "role": "user", "content": prompt, "created_at": now},
+            {"conversation_id": conv, "role": "assistant", "content": result["final"]["summary"], "created_at": now}]
+    trace = encode_trace(conv, ObjectId(), result["steps"], result["final"], now)
+    await writer.submit(Exchange(conversation_id=conv, updated_at=now, messages=docs, trace=trace))
+
+async def evaluate(cases: list[dict], retriever: HybridRetriever, ks: list[int], repeat: int) -> dict:
+    timings: dict[str, list[float]] = defaultdict(list)
+    db = EncodingDB()
+    writer = WriteBehindBatcher(db=lambda: db)
+    recall: dict[int, list[float]] = {k: [] for k in ks}
+    rr: list[float] = []
+    per_case = []
+    for case in cases:
+        query, filters = parse_filters(case["prompt"])
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            passages = await retriever.asearch(query, max(ks), filters)
+            timings["retrieve"].append(_ms(t0))
+        docs, relevant = ranked_docs(passages), set(case["relevant"])
+        first = next((i for i, d in enumerate(docs, 1) if d in relevant), None)
+        rr.append(1.0 / first if first else 0.0)
+        for k in ks:
+            recall[k].append(len(relevant & set(docs[:k])) / len(relevant))
+
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            result = await arun_conversation([{"role": "user", "content": case["prompt"]}])
+            timings["turn"].append(_ms(t0))
+            for s in result["steps"]:
+                timings[f"agent.{s['agent']}"].append(s["latency_ms"])
+            t0 = time.perf_counter()
+            await persist_turn(writer, case["prompt"], result)
+            timings["persist"].append(_ms(t0))
+        per_case.append({"id": case["id"], "first_relevant_rank": first, "retrieved": docs})
+    await writer.close()
+
+    return {
+        "retrieval": {**{f"recall@{k}": round(float(np.mean(v)), 4) for k, v in recall.items()},
+                      "mrr": round(float(np.mean(rr)), 4)},
+        "latency_ms": {stage: percentiles(v) for stage, v in sorted(timings.items())},
+        "cases": per_case,
+    }
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Print deltas vs. baseline; return the regressions (quality drops, p95 beyond tolerance)."""
+    regressions = []
+    print("\nvs. baseline")
+    for name, val in current["retrieval"].items():
+        old = baseline.get("retrieval", {}).get(name)
+        if old is None:
+            continue
+        print(f"  {name:<22} {old:>9.4f} -> {val:<9.4f} ({val - old:+.4f})")
+        if val < old - 1e-9:
+            regressions.append(f"{name} dropped {old:.4f} -> {val:.4f}")
+    for stage, cur in current["latency_ms"].items():
+        old = baseline.get("latency_ms", {}).get(stage)
+        if not old:
+            continue
+        ratio = cur["p95"] / old["p95"] if old["p95"] else 1.0
+        print(f"  {stage + ' p95 ms':<22} {old['p95']:>9.3f} -> {cur['p95']:<9.3f} ({ratio - 1:+.1%})")
+        # sub-millisecond stages are all noise; only flag real slowdowns
+        if ratio > 1 + tolerance and cur["p95"] - old["p95"] > 1.0:
+            regressions.append(f"{stage} p95 {old['p95']:.3f} -> {cur['p95']:.3f} ms")
+    return regressions
+
+def git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=HERE, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run(args, retriever: HybridRetriever, cases: list[dict]) -> dict:
+    try:
+        return await evaluate(cases, retriever, args.k, args.repeat)
+    finally:
+        await close_http_client()
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Offline retrieval + agent latency eval")
+    ap.add_argument("--cases", default=str(HERE / "fixtures" / "cases.jsonl"))
+    ap.add_argument("--corpus", default=str(HERE / "fixtures" / "corpus"))
+    ap.add_argument("--index-dir", help="evaluate an existing index instead of building the fixture corpus")
+    ap.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    ap.add_argument("--repeat", type=int, default=5, help="timed repetitions per case")
+    ap.add_argument("--llm", choices=("stub", "live"), default="stub",
+                    help="stub: in-process FakeLLMServer (deterministic, CI); live: configured backend")
+    ap.add_argument("--out", help="write the JSON report here")
+    ap.add_argument("--baseline", help="earlier JSON report to compare against")
+    ap.add_argument("--latency-tolerance", type=float, default=0.25, help="allowed p95 slowdown (fraction)")
+    ap.add_argument("--fail-on-regression", action="store_true")
+    args = ap.parse_args()
+
+    server = None
+    if args.llm == "stub":
+        server = FakeLLMServer(embed_dim=EMBED_DIM).start()
+        embedder = RunnerEmbedder(get_runner("ollama", server.url, LLM_MODEL))
+    else:
+        embedder = make_embedder()
+
+    scratch = None
+    if args.index_dir:
+        index_dir = Path(args.index_dir)
+    else:
+        scratch = Path(tempfile.mkdtemp(prefix="rag_eval_"))
+        index_dir = build_index(scratch, Path(args.corpus))
+    retriever = HybridRetriever(index_dir, embedder)
+    set_retriever(retriever)  # IntelAnalyst retrieves from the same index during the turns
+    cases = load_cases(Path(args.cases))
+    try:
+        report = asyncio.run(run(args, retriever, cases))
+    finally:
+        set_retriever(None)
+        if server is not None:
+            server.stop()
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    report["meta"] = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git": git_rev(),
+        "cases": len(cases),
+        "k": args.k,
+        "repeat": args.repeat,
+        "llm": args.llm,
+        "embedder": getattr(embedder, "name", type(embedder).__name__),
+        "index": retriever.store.stats(),
+        "cores": os.cpu_count(),
+    }
+
+    print(f"{len(cases)} cases, llm={args.llm}, repeat={args.repeat}")
+    for name, val in report["retrieval"].items():
+        print(f"  {name:<8} {val:.4f}")
+    print(f"  {'stage':<24} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)")
+    for stage, p in report["latency_ms"].items():
+        print(f"  {stage:<24} {p['p50']:>8.3f} {p['p95']:>8.3f} {p['p99']:>8.3f}")
+    misses = [c["id"] for c in report["cases"] if c["first_relevant_rank"] is None]
+    if misses:
+        print(f"  no relevant doc retrieved: {', '.join(misses)}")
+
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.latency_tolerance)
+        for r in regressions:
+            print(f"REGRESSION: {r}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
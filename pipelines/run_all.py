@@ -0,0 +1,10 @@
+# pipelines/run_all.py
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.rag.stages import all_main
+
+if __name__ == "__main__":
+    all_main()
@@ -0,0 +1,80 @@
+# scripts/bench_chunking.py
+"""
+Normalize+chunk throughput vs. --workers.
+
+Writes a synthetic HTML CTI corpus into an ingest spool, then runs the
+normalize and chunk stages with 1..N worker processes and reports docs/s,
+speedup, and a digest of the chunk spool (must be identical for every
+worker count: output order is deterministic).
+
+    uv run python scripts/bench_chunking.py --docs 20000 --workers 1 2 4 8
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.rag.pipeline import PipelineState, run_stage, spool_path
+from src.rag.preprocess.chunk import chunk_docs
+from src.rag.preprocess.normalize import normalize_docs
+
+VOCAB = ("scan", "beacon", "lateral", "movement", "credential", "dump", "powershell", "exfil", "c2",
+         "persistence", "registry", "phishing", "payload", "loader", "ransomware", "sigma", "yara")
+
+def synth_doc(i: int, rnd: random.Random, words: int) -> dict:
+    paras = []
+    for _ in range(max(1, words // 60)):
+        sent = " ".join(rnd.choice(VOCAB) for _ in range(12))
+        ioc = f"203.0.113.{rnd.randrange(255)} CVE-2024-{rnd.randrange(99999)}"
+        paras.append(f"<p>{sent.capitalize()} from {ioc}. {sent} &amp; more.</p>" * 4)
+    return {"doc_id": f"doc{i}", "source": "synthetic", "format": "html", "tlp": "clear",
+            "text": "<html><body>" + "".join(paras) + "<script>t()</script></body></html>"}
+
+def digest(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:16]
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=5000)
+    ap.add_argument("--words", type=int, default=800)
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = ap.parse_args()
+
+    src_dir = tempfile.mkdtemp(prefix="bench_chunk_src_")
+    rnd = random.Random(7)
+    with open(spool_path(src_dir, "ingest"), "w", encoding="utf-8") as f:
+        for i in range(args.docs):
+            f.write(json.dumps(synth_doc(i, rnd, args.words)) + "\n")
+
+    print(f"{args.docs} docs, ~{args.words} words each, cores={os.cpu_count()}")
+    print(f"{'workers':>7} {'docs/s':>10} {'speedup':>8} {'chunks':>8} {'digest':>18}")
+    base = None
+    for w in args.workers:
+        work = tempfile.mkdtemp(prefix="bench_chunk_")
+        shutil.copy(spool_path(src_dir, "ingest"), spool_path(work, "ingest"))
+        state = PipelineState(work)
+        t0 = time.perf_counter()
+        run_stage(state, "normalize", normalize_docs, upstream="ingest", batch_size=args.batch_size, workers=w)
+        st = run_stage(state, "chunk", chunk_docs, upstream="normalize", batch_size=args.batch_size, workers=w)
+        secs = time.perf_counter() - t0
+        rate = args.docs / secs
+        base = base or rate
+        print(f"{w:>7} {rate:>10.0f} {rate / base:>8.2f} {st.records_out:>8} {digest(spool_path(work, 'chunk')):>18}")
+        state.close()
+        shutil.rmtree(work)
+    shutil.rmtree(src_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# scripts/bench_episodic_memory.py
+"""
+Per-turn episodic memory cost vs. incident thread length.
+
+Seeds a throwaway database with one conversation of N stored messages
+(N growing), folds it once (the catch-up a pre-existing thread pays on its
+first load), then times steady-state turns: load the tail, build the
+window, apply the folded state as the write-behind flush would and append
+the turn's two messages. With the tail query on ix_messages_conv_created
+after the summary cursor, turn latency, messages fetched and context
+tokens should stay flat as N grows.
+
+    uv run python scripts/bench_episodic_memory.py --sizes 100 1000 10000 50000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("MONGODB_DB", "sec_copilot_bench")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bson import ObjectId
+
+from app.db import doc_with_id, get_db, init_db
+from src.memory.episodic import EpisodicMemory
+from src.rag.preprocess.chunk import count_tokens
+
+def text(i: int) -> str:
+    return (f"Turn {i}: host ws-{i % 97} beaconed to 198.51.100.{i % 250} and c2-{i}.example.net. "
+            f"Isolated it, pulled the EDR timeline and opened ticket INC-{10000 + i}.")
+
+async def seed(db, conv_oid: ObjectId, n: int) -> datetime:
+    await db.messages.delete_many({"conversation_id": conv_oid})
+    base = datetime(2025, 1, 1)
+    batch = []
+    for i in range(n):
+        content = text(i)
+        batch.append({"conversation_id": conv_oid, "role": "user" if i % 2 == 0 else "assistant",
+                      "content": content, "tokens": count_tokens(content),
+                      "created_at": (base + timedelta(seconds=i)).isoformat()})
+        if len(batch) == 5000:
+            await db.messages.insert_many(batch)
+            batch = []
+    if batch:
+        await db.messages.insert_many(batch)
+    return base + timedelta(seconds=n)
+
+async def turn(db, memory: EpisodicMemory, conv: dict, ts: datetime, i: int) -> tuple[float, int, int]:
+    t0 = time.perf_counter()
+    ep = await memory.load(db, conv)
+    window = memory.window(ep, [{"role": "user", "content": text(i)}])
+    ms = (time.perf_counter() - t0) * 1000
+    if window.state is not None:
+        conv["episodic"] = window.state
+        await db.conversations.update_one({"_id": ObjectId(conv["id"])}, {"$set": {"episodic": window.state}})
+    for k, role in enumerate(("user", "assistant")):
+        await db.messages.insert_one({"conversation_id": ObjectId(conv["id"]), "role": role, "content": text(i),
+                                      "tokens": count_tokens(text(i)),
+                                      "created_at": (ts + timedelta(seconds=2 * i + k)).isoformat()})
+    return ms, len(ep.tail), window.tokens
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--turns", type=int, default=50)
+    ap.add_argument("--budget", type=int, default=2048)
+    args = ap.parse_args()
+
+    db = get_db()
+    await init_db()
+    memory = EpisodicMemory(budget=args.budget)
+    for n in args.sizes:
+        conv_oid = ObjectId()
+        await db.conversations.insert_one({"_id": conv_oid, "title": "bench", "owner_id": ObjectId()})
+        ts = await seed(db, conv_oid, n)
+        conv = doc_with_id(await db.conversations.find_one({"_id": conv_oid}))
+
+        t0 = time.perf_counter()
+        ep = await memory.load(db, conv)
+        first = memory.window(ep, [{"role": "user", "content": text(n)}])
+        catch_up = (time.perf_counter() - t0) * 1000
+        if first.state is not None:
+            conv["episodic"] = first.state
+            await db.conversations.update_one({"_id": conv_oid}, {"$set": {"episodic": first.state}})
+
+        ms, fetched, tokens = zip(*[await turn(db, memory, conv, ts, n + i) for i in range(args.turns)])
+        print(f"N={n:>6}: first load {catch_up:8.1f} ms (folded {conv.get('episodic', {}).get('folded', 0)}); "
+              f"turn p50 {statistics.median(ms):.2f} ms p95 {sorted(ms)[int(0.95 * len(ms))]:.2f} ms; "
+              f"tail fetched max {max(fetched)}; context tokens max {max(tokens)} (budget {args.budget})")
+        await db.messages.delete_many({"conversation_id": conv_oid})
+        await db.conversations.delete_one({"_id": conv_oid})
+
+if __name__ == "__main__":
+    asyncio.run(main())
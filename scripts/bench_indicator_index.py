@@ -0,0 +1,127 @@
+# scripts/bench_indicator_index.py
+"""
+Indicator index build time, memory and lookup latency at SOC scale.
+
+Builds an index of --indicators mixed indicators (IPv4 hosts and CIDRs,
+IPv6 prefixes, domains, sha256), then times lookups of IPs, CIDR targets,
+subdomains and hashes (half hits, half misses), IOC extraction throughput
+on defanged CTI prose, and the exported Bloom filter's size and measured
+false-positive rate. Longest-prefix answers are checked against a brute
+force over ipaddress networks on a smaller index.
+
+    uv run python scripts/bench_indicator_index.py --indicators 1000000
+"""
+import argparse
+import ipaddress
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.intel.normalizers import IndicatorIndex, extract_iocs
+
+PROSE = ("Beacons to 203.0.113[.]12 and hxxps[://]cdn-update(.)example[.]net/gate.php from 10.2.3.4, "
+         "payload e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855 dropped as svc.exe; "
+         "exploits CVE-2024-3400, C2 on 2001:db8:5::7 and login.evil-corp[.]com. Patch and block. ")
+
+def v4(rnd: random.Random) -> str:
+    return ".".join(str(rnd.randrange(256)) for _ in range(4))
+
+def build(rnd: random.Random, n: int) -> tuple[IndicatorIndex, dict]:
+    idx = IndicatorIndex()
+    sample: dict[str, list[str]] = {"ip": [], "cidr": [], "domain": [], "sha256": []}
+    for i in range(n):
+        r = rnd.random()
+        if r < 0.6:
+            v = v4(rnd)
+            idx.add("ipv4", v, "feed-a")
+            sample["ip"].append(v)
+        elif r < 0.7:
+            plen = rnd.choice((16, 20, 22, 24, 24, 24, 28, 30))
+            v = str(ipaddress.ip_network(f"{v4(rnd)}/{plen}", strict=False))
+            idx.add("cidr", v, "feed-b")
+            sample["cidr"].append(v)
+        elif r < 0.75:
+            v = f"2001:db8:{rnd.randrange(65536):x}:{rnd.randrange(65536):x}::/64"
+            idx.add("cidr", v, "feed-b")
+        elif r < 0.9:
+            v = f"h{i:x}.{rnd.choice(('evil', 'bad', 'c2'))}{rnd.randrange(10**6)}.com"
+            idx.add("domain", v, "feed-c")
+            sample["domain"].append(v)
+        else:
+            v = rnd.getrandbits(256).to_bytes(32, "big").hex()
+            idx.add("sha256", v, "feed-d")
+            sample["sha256"].append(v)
+    return idx, sample
+
+def timed(fn, queries: list[str]) -> tuple[float, int]:
+    t0 = time.perf_counter()
+    hits = sum(fn(q) is not None for q in queries)
+    return (time.perf_counter() - t0) / len(queries) * 1e6, hits
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--indicators", type=int, default=1_000_000)
+    ap.add_argument("--queries", type=int, default=100_000)
+    args = ap.parse_args()
+    rnd = random.Random(11)
+
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    idx, sample = build(rnd, args.indicators)
+    build_s = time.perf_counter() - t0
+    rss = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss0) / 1024
+    print(f"build: {len(idx)} indicators in {build_s:.1f}s, ~{rss:.0f} MB RSS; {idx.stats()}")
+
+    q = args.queries // 2
+    cases = {
+        "ipv4": [rnd.choice(sample["ip"]) for _ in range(q)] + [v4(rnd) for _ in range(q)],
+        "cidr target /24": [str(ipaddress.ip_network(f"{v4(rnd)}/24", strict=False)) for _ in range(2 * q)],
+        "subdomain": [f"www.{rnd.choice(sample['domain'])}" for _ in range(q)] + [f"www.x{i}.example.org" for i in range(q)],
+        "sha256": [rnd.choice(sample["sha256"]) for _ in range(q)] + [rnd.getrandbits(256).to_bytes(32, "big").hex()
+                                                                     for _ in range(q)],
+    }
+    for name, queries in cases.items():
+        idx.lookup(queries[0])  # builds the sorted range starts once
+        us, hits = timed(idx.lookup, queries)
+        print(f"lookup {name:<16} {us:6.2f} us  ({hits}/{len(queries)} hits)")
+    us, hits = timed(idx.match_ip, cases["ipv4"])
+    print(f"match_ip (parsed)       {us:6.2f} us")
+
+    text = PROSE * 2000
+    t0 = time.perf_counter()
+    n = len(extract_iocs(text, unique=False))
+    dt = time.perf_counter() - t0
+    print(f"extract: {len(text) / 2**20 / dt:.2f} MB/s ({n} IOCs)")
+
+    bf = idx.bloom(0.01)
+    probes = [f"domain:www.x{i}.example.org" for i in range(q)]
+    fp = sum(p in bf for p in probes) / len(probes)
+    print(f"bloom: {len(bf.to_bytes()) / 2**20:.1f} MB for the exact indicators, k={bf.k}, measured fp {fp:.4f}")
+
+    # longest-prefix correctness against brute force
+    small = IndicatorIndex()
+    nets = []
+    for _ in range(3000):
+        net = ipaddress.ip_network(f"{v4(rnd)}/{rnd.randrange(8, 33)}", strict=False)
+        nets.append(net)
+        small.add("cidr", str(net))
+    nets += [ipaddress.ip_network(f"{ip}/{plen}", strict=False)
+             for ip, plen in ((v4(rnd), rnd.randrange(12, 25)) for _ in range(200))]
+    for net in nets[3000:]:
+        small.add("cidr", str(net))
+    bad = 0
+    for _ in range(2000):
+        near = (int(nets[rnd.randrange(len(nets))].network_address) + rnd.randrange(4096)) % 2**32
+        ip = ipaddress.ip_address(near if rnd.random() < 0.5 else v4(rnd))
+        expect = max((n.prefixlen for n in nets if ip in n), default=None)
+        got = small.match_ip(str(ip))
+        bad += (got.indicator.rsplit("/", 1)[-1] if got and "/" in got.indicator else
+                ("32" if got else None)) != (str(expect) if expect is not None else None)
+    print(f"longest-prefix check: {bad} mismatches vs brute force over 2000 addresses")
+
+if __name__ == "__main__":
+    main()
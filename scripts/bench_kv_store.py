@@ -0,0 +1,110 @@
+# scripts/bench_kv_store.py
+"""
+KV store throughput vs. an in-process dict, plus a multi-process check.
+
+Times get / set / mget / mset over --keys keys (set and mset are
+write-behind, so the final flush is included in their time), then starts
+--procs worker processes that each mset their own keys and overwrite one
+shared set of keys, and checks from the parent that every key is there and
+which writers the shared keys ended up with. TTL expiry is checked too.
+
+    uv run python scripts/bench_kv_store.py --keys 100000 --procs 4
+"""
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.memory.kv_store import KVStore
+
+def value(i: int) -> dict:
+    return {"user_id": f"u{i}", "email": f"user{i}@example.com", "roles": ["analyst"], "n": i}
+
+def rate(n: int, dt: float) -> str:
+    return f"{n / dt / 1000:9.1f}k ops/s"
+
+async def bench(path: str, n: int, batch: int) -> None:
+    keys = [f"user:{i}" for i in range(n)]
+    d: dict = {}
+    t0 = time.perf_counter()
+    for i, k in enumerate(keys):
+        d[k] = value(i)
+    dict_set = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for k in keys:
+        d.get(k)
+    dict_get = time.perf_counter() - t0
+
+    kv = KVStore(path)
+    t0 = time.perf_counter()
+    for i, k in enumerate(keys):
+        await kv.set(k, value(i))
+    await kv.flush()
+    kv_set = time.perf_counter() - t0
+    print(f"set   dict {rate(n, dict_set)}   kv {rate(n, kv_set)}  ({kv.stats()['avg_batch']:.0f} keys/commit)")
+
+    t0 = time.perf_counter()
+    for k in keys:
+        await kv.get(k)
+    kv_get = time.perf_counter() - t0
+    print(f"get   dict {rate(n, dict_get)}   kv {rate(n, kv_get)}")
+
+    t0 = time.perf_counter()
+    for i in range(0, n, batch):
+        await kv.mset({k: value(j) for j, k in enumerate(keys[i:i + batch], i)})
+    await kv.flush()
+    print(f"mset  ({batch}/call)              kv {rate(n, time.perf_counter() - t0)}")
+    t0 = time.perf_counter()
+    got = 0
+    for i in range(0, n, batch):
+        got += len(await kv.mget(keys[i:i + batch]))
+    print(f"mget  ({batch}/call)              kv {rate(n, time.perf_counter() - t0)}  ({got}/{n} found)")
+
+    await kv.set("ephemeral", 1, ttl=0.2, durable=True)
+    assert await kv.get("ephemeral") == 1
+    await asyncio.sleep(0.3)
+    assert await kv.get("ephemeral") is None
+    await kv.close()
+
+def worker(path: str, w: int, n: int, shared: int) -> None:
+    async def run():
+        kv = KVStore(path)
+        for i in range(0, n, 500):
+            await kv.mset({f"w{w}:{j}": j for j in range(i, min(n, i + 500))})
+            await kv.mset({f"shared:{j}": w for j in range(shared)})
+        await kv.close()
+    asyncio.run(run())
+
+async def multiprocess(path: str, procs: int, n: int, shared: int) -> None:
+    ctx = mp.get_context("spawn")
+    t0 = time.perf_counter()
+    ps = [ctx.Process(target=worker, args=(path, w, n, shared)) for w in range(procs)]
+    for p in ps:
+        p.start()
+    for p in ps:
+        p.join()
+    dt = time.perf_counter() - t0
+    kv = KVStore(path)
+    found = sum([len(await kv.mget([f"w{w}:{j}" for j in range(n)])) for w in range(procs)])
+    owners = set((await kv.mget([f"shared:{j}" for j in range(shared)])).values())
+    print(f"{procs} processes: {found}/{procs * n} own keys present, shared keys last written by {sorted(owners)}, "
+          f"exit codes {[p.exitcode for p in ps]}, {dt:.1f}s incl. spawn")
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--keys", type=int, default=100_000)
+    ap.add_argument("--batch", type=int, default=100)
+    ap.add_argument("--procs", type=int, default=4)
+    ap.add_argument("--proc-keys", type=int, default=20_000)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as work:
+        await bench(os.path.join(work, "bench.sqlite"), args.keys, args.batch)
+        await multiprocess(os.path.join(work, "mp.sqlite"), args.procs, args.proc_keys, 200)
+
+if __name__ == "__main__":
+    asyncio.run(main())
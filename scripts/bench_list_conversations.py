@@ -0,0 +1,78 @@
+# scripts/bench_list_conversations.py
+"""
+Sidebar listing latency vs. per-user conversation count.
+
+Seeds a throwaway database with N conversations for one owner (N growing),
+then times the first page and a deep page of GET /data/conversations via
+the router function itself. With keyset pagination over
+ix_conversations_owner_updated the numbers should stay flat as N grows.
+
+    uv run python scripts/bench_list_conversations.py --sizes 100 1000 10000 50000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("MONGODB_DB", "sec_copilot_bench")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bson import ObjectId
+from fastapi import Response
+
+from app.db import get_db, init_db
+from app.api.routers.data import list_conversations
+
+async def seed(db, owner: ObjectId, n: int) -> None:
+    await db.conversations.delete_many({"owner_id": owner})
+    base = datetime(2025, 1, 1)
+    batch = []
+    for i in range(n):
+        ts = (base + timedelta(seconds=i)).isoformat()
+        batch.append({"title": f"incident {i}", "owner_id": owner, "folder_id": None,
+                      "created_at": ts, "updated_at": ts})
+        if len(batch) == 5000:
+            await db.conversations.insert_many(batch)
+            batch = []
+    if batch:
+        await db.conversations.insert_many(batch)
+
+async def timed_page(user: dict, after: str | None, limit: int) -> tuple[float, str | None]:
+    resp = Response()
+    t0 = time.perf_counter()
+    await list_conversations(response=resp, after=after, limit=limit, view="sidebar", user=user)
+    return (time.perf_counter() - t0) * 1000, resp.headers.get("X-Next-Cursor")
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--limit", type=int, default=50)
+    ap.add_argument("--pages", type=int, default=20, help="pages to walk for the deep-page timing")
+    ap.add_argument("--repeat", type=int, default=30)
+    args = ap.parse_args()
+
+    db = get_db()
+    await init_db()
+    owner = ObjectId()
+    user = {"id": str(owner)}
+
+    print(f"{'convs':>8} {'first p50 ms':>13} {'first p95 ms':>13} {'deep p50 ms':>12}")
+    for n in args.sizes:
+        await seed(db, owner, n)
+        firsts = sorted([(await timed_page(user, None, args.limit))[0] for _ in range(args.repeat)])
+        deep, cursor = [], None
+        for _ in range(args.pages):
+            ms, cursor = await timed_page(user, cursor, args.limit)
+            deep.append(ms)
+            if not cursor:
+                break
+        print(f"{n:>8} {statistics.median(firsts):>13.2f} {firsts[int(0.95 * (len(firsts) - 1))]:>13.2f} "
+              f"{statistics.median(deep):>12.2f}")
+
+    await db.conversations.delete_many({"owner_id": owner})
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+# scripts/bench_llm_runner.py
+"""
+Runner throughput/latency under N concurrent conversations.
+
+Starts the deterministic fake LLM server, then runs N conversations that
+each issue one prompt per agent (5 agents) concurrently, and reports
+tokens/s, p50/p95 per-call latency and average micro-batch size.
+
+    uv run python scripts/bench_llm_runner.py --backend vllm --conversations 1 8 32
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.llm.runners.base import close_http_client
+from src.llm.runners.fake_server import FakeLLMServer
+from src.llm.runners.registry import _runner_class
+
+AGENTS = ("intel_analyst", "attacker", "defender", "toolsmith", "decider")
+
+async def run_level(runner, n_conv: int, max_tokens: int, stream: bool) -> dict:
+    latencies: list[float] = []
+    tokens = 0
+
+    async def call(conv: int, agent: str) -> None:
+        nonlocal tokens
+        prompt = f"[{agent}] incident #{conv}: SYN scan from 203.0.113.{conv % 255}"
+        t0 = time.perf_counter()
+        if stream:
+            async for _ in runner.stream(prompt, max_tokens=max_tokens):
+                tokens += 1
+        else:
+            res = await runner.generate(prompt, max_tokens=max_tokens)
+            tokens += res.completion_tokens
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(call(c, a) for c in range(n_conv) for a in AGENTS))
+    wall = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "tok_s": tokens / wall,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(0.95 * (len(latencies) - 1))],
+    }
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", default="vllm", choices=["ollama", "vllm", "llama_cpp", "openai_compat"])
+    ap.add_argument("--conversations", type=int, nargs="+", default=[1, 4, 16, 64])
+    ap.add_argument("--max-tokens", type=int, default=32)
+    ap.add_argument("--token-delay-ms", type=float, default=1.0)
+    ap.add_argument("--request-overhead-ms", type=float, default=5.0)
+    ap.add_argument("--stream", action="store_true")
+    args = ap.parse_args()
+
+    with FakeLLMServer(token_delay_ms=args.token_delay_ms, request_overhead_ms=args.request_overhead_ms) as srv:
+        print(f"backend={args.backend} stream={args.stream} server={srv.url}")
+        print(f"{'convs':>6} {'tok/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'avg batch':>10}")
+        for n in args.conversations:
+            runner = _runner_class(args.backend)(srv.url, "fake")
+            res = await run_level(runner, n, args.max_tokens, args.stream)
+            print(f"{n:>6} {res['tok_s']:>10.0f} {res['p50']:>9.1f} {res['p95']:>9.1f} "
+                  f"{runner.stats()['avg_batch']:>10.2f}")
+    await close_http_client()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+# scripts/bench_policies.py
+"""
+Tool policy validation throughput.
+
+Validates a mix of allowed and rejected tool requests against the compiled
+policies/tool_allowlist.yaml one at a time and in batches, and against a
+naive checker that re-reads the YAML and re-parses the CIDR lists on every
+call (what an uncompiled policy costs).
+
+    uv run python scripts/bench_policies.py --n 200000
+"""
+import argparse
+import ipaddress
+import os
+import random
+import sys
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.orchestrator.policies import POLICY_PATH, PolicyEngine
+
+def requests(n: int, rnd: random.Random) -> list[dict]:
+    targets = ["203.0.113.12", "10.1.2.3", "192.168.0.0/24", "127.0.0.1", "8.8.8.8", "169.254.169.254",
+               "203.0.113.0/28, 10.0.0.5"]
+    scans = ["-sS -Pn", "-sS -sV -T4 -p22,443", "-sS -p 1-1024", "-A", "-sS 1.2.3.4", "--top-ports 100 -Pn"]
+    out = []
+    for _ in range(n):
+        name = "nmap" if rnd.random() < 0.95 else "hydra"
+        out.append({"name": name, "args": {"target": rnd.choice(targets), "scan": rnd.choice(scans)}})
+    return out
+
+def naive_validate(path: str, name: str, args: dict) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        doc = yaml.safe_load(f)
+    tool = doc["tools"].get(name)
+    if tool is None:
+        return ["tool_not_allowed"]
+    hits = [f"flag_not_allowed:{t}" for t in args.get("scan", "").split()
+            if t.startswith("-") and t not in tool.get("allowed_flags", [])]
+    for t in args.get("target", "").replace(",", " ").split():
+        net = ipaddress.ip_network(t, strict=False)
+        if any(net.overlaps(ipaddress.ip_network(d)) for d in doc["targets"]["deny"]):
+            hits.append(f"target_denied:{t}")
+        elif not any(net.subnet_of(ipaddress.ip_network(a)) for a in doc["targets"]["allow"]):
+            hits.append(f"target_not_allowed:{t}")
+    return hits
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--batch", type=int, default=64)
+    ap.add_argument("--naive-n", type=int, default=2_000)
+    args = ap.parse_args()
+
+    reqs = requests(args.n, random.Random(5))
+    engine = PolicyEngine(POLICY_PATH)
+    engine.current()
+
+    t0 = time.perf_counter()
+    single = [engine.validate(r["name"], r["args"]) for r in reqs]
+    t_single = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batched = []
+    for i in range(0, len(reqs), args.batch):
+        batched.extend(engine.validate_batch(reqs[i:i + args.batch]))
+    t_batch = time.perf_counter() - t0
+    assert batched == single
+
+    t0 = time.perf_counter()
+    for r in reqs[:args.naive_n]:
+        naive_validate(POLICY_PATH, r["name"], r["args"])
+    t_naive = (time.perf_counter() - t0) / args.naive_n * args.n
+
+    rejected = sum(1 for h in single if h)
+    print(f"{args.n} requests ({rejected} rejected)")
+    print(f"{'mode':>16} {'validations/s':>14} {'us/req':>8}")
+    for mode, secs in (("compiled", t_single), (f"batch={args.batch}", t_batch), ("naive (reparse)", t_naive)):
+        print(f"{mode:>16} {args.n / secs:>14,.0f} {secs / args.n * 1e6:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# scripts/bench_prompt_guard.py
+"""
+Prompt-guard scan cost vs. rule count.
+
+Compiles the shipped rules plus N synthetic phrases into one JailbreakFilter
+and scans a CTI-like corpus, next to the naive approach of one compiled
+regex per phrase. The automaton's time per MB should stay roughly flat as
+N grows; the naive scan grows linearly with N.
+
+    uv run python scripts/bench_prompt_guard.py --rules 0 100 1000 5000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.llm.guards.jailbreak_filters import JailbreakFilter, Rule, default_filter, normalize
+
+VOCAB = ("scan", "beacon", "lateral", "movement", "credential", "dump", "powershell", "exfil", "ignore",
+         "previous", "system", "prompt", "instructions", "reveal", "override", "policy", "decode", "run")
+
+def corpus(mb: float, rnd: random.Random) -> list[str]:
+    docs, size = [], 0
+    while size < mb * 2**20:
+        words = [rnd.choice(VOCAB) for _ in range(150)]
+        words.insert(rnd.randrange(150), f"203.0.113.{rnd.randrange(255)}")
+        docs.append(" ".join(words) + ".")
+        size += len(docs[-1])
+    return docs
+
+def synthetic_rules(n: int, rnd: random.Random) -> list[Rule]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    phrases = tuple(" ".join("".join(rnd.choice(letters) for _ in range(rnd.randint(3, 9)))
+                             for _ in range(rnd.randint(2, 5))) for _ in range(n))
+    return [Rule("synthetic", "synthetic", "flag", phrases)] if n else []
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rules", type=int, nargs="+", default=[0, 100, 1000, 5000])
+    ap.add_argument("--mb", type=float, default=2.0)
+    ap.add_argument("--naive-docs", type=int, default=100, help="docs used for the (slow) per-phrase scan")
+    args = ap.parse_args()
+
+    rnd = random.Random(11)
+    docs = corpus(args.mb, rnd)
+    mb = sum(map(len, docs)) / 2**20
+    base = default_filter().rules
+    print(f"corpus {mb:.1f} MB in {len(docs)} docs")
+    print(f"{'phrases':>8} {'compile s':>10} {'automaton ms/MB':>16} {'naive ms/MB':>12} {'hits':>6}")
+    for n in args.rules:
+        t0 = time.perf_counter()
+        guard = JailbreakFilter(list(base) + synthetic_rules(n, rnd))
+        t_compile = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        hits = sum(len(guard.scan(d)) for d in docs)
+        t_auto = time.perf_counter() - t0
+
+        pats = [re.compile(r"(?<![a-z0-9])" + re.escape(p) + r"(?![a-z0-9])") for p in guard._by_phrase]
+        sample = docs[:args.naive_docs]
+        t0 = time.perf_counter()
+        for d in sample:
+            norm = normalize(d)
+            for p in pats:
+                p.search(norm)
+        t_naive = (time.perf_counter() - t0) / (sum(map(len, sample)) / 2**20)
+        print(f"{len(guard):>8} {t_compile:>10.2f} {t_auto * 1000 / mb:>16.0f} {t_naive * 1000:>12.0f} {hits:>6}")
+
+if __name__ == "__main__":
+    main()
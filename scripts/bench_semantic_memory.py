@@ -0,0 +1,98 @@
+# scripts/bench_semantic_memory.py
+"""
+Semantic memory recall latency, near-duplicate accuracy and fast-path savings.
+
+Remembers --incidents decisions for goals drawn from recurring campaign
+templates (fresh indicators each time) and one-off incidents, then:
+  - times recall() for repeat campaigns (new IPs/domains, light rewording)
+    and for unseen incidents, reporting hit rates for both
+  - compares LSH recall against a brute-force scan of all signatures
+  - times full agent turns against fast-path turns through the coordinator
+
+    uv run python scripts/bench_semantic_memory.py --incidents 20000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ["SEMANTIC_MEMORY_PATH"] = ""  # coordinator turns below keep their memory in-process
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from src.memory.semantic import SemanticMemory
+from src.utils.schema import FinalDecision
+
+TEMPLATES = [
+    "Scanning from {ip} against port {port} on the edge VPN, hundreds of SYNs per second from one source",
+    "Brute force SSH logins from {ip} against bastion host, {n} failures in five minutes then one success",
+    "Phishing mail with link to {domain} reported by finance, two users clicked and entered credentials",
+    "EDR flagged powershell downloading payload from {domain} on workstation WS-{n}, encoded command line",
+    "Outbound beaconing every 60 seconds from WS-{n} to {ip} over TLS with a self signed certificate",
+]
+WORDS = ("host server alert user login firewall dns beacon payload mail token admin vpn cloud bucket "
+         "kerberos ticket lateral share backup registry service account macro archive").split()
+
+def ip(rnd):
+    return f"{rnd.choice((198, 203, 192))}.{rnd.randrange(256)}.{rnd.randrange(256)}.{rnd.randrange(1, 255)}"
+
+def campaign(rnd, t: int) -> str:
+    goal = TEMPLATES[t].format(ip=ip(rnd), port=rnd.choice((22, 3389, 445)), n=rnd.randrange(1000),
+                               domain=f"login-{rnd.randrange(10**6)}.example.net")
+    return goal if rnd.random() < 0.5 else goal.replace(" then ", ", then ").capitalize() + "."
+
+def one_off(rnd) -> str:
+    return " ".join(rnd.choice(WORDS) for _ in range(rnd.randrange(10, 25)))
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--incidents", type=int, default=20000)
+    ap.add_argument("--queries", type=int, default=2000)
+    args = ap.parse_args()
+    rnd = random.Random(5)
+    decision = FinalDecision(summary="Block source at edge firewall.", risk_score=0.6, recommendations=["Block."])
+
+    with tempfile.TemporaryDirectory() as work:
+        mem = SemanticMemory(os.path.join(work, "semantic.sqlite"), max_entries=args.incidents + args.queries)
+        t0 = time.perf_counter()
+        for t in range(len(TEMPLATES)):
+            await mem.remember(campaign(rnd, t), decision, "p1", "u1")
+        for _ in range(args.incidents - len(TEMPLATES)):
+            await mem.remember(one_off(rnd), decision, "p1", "u1")
+        print(f"remember: {args.incidents} incidents in {time.perf_counter() - t0:.1f}s")
+
+        repeats = [campaign(rnd, rnd.randrange(len(TEMPLATES))) for _ in range(args.queries)]
+        unseen = [one_off(rnd) + " exfiltration" for _ in range(args.queries)]
+        for name, goals in (("repeat campaign", repeats), ("unseen incident", unseen)):
+            t0 = time.perf_counter()
+            hits = sum([await mem.recall(g, "p1", "u1") is not None for g in goals])
+            us = (time.perf_counter() - t0) / len(goals) * 1e6
+            print(f"recall {name:<16} {us:7.1f} us/query, hit rate {hits / len(goals):.3f}")
+
+        other = sum([await mem.recall(g, "p1", "u2") is not None for g in repeats])
+        print(f"recall as another owner: {other}/{len(repeats)} hits (must be 0)")
+
+        sigs = np.stack([e.sig for e in mem._entries.values()])
+        missed = 0
+        for g in repeats[:200] + unseen[:200]:
+            sig = mem.signature(g)
+            brute = (sigs == sig).mean(axis=1).max() >= mem.threshold
+            missed += brute and mem._best("u1", sig) is None
+        print(f"lsh vs brute force: {missed}/400 matches missed by banding")
+
+    import src.orchestrator.coordinator as coord
+    goals = [campaign(rnd, 0) for _ in range(50)]
+    await coord.arun_conversation([{"role": "user", "content": goals[0]}], owner_id="u1")
+    for label, enabled in (("full agents", False), ("fast path", True)):
+        coord.SEMANTIC_FASTPATH = enabled
+        t0 = time.perf_counter()
+        for g in goals:
+            await coord.arun_conversation([{"role": "user", "content": g}], owner_id="u1")
+        print(f"turn {label:<12} {(time.perf_counter() - t0) / len(goals) * 1000:7.2f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
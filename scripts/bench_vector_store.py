@@ -0,0 +1,88 @@
+# scripts/bench_vector_store.py
+"""
+IVF vector store: build time, query latency and recall@k vs. exact search.
+
+Generates clustered synthetic embeddings (a mixture of Gaussians, closer to
+real sentence embeddings than uniform noise), adds them in batches the way
+the index stage does, compacts, then runs queries at several nprobe values
+and compares the top-k against exact float32 brute force.
+
+    uv run python scripts/bench_vector_store.py --n 1000000 --dim 256 --quant int8
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.memory.vector_store import VectorStore
+from src.rag.index.ivf import normalize
+
+def synth(n: int, dim: int, clusters: int, rng: np.random.Generator, centers: np.ndarray) -> np.ndarray:
+    labels = rng.integers(0, clusters, size=n)
+    return normalize(centers[labels] + 0.35 * rng.standard_normal((n, dim)).astype(np.float32) / np.sqrt(dim))
+
+def pct(xs: list[float], p: float) -> float:
+    return float(np.percentile(xs, p)) * 1000
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000)
+    ap.add_argument("--dim", type=int, default=256)
+    ap.add_argument("--quant", choices=("f16", "int8"), default="f16")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    ap.add_argument("--batch-size", type=int, default=10_000)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(3)
+    clusters = max(8, args.n // 500)
+    centers = normalize(rng.standard_normal((clusters, args.dim)).astype(np.float32))
+    work = tempfile.mkdtemp(prefix="bench_vs_")
+    store = VectorStore(work, args.dim, quant=args.quant, auto_compact=False)
+
+    exact = np.empty((args.n, args.dim), dtype=np.float32)
+    t0 = time.perf_counter()
+    for i in range(0, args.n, args.batch_size):
+        x = synth(min(args.batch_size, args.n - i), args.dim, clusters, rng, centers)
+        exact[i:i + len(x)] = x
+        store.add([f"c{j}" for j in range(i, i + len(x))], x)
+    t_add = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    store.compact()
+    t_compact = time.perf_counter() - t0
+    st = store.stats()
+    disk = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(work) for f in fs)
+    print(f"n={args.n} dim={args.dim} quant={args.quant} lists={st['lists']} cores={os.cpu_count()}")
+    print(f"add {t_add:.1f}s ({args.n / t_add:.0f}/s)  compact {t_compact:.1f}s  on disk {disk / 2**20:.0f} MiB")
+
+    queries = synth(args.queries, args.dim, clusters, rng, centers)
+    truth, lat = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        s = exact @ q
+        top = np.argpartition(-s, args.k)[:args.k]
+        lat.append(time.perf_counter() - t0)
+        truth.append({f"c{j}" for j in top})
+    print(f"{'mode':>12} {'p50 ms':>8} {'p95 ms':>8} {f'recall@{args.k}':>10}")
+    print(f"{'exact f32':>12} {pct(lat, 50):>8.2f} {pct(lat, 95):>8.2f} {1.0:>10.3f}")
+    for nprobe in args.nprobe:
+        lat, hit = [], 0
+        for q, t in zip(queries, truth):
+            t0 = time.perf_counter()
+            res = store.search(q, args.k, nprobe=nprobe, with_meta=False)
+            lat.append(time.perf_counter() - t0)
+            hit += len(t & {h.key for h in res})
+        print(f"{f'nprobe={nprobe}':>12} {pct(lat, 50):>8.2f} {pct(lat, 95):>8.2f} "
+              f"{hit / (args.k * args.queries):>10.3f}")
+    store.close()
+    shutil.rmtree(work)
+
+if __name__ == "__main__":
+    main()
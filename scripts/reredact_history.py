@@ -0,0 +1,59 @@
+# scripts/reredact_history.py
+"""
+Re-redact stored messages and traces with the current PII rules.
+
+Walks each collection in _id order, a page at a time, and writes the
+changed documents back with one unordered bulk_write per page. Prints the
+last _id after every page; pass it to --start-after to resume an
+interrupted run.
+
+    uv run python scripts/reredact_history.py --dry-run
+    uv run python scripts/reredact_history.py --collections traces --ips private --start-after 665f...
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bson import ObjectId
+
+from app.db import get_db
+from app.traces import redacted_trace_fields
+from src.llm.guards.pii_redaction import IP_MODES, PII_REDACT_IPS, PIIRedactor, message_changes, reredact_collection
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--collections", nargs="+", choices=("messages", "traces"), default=["messages", "traces"])
+    ap.add_argument("--ips", choices=IP_MODES, default=PII_REDACT_IPS)
+    ap.add_argument("--batch", type=int, default=500)
+    ap.add_argument("--start-after", help="resume after this _id (first collection only)")
+    ap.add_argument("--dry-run", action="store_true", help="count what would change, write nothing")
+    args = ap.parse_args()
+
+    db = get_db()
+    redactor = PIIRedactor(args.ips)
+    changes = {
+        "messages": (lambda d: message_changes(d, redactor), {"content": 1}),
+        "traces": (lambda d: redacted_trace_fields(d, redactor.redact_obj),
+                   {"steps": 1, "final": 1, "steps_json": 1, "final_json": 1}),
+    }
+    start_after = ObjectId(args.start_after) if args.start_after else None
+    for name in args.collections:
+        fn, projection = changes[name]
+        t0 = time.perf_counter()
+
+        def progress(stats: dict) -> None:
+            print(f"  {name}: scanned {stats['scanned']} updated {stats['updated']} last_id {stats['last_id']}")
+
+        stats = await reredact_collection(db[name], fn, projection=projection, batch_size=args.batch,
+                                          start_after=start_after, dry_run=args.dry_run, on_page=progress)
+        dt = time.perf_counter() - t0
+        print(f"{name}: {stats['updated']}/{stats['scanned']} documents "
+              f"{'would change' if args.dry_run else 'updated'} in {dt:.1f}s")
+        start_after = None
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,6 +3,7 @@ from .base import Agent
 
 class Attacker(Agent):
     name = "attacker"
+    blocking = False  # plan/act return constants; inline is cheaper than a thread hop
 
     def plan(self, user_goal: str) -> str:
         return "Probe external surface for open ports to hypothesize ingress."
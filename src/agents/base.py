@@ -1,8 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Callable, TypeVar
+import asyncio
+
+import anyio
+
+T = TypeVar("T")
 
 class Agent(ABC):
     name: str
+    # True when plan/act block (sync HTTP, heavy CPU); the async lifecycle then
+    # runs them in a worker thread. Agents whose plan/act only build values in
+    # memory set this to False: they then run inline on the event loop, which
+    # is cheaper than the thread hop but stalls every other request if they
+    # ever start doing I/O, so flip it back when they do.
+    blocking: bool = True
 
     def __init__(self, blackboard: "Blackboard"):
         self.blackboard = blackboard
@@ -21,3 +32,54 @@ class Agent(ABC):
 
     def report(self) -> str:
         return f"{self.name} completed action."
+
+    # ---- async lifecycle (adapter over the sync methods) ----
+    async def aplan(self, user_goal: str) -> str:
+        return await self._call(self.plan, user_goal)
+
+    async def aact(self) -> dict[str, Any]:
+        return await self._call(self.act)
+
+    async def aobserve(self, data: dict[str, Any]) -> None:
+        self.observe(data)  # in-memory; never worth a thread hop
+
+    async def _call(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.blocking:
+            return await anyio.to_thread.run_sync(fn, *args)
+        return fn(*args)
+
+class AsyncAgent(Agent):
+    """
+    Agent whose lifecycle is natively async (e.g. awaits an LLM runner).
+    The sync plan/act still work for non-async callers (scripts, the sync
+    run_conversation) by running the coroutine on a private loop. They raise
+    RuntimeError when called from inside a running loop, e.g. a FastAPI
+    handler; await aplan/aact there instead.
+    """
+    blocking = False
+
+    @abstractmethod
+    async def aplan(self, user_goal: str) -> str:
+        ...
+
+    @abstractmethod
+    async def aact(self) -> dict[str, Any]:
+        ...
+
+    def plan(self, user_goal: str) -> str:
+        self._require_no_loop("plan")
+        return asyncio.run(self.aplan(user_goal))
+
+    def act(self) -> dict[str, Any]:
+        self._require_no_loop("act")
+        return asyncio.run(self.aact())
+
+    def _require_no_loop(self, method: str) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        raise RuntimeError(
+            f"{type(self).__name__}.{method}() cannot run inside an event loop; "
+            f"await {type(self).__name__}.a{method}() instead"
+        )
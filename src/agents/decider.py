@@ -3,6 +3,7 @@ from .base import Agent
 
 class Decider(Agent):
     name = "decider"
+    blocking = False  # plan/act return constants; inline is cheaper than a thread hop
 
     def plan(self, user_goal: str) -> str:
         return "Evaluate risk & cost-benefit; approve or deny containment."
@@ -1,11 +1,21 @@
 from typing import Any
 from .base import Agent
+from src.intel.normalizers import default_index, extract_iocs
 
 class Defender(Agent):
     name = "defender"
+    blocking = False  # plan/act return constants; inline is cheaper than a thread hop
 
     def plan(self, user_goal: str) -> str:
         return "Correlate alerts; check EDR/NGFW for scans from suspicious IPs."
 
     def act(self) -> dict[str, Any]:
-        return {"triage": "Detected SYN scan spikes from 203.0.113.12; candidate block."}
+        triage = "Detected SYN scan spikes from 203.0.113.12; candidate block."
+        # structured IOCs so downstream agents and tool policy don't re-parse free text
+        index = default_index()
+        iocs = []
+        for ioc in extract_iocs(triage):
+            match = index.lookup(ioc.value)
+            iocs.append({"kind": ioc.kind, "value": ioc.value,
+                         "known_bad": {"indicator": match.indicator, "source": match.source} if match else None})
+        return {"triage": triage, "iocs": iocs}
@@ -1,12 +1,32 @@
 from typing import Any
-from .base import Agent
+from .base import AsyncAgent
+from src.llm.guards.jailbreak_filters import screen
+from src.rag.retriever import Filters, parse_filters, retrieve
 
-class IntelAnalyst(Agent):
+class IntelAnalyst(AsyncAgent):
     name = "intel_analyst"
 
-    def plan(self, user_goal: str) -> str:
-        return "Query CTI + Reddit/SO for recent scanning campaigns & IOCs."
+    query: str = ""
+    filters: Filters = Filters()
 
-    def act(self) -> dict[str, Any]:
-        # later: call reddit/stackoverflow clients; now stub
-        return {"intel": ["Recent mass-scan campaigns on 22/443 reported this week."]}
+    async def aplan(self, user_goal: str) -> str:
+        # `source:`, `tlp:`, `since:`/`until:` operators in the request become pre-filters
+        self.query, self.filters = parse_filters(user_goal)
+        return "Retrieve CTI passages (BM25 + vector, rank-fused) for the IOCs and techniques in the request."
+
+    async def aact(self) -> dict[str, Any]:
+        passages = await retrieve(self.blackboard, self.query, self.filters)
+        if passages is None:
+            return {"intel": ["No CTI index yet; run pipelines/run_all.py --source <dir>."], "sources": []}
+        # retrieved CTI is untrusted: passages carrying injection phrases never reach a prompt
+        clean, screened = [], []
+        for p in passages:
+            (screened if screen(p.text) else clean).append(p)
+        passages = clean
+        return {
+            "intel": [p.text for p in passages],
+            "sources": [{"chunk_id": p.chunk_id, "source": p.meta.get("source"), "published": p.meta.get("published"),
+                         "tlp": p.meta.get("tlp"), "score": round(p.score, 4), "ranks": p.ranks}
+                        for p in passages],
+            "screened_out": [p.chunk_id for p in screened],
+        }
@@ -3,6 +3,7 @@ from .base import Agent
 
 class Toolsmith(Agent):
     name = "toolsmith"
+    blocking = False  # plan/act return constants; inline is cheaper than a thread hop
 
     def plan(self, user_goal: str) -> str:
         return "Prepare safe tool parameters; request approval."
@@ -0,0 +1,19 @@
+# src/config/settings.py
+import os
+
+# ---- local state (SQLite stores, indexes); absolute so workers agree whatever their CWD ----
+DATA_DIR = os.path.abspath(os.getenv("DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "data")))
+
+# ---- LLM runners ----
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama")            # ollama | vllm | llama_cpp | openai_compat
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "")                 # empty -> backend default
+LLM_MODEL = os.getenv("LLM_MODEL", "llama3.1:8b")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "")
+LLM_TIMEOUT_SEC = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+LLM_MAX_CONCURRENCY_PER_MODEL = int(os.getenv("LLM_MAX_CONCURRENCY_PER_MODEL", "8"))
+LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", "5"))
+LLM_MAX_BATCH = int(os.getenv("LLM_MAX_BATCH", "8"))
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "64"))
+LLM_HTTP_KEEPALIVE = int(os.getenv("LLM_HTTP_KEEPALIVE", "32"))
+# how long Ollama keeps the model (and its prompt KV cache) resident between calls
+LLM_KEEP_ALIVE = os.getenv("LLM_KEEP_ALIVE", "30m")
@@ -0,0 +1,160 @@
+# src/intel/fixture_server.py
+"""
+Local CTI feed server for tests and benchmarks (stdlib only).
+
+Serves in-memory feeds in every format the collector parses (json, jsonl,
+rss, reddit, stackexchange) with real validators: a strong ETag over the
+rendered body and Last-Modified at the last publish, answering 304 to a
+matching If-None-Match (or, without one, If-Modified-Since). The since
+parameters are honoured: `since` (json/jsonl, ISO published), `before`
+(reddit fullname) and `fromdate` (stackexchange unix time). Every request
+is logged with its arrival time, so rate limits can be checked.
+
+    python -m src.intel.fixture_server --port 8765 --feeds 5 --items 50
+"""
+from __future__ import annotations
+import argparse
+import email.utils
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+def _epoch(item: dict) -> int:
+    return int(datetime.fromisoformat(item["published"]).timestamp())
+
+def render(fmt: str, items: list[dict], query: dict[str, str]) -> tuple[bytes, str]:
+    """Body and content type for `items` (dicts with id, title, text, published ISO), oldest first."""
+    if fmt in ("json", "jsonl"):
+        since = query.get("since")
+        items = [i for i in items if not since or i["published"] > since]
+        if fmt == "jsonl":
+            return b"".join(json.dumps(i).encode() + b"\n" for i in items), "application/x-ndjson"
+        return json.dumps({"items": items}).encode(), "application/json"
+    if fmt == "reddit":
+        before = query.get("before")
+        if before:
+            ids = [f"t3_{i['id']}" for i in items]
+            items = items[ids.index(before) + 1:] if before in ids else items
+        children = [{"kind": "t3", "data": {"name": f"t3_{i['id']}", "id": i["id"], "title": i["title"],
+                                            "selftext": i["text"], "created_utc": _epoch(i), "subreddit": "netsec"}}
+                    for i in reversed(items)]
+        return json.dumps({"kind": "Listing", "data": {"children": children}}).encode(), "application/json"
+    if fmt == "stackexchange":
+        fromdate = int(query.get("fromdate") or 0)
+        qs = [{"question_id": i["id"], "title": i["title"], "body": f"<p>{i['text']}</p>", "tags": ["security"],
+               "creation_date": _epoch(i)} for i in reversed(items) if _epoch(i) >= fromdate]
+        return json.dumps({"items": qs, "has_more": False, "quota_remaining": 9999}).encode(), "application/json"
+    if fmt == "rss":
+        entries = "".join(
+            f"<item><guid>{escape(str(i['id']))}</guid><title>{escape(i['title'])}</title>"
+            f"<description>{escape(i['text'])}</description>"
+            f"<pubDate>{email.utils.format_datetime(datetime.fromisoformat(i['published']))}</pubDate></item>"
+            for i in reversed(items))
+        return (f'<?xml version="1.0"?><rss version="2.0"><channel><title>fixture</title>{entries}'
+                f"</channel></rss>").encode(), "application/rss+xml"
+    raise ValueError(f"unknown format {fmt!r}")
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        srv: FixtureFeedServer = self.server.owner  # type: ignore[attr-defined]
+        url = urlsplit(self.path)
+        srv.record(url.path, dict(self.headers))
+        time.sleep(srv.latency_ms / 1000)
+        feed = srv.feeds.get(url.path)
+        if feed is None:
+            self.send_error(404)
+            return
+        fmt, items, modified = feed
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        body, ctype = render(fmt, items, query)
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+        last_modified = email.utils.format_datetime(modified, usegmt=True)
+        inm, ims = self.headers.get("If-None-Match"), self.headers.get("If-Modified-Since")
+        if inm is not None:
+            fresh = etag in (t.strip() for t in inm.split(","))
+        else:
+            fresh = ims is not None and email.utils.parsedate_to_datetime(ims) >= modified.replace(microsecond=0)
+        self.send_response(304 if fresh else 200)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        if fresh:
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class FixtureFeedServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, *, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.feeds: dict[str, tuple[str, list[dict], datetime]] = {}
+        self.requests: list[tuple[float, str, dict]] = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self  # type: ignore[attr-defined]
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def publish(self, path: str, fmt: str, items: list[dict]) -> None:
+        """Append `items` to the feed at `path` (created on first use) and bump Last-Modified."""
+        with self._lock:
+            _, old, _ = self.feeds.get(path, (fmt, [], None))
+            self.feeds[path] = (fmt, old + list(items), datetime.now(timezone.utc))
+
+    def record(self, path: str, headers: dict) -> None:
+        with self._lock:
+            self.requests.append((time.monotonic(), path, headers))
+
+    def start(self) -> "FixtureFeedServer":
+        threading.Thread(target=self._httpd.serve_forever, name="fixture-feeds", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FixtureFeedServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+def fixture_items(feed: int, n: int, start: int = 0) -> list[dict]:
+    """Deterministic advisories, one minute apart."""
+    t0 = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+    return [{"id": f"{feed}-{k}", "title": f"Advisory {feed}-{k}",
+             "text": f"Campaign {feed}-{k}: scanning from 203.0.113.{k % 250} against port {1024 + k}, "
+                     f"exploiting CVE-2024-{1000 + k}. Block the source and patch.",
+             "published": datetime.fromtimestamp(t0 + 60 * k, tz=timezone.utc).isoformat()}
+            for k in range(start, start + n)]
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--feeds", type=int, default=5)
+    ap.add_argument("--items", type=int, default=50)
+    args = ap.parse_args()
+    srv = FixtureFeedServer(args.host, args.port)
+    formats = ("json", "jsonl", "rss", "reddit", "stackexchange")
+    for f in range(args.feeds):
+        srv.publish(f"/feed/{f}", formats[f % len(formats)], fixture_items(f, args.items))
+    print(f"fixture feeds on {srv.url}/feed/0 .. /feed/{args.feeds - 1}")
+    srv._httpd.serve_forever()
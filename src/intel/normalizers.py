@@ -0,0 +1,425 @@
+# src/intel/normalizers.py
+"""
+IOC extraction / canonicalization and an in-memory indicator index.
+
+extract_iocs() finds IPv4/IPv6 addresses and CIDRs, domains, URLs, file
+hashes and CVE ids in one regex pass over the raw text, defanged forms
+included (`203.0.113[.]12`, `evil(.)com`, `hxxps[://]...`, `[dot]`), and
+returns them canonicalized: refanged, lower-cased, IPv6 compressed, CIDRs
+masked to their network, IDN domains as punycode.
+
+IndicatorIndex answers "is this IP / range / domain / URL / hash known bad,
+and from which source" without scanning:
+  - IPs and CIDRs sit in one hash table per prefix length ({prefix bits ->
+    source}), so a longest-prefix match is one dict probe per distinct
+    length present (a handful in practice, <= 33 / 129), and memory is one
+    entry per indicator rather than a trie node per bit.
+  - "does this target range overlap any bad range" adds one bisect over the
+    sorted range starts (built lazily after adds, like the policy ranges).
+  - hashes, CVEs and URLs are exact set members; domains also match their
+    parents (`a.b.evil.com` hits `evil.com`), one probe per label.
+  - bloom() exports the exact indicators as a compact BloomFilter for
+    processes that only need a fast "definitely not bad" answer.
+
+    idx = IndicatorIndex()
+    idx.add_text(open("blocklist.txt").read(), source="firehol")
+    idx.lookup("203.0.113.12")     # Match(kind='cidr', indicator='203.0.113.0/24', source='firehol') | None
+"""
+from __future__ import annotations
+import bisect
+import hashlib
+import ipaddress
+import math
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+from urllib.parse import urlsplit
+
+IOC_INDEX_PATH = os.getenv("IOC_INDEX_PATH", "data/intel/indicators.txt")
+
+HASH_KINDS = {32: "md5", 40: "sha1", 64: "sha256", 128: "sha512"}
+EXACT_KINDS = ("url", "md5", "sha1", "sha256", "sha512", "cve")
+# "TLDs" that in CTI prose are almost always file names (payload.exe, config.json)
+_FILE_EXTS = frozenset(
+    "exe dll sys bat cmd ps1 psm1 vbs js jse hta lnk scr msi jar py sh pl rb php asp aspx jsp html htm xml json "
+    "yaml yml ini cfg conf log txt csv md doc docx xls xlsx ppt pptx pdf rtf zip rar gz tgz tar bz2 xz iso img "
+    "dmg bin dat tmp png jpg jpeg gif bmp svg elf so dylib apk ipa plist db sqlite pcap evtx".split())
+
+_DOT = r"(?:\.|\[\.\]|\(\.\)|\{\.\}|\[dot\]|\(dot\))"
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+# every IOC starts a word, so one shared lookbehind rejects mid-word positions before any branch runs
+_IOC = re.compile(r"(?<!\w)(?:" + "|".join((
+    r"(?P<url>(?:hxxps?|https?|fxps?|ftps?|sftp)(?:://|\[://\]|\[:\]//|\[:/\]/)"
+    r"(?:\[\.\]|\(\.\)|\[dot\]|[^\s<>\"'()\[\]{}|\\^`])+)",
+    r"(?P<cve>CVE-\d{4}-\d{4,7}\b)",
+    rf"(?P<ipv4>(?<!\.){_OCTET}(?:{_DOT}{_OCTET}){{3}}(?:/(?:3[0-2]|[12]?\d))?(?!\w|\.\d))",
+    r"(?P<hash>[0-9a-f]{32,128}(?!\w))",
+    r"(?P<ipv6>(?<![:.])(?=[0-9a-f]{0,4}:[0-9a-f]{0,4}:)(?:[0-9a-f]{0,4}:){2,7}"
+    r"(?:[0-9a-f]{1,4}|\d{1,3}(?:\.\d{1,3}){3})?(?:/\d{1,3})?(?![\w:]))",
+    rf"(?P<domain>(?<![.-])(?:[^\W_](?:[\w-]{{0,61}}[^\W_])?{_DOT})+(?:xn--[a-z0-9-]{{1,59}}|[^\W\d_]{{2,24}})"
+    r"(?![\w-]|\.[^\W_]))",
+)) + ")", re.I)
+_DEFANG = re.compile(r"\[\.\]|\(\.\)|\{\.\}|\[dot\]|\(dot\)|\[://\]|\[:/\]|\[:\]|^hxxp|^fxp", re.I)
+_REFANG = {"[.]": ".", "(.)": ".", "{.}": ".", "[dot]": ".", "(dot)": ".", "[://]": "://", "[:/]": ":/",
+           "[:]": ":", "hxxp": "http", "fxp": "ftp"}
+_URL_TRAIL = ".,;:!?'\""
+
+@dataclass(frozen=True)
+class IOC:
+    kind: str    # ipv4 | ipv6 | cidr | domain | url | md5 | sha1 | sha256 | sha512 | cve
+    value: str   # canonical form
+    start: int   # span in the input text
+    end: int
+
+def refang(s: str) -> str:
+    return _DEFANG.sub(lambda m: _REFANG[m.group().lower()], s)
+
+# leading zeros are ambiguous (octal to some tools), so they are not addresses
+_V4 = re.compile(r"(0|[1-9]\d{0,2})\.(0|[1-9]\d{0,2})\.(0|[1-9]\d{0,2})\.(0|[1-9]\d{0,2})(?:/(\d{1,2}))?")
+_HEX = re.compile(r"[0-9a-fA-F]+")
+_PLAIN_DOMAIN = re.compile(r"(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+(?:xn--[a-z0-9-]{1,59}|[a-z]{2,24})", re.I)
+
+def _v4(value: str) -> Optional[tuple[int, int]]:
+    """(address, prefix length) of a plain IPv4 address or CIDR without going through ipaddress."""
+    m = _V4.fullmatch(value)
+    if m is None:
+        return None
+    a, b, c, d, plen = m.groups()
+    a, b, c, d = int(a), int(b), int(c), int(d)
+    plen = 32 if plen is None else int(plen)
+    if a > 255 or b > 255 or c > 255 or d > 255 or plen > 32:
+        return None
+    return a << 24 | b << 16 | c << 8 | d, plen
+
+def _fmt4(addr: int) -> str:
+    return f"{addr >> 24}.{addr >> 16 & 255}.{addr >> 8 & 255}.{addr & 255}"
+
+def _v4_ioc(addr: int, plen: int) -> tuple[str, str]:
+    if plen == 32:
+        return "ipv4", _fmt4(addr)
+    return "cidr", f"{_fmt4(addr >> (32 - plen) << (32 - plen))}/{plen}"
+
+def _ip(value: str) -> Optional[tuple[str, str]]:
+    """(kind, canonical) of an IP or CIDR; host-length prefixes are plain addresses."""
+    v4 = _v4(value)
+    if v4 is not None:
+        return _v4_ioc(*v4)
+    try:
+        net = ipaddress.ip_network(value, strict=False)
+    except ValueError:
+        return None
+    if net.prefixlen == net.max_prefixlen:
+        return f"ipv{net.version}", str(net.network_address)
+    return "cidr", net.with_prefixlen
+
+def canonical_domain(value: str) -> Optional[str]:
+    d = refang(value).strip(".").lower()
+    if not d.isascii():
+        try:
+            d = d.encode("idna").decode("ascii")
+        except UnicodeError:
+            return None
+    tld = d.rsplit(".", 1)[-1]
+    return d if "." in d and tld not in _FILE_EXTS else None
+
+def canonical_url(value: str) -> Optional[str]:
+    u = refang(value.rstrip(_URL_TRAIL))
+    try:
+        parts = urlsplit(u)
+        host = parts.hostname
+    except ValueError:
+        return None
+    if not host:
+        return None
+    netloc = parts.netloc.rsplit("@", 1)[-1]  # drop userinfo
+    port = netloc[netloc.rfind(":"):] if netloc.rfind(":") > netloc.rfind("]") else ""
+    host = f"[{host}]" if ":" in host else host
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{parts.scheme.lower()}://{host}{port}{parts.path or '/'}{query}"
+
+def _canonical(kind: str, raw: str) -> Optional[tuple[str, str]]:
+    if kind == "ipv4":
+        v4 = _v4(raw) or _v4(refang(raw))
+        return _v4_ioc(*v4) if v4 else None
+    if kind == "ipv6":
+        return _ip(raw)
+    if kind == "domain":
+        d = canonical_domain(raw)
+        return ("domain", d) if d else None
+    if kind == "url":
+        u = canonical_url(raw)
+        return ("url", u) if u else None
+    if kind == "hash":
+        return (HASH_KINDS[len(raw)], raw.lower()) if len(raw) in HASH_KINDS else None
+    return "cve", raw.upper()
+
+def iter_iocs(text: str) -> Iterator[IOC]:
+    for m in _IOC.finditer(text):
+        kind = m.lastgroup
+        raw = m.group()
+        hit = _canonical(kind, raw)
+        if hit is None or hit[1] == "::":
+            continue
+        end = m.end() - (len(raw) - len(raw.rstrip(_URL_TRAIL)) if kind == "url" else 0)
+        yield IOC(hit[0], hit[1], m.start(), end)
+
+def extract_iocs(text: str, unique: bool = True) -> list[IOC]:
+    """All IOCs in `text`, in order; with `unique`, the first occurrence of each (kind, value)."""
+    if not unique:
+        return list(iter_iocs(text))
+    seen, out = set(), []
+    for ioc in iter_iocs(text):
+        key = (ioc.kind, ioc.value)
+        if key not in seen:
+            seen.add(key)
+            out.append(ioc)
+    return out
+
+def classify(value: str) -> Optional[tuple[str, str]]:
+    """(kind, canonical) of a single indicator string, e.g. a tool target or a blocklist line."""
+    value = value.strip()
+    v4 = _v4(value)
+    if v4 is not None:
+        return _v4_ioc(*v4)
+    if len(value) in HASH_KINDS and _HEX.fullmatch(value):
+        return HASH_KINDS[len(value)], value.lower()
+    if _PLAIN_DOMAIN.fullmatch(value):
+        d = canonical_domain(value)
+        return ("domain", d) if d else None
+    hit = _ip(refang(value))
+    if hit:
+        return hit
+    m = _IOC.fullmatch(value)
+    return _canonical(m.lastgroup, value) if m else None
+
+# ---- bloom filter ----
+class BloomFilter:
+    """k bit positions per key from one blake2b digest (double hashing)."""
+
+    def __init__(self, capacity: int, fp_rate: float = 0.01, *, bits: int = 0, k: int = 0):
+        n = max(1, capacity)
+        self.m = bits or max(64, int(-n * math.log(fp_rate) / math.log(2) ** 2))
+        self.k = k or max(1, round(self.m / n * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+
+    def _positions(self, key: str) -> Iterator[int]:
+        d = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(d[:8], "little"), int.from_bytes(d[8:], "little") | 1
+        return ((h1 + i * h2) % self.m for i in range(self.k))
+
+    def add(self, key: str) -> None:
+        for p in self._positions(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[p >> 3] >> (p & 7) & 1 for p in self._positions(key))
+
+    def to_bytes(self) -> bytes:
+        return self.m.to_bytes(8, "little") + self.k.to_bytes(2, "little") + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        bf = cls(1, bits=int.from_bytes(data[:8], "little"), k=int.from_bytes(data[8:10], "little"))
+        bf.bits = bytearray(data[10:])
+        return bf
+
+# ---- index ----
+@dataclass(frozen=True)
+class Match:
+    kind: str        # kind of the indicator that matched
+    indicator: str   # canonical indicator, e.g. the covering CIDR
+    source: str
+
+class _PrefixTable:
+    """{prefix length: {address >> host bits: source id}} for one IP version."""
+
+    def __init__(self, bits: int):
+        self.bits = bits
+        self.tables: dict[int, dict[int, int]] = {}
+        self.lengths: list[int] = []  # longest first
+        self._sorted: Optional[tuple[list[int], list[int]]] = None  # (range starts, prefix lengths)
+
+    def add(self, addr: int, plen: int, sid: int) -> bool:
+        table = self.tables.get(plen)
+        if table is None:
+            table = self.tables[plen] = {}
+            self.lengths = sorted(self.tables, reverse=True)
+        key = addr >> (self.bits - plen)
+        if key in table:
+            return False
+        table[key] = sid
+        self._sorted = None
+        return True
+
+    def longest(self, addr: int, max_plen: Optional[int] = None) -> Optional[tuple[int, int]]:
+        """(prefix length, source id) of the longest prefix containing `addr` (no longer than max_plen)."""
+        tables, bits = self.tables, self.bits
+        for plen in self.lengths:
+            if max_plen is not None and plen > max_plen:
+                continue
+            sid = tables[plen].get(addr >> (bits - plen))
+            if sid is not None:
+                return plen, sid
+        return None
+
+    def first_within(self, lo: int, hi: int) -> Optional[tuple[int, int]]:
+        """(start, prefix length) of some indicator starting inside [lo, hi]."""
+        if self._sorted is None:
+            spans = sorted((key << (self.bits - plen), plen) for plen, t in self.tables.items() for key in t)
+            self._sorted = [s for s, _ in spans], [p for _, p in spans]
+        starts, plens = self._sorted
+        i = bisect.bisect_left(starts, lo)
+        return (starts[i], plens[i]) if i < len(starts) and starts[i] <= hi else None
+
+    def __len__(self) -> int:
+        return sum(len(t) for t in self.tables.values())
+
+class IndicatorIndex:
+    def __init__(self):
+        self._ips = {4: _PrefixTable(32), 6: _PrefixTable(128)}
+        self._exact: dict[str, dict[str, int]] = {k: {} for k in EXACT_KINDS}
+        self._domains: dict[str, int] = {}
+        self.sources: list[str] = []
+        self._sids: dict[str, int] = {}
+
+    def _sid(self, source: str) -> int:
+        sid = self._sids.get(source)
+        if sid is None:
+            sid = self._sids[source] = len(self.sources)
+            self.sources.append(source)
+        return sid
+
+    def add(self, kind: str, value: str, source: str = "") -> bool:
+        """Add a canonical indicator (see classify / extract_iocs); False if it was already there."""
+        sid = self._sid(source)
+        if kind in ("ipv4", "ipv6", "cidr"):
+            net = ipaddress.ip_network(value, strict=False)
+            return self._ips[net.version].add(int(net.network_address), net.prefixlen, sid)
+        table = self._domains if kind == "domain" else self._exact[kind]
+        if value in table:
+            return False
+        table[value] = sid
+        return True
+
+    def add_iocs(self, iocs: Iterable[IOC], source: str = "") -> int:
+        return sum(self.add(i.kind, i.value, source) for i in iocs)
+
+    def add_text(self, text: str, source: str = "") -> int:
+        """Every IOC in free text (reports, blocklists with comments, one indicator per line...)."""
+        return self.add_iocs(iter_iocs(text), source)
+
+    @classmethod
+    def from_file(cls, path: str, source: str = "") -> "IndicatorIndex":
+        idx = cls()
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if line.strip() and not line.lstrip().startswith("#"):
+                    idx.add_text(line, source or os.path.basename(path))
+        return idx
+
+    def _parse(self, value: str) -> tuple[int, int, int]:
+        """(version, address, prefix length) of an IP or CIDR string."""
+        v4 = _v4(value)
+        if v4 is not None:
+            return 4, *v4
+        net = ipaddress.ip_network(value, strict=False)
+        return net.version, int(net.network_address), net.prefixlen
+
+    def match_ip(self, addr: str) -> Optional[Match]:
+        """Longest known-bad prefix containing the address."""
+        version, ip, _ = self._parse(addr)
+        hit = self._ips[version].longest(ip)
+        return self._ip_match(version, ip, *hit) if hit else None
+
+    def _ip_match(self, version: int, addr: int, plen: int, sid: int) -> Match:
+        bits = 32 if version == 4 else 128
+        net = addr >> (bits - plen) << (bits - plen)
+        text = _fmt4(net) if version == 4 else str(ipaddress.IPv6Address(net))
+        if plen == bits:
+            return Match(f"ipv{version}", text, self.sources[sid])
+        return Match("cidr", f"{text}/{plen}", self.sources[sid])
+
+    def match_range(self, cidr: str) -> Optional[Match]:
+        """A known-bad indicator overlapping the range: one covering it, or one inside it."""
+        version, addr, plen = self._parse(cidr)
+        table = self._ips[version]
+        host = (1 << (table.bits - plen)) - 1
+        lo, hi = addr & ~host, addr | host
+        hit = table.longest(lo, max_plen=plen)
+        if hit:
+            return self._ip_match(version, lo, *hit)
+        inner = table.first_within(lo, hi)
+        if inner:
+            start, inner_plen = inner
+            return self._ip_match(version, start, inner_plen,
+                                  table.tables[inner_plen][start >> (table.bits - inner_plen)])
+        return None
+
+    def match_domain(self, domain: str) -> Optional[Match]:
+        """The domain or its closest listed parent."""
+        d = domain
+        while "." in d:
+            sid = self._domains.get(d)
+            if sid is not None:
+                return Match("domain", d, self.sources[sid])
+            d = d.split(".", 1)[1]
+        return None
+
+    def lookup(self, value: str) -> Optional[Match]:
+        """Match for any single indicator string (raw or defanged); None when unknown or unparseable."""
+        v4 = _v4(value.strip())
+        if v4 is not None:  # the common case, without building strings
+            addr, plen = v4
+            if plen == 32:
+                hit = self._ips[4].longest(addr)
+                return self._ip_match(4, addr, *hit) if hit else None
+            return self.match_range(value.strip())
+        hit = classify(value)
+        if hit is None:
+            return None
+        kind, canon = hit
+        if kind in ("ipv4", "ipv6"):
+            return self.match_ip(canon)
+        if kind == "cidr":
+            return self.match_range(canon)
+        if kind == "domain":
+            return self.match_domain(canon)
+        sid = self._exact[kind].get(canon)
+        if sid is not None:
+            return Match(kind, canon, self.sources[sid])
+        if kind == "url":
+            host = urlsplit(canon).hostname or ""
+            return self.lookup(host) if host else None
+        return None
+
+    def __contains__(self, value: str) -> bool:
+        return self.lookup(value) is not None
+
+    def __len__(self) -> int:
+        return len(self._ips[4]) + len(self._ips[6]) + len(self._domains) + sum(map(len, self._exact.values()))
+
+    def stats(self) -> dict:
+        return {"ipv4": len(self._ips[4]), "ipv6": len(self._ips[6]), "domains": len(self._domains),
+                **{k: len(v) for k, v in self._exact.items()}, "sources": len(self.sources),
+                "v4_prefix_lengths": len(self._ips[4].lengths), "v6_prefix_lengths": len(self._ips[6].lengths)}
+
+    def bloom(self, fp_rate: float = 0.01) -> BloomFilter:
+        """Bloom filter over the exact indicators (`kind:value`: host IPs, domains, URLs, hashes, CVEs)."""
+        bf = BloomFilter(len(self), fp_rate)
+        for version, table in self._ips.items():
+            bits = table.bits
+            for key in table.tables.get(bits, {}):
+                bf.add(f"ipv{version}:{ipaddress.ip_address(key)}")
+        for d in self._domains:
+            bf.add(f"domain:{d}")
+        for kind, values in self._exact.items():
+            for v in values:
+                bf.add(f"{kind}:{v}")
+        return bf
+
+@lru_cache(maxsize=1)
+def default_index() -> IndicatorIndex:
+    """Indicators from IOC_INDEX_PATH (one per line, any supported kind); empty when the file is missing."""
+    return IndicatorIndex.from_file(IOC_INDEX_PATH) if os.path.exists(IOC_INDEX_PATH) else IndicatorIndex()
@@ -0,0 +1,32 @@
+# src/intel/reddit_client.py
+"""
+Reddit listings (e.g. https://www.reddit.com/r/netsec/new.json?limit=100) as CTI documents.
+
+Listings come newest first and `before=<fullname>` returns only posts newer
+than that one, so the fullname of the newest post is the since-cursor.
+"""
+from __future__ import annotations
+import json
+from datetime import datetime, timezone
+from typing import Optional
+
+def parse_listing(body: bytes, spec) -> tuple[list[dict], Optional[str]]:
+    children = (json.loads(body).get("data") or {}).get("children") or []
+    docs = []
+    for child in children:
+        post = child.get("data") or {}
+        text = "\n\n".join(str(v) for v in (post.get("title"), post.get("selftext"), post.get("url")) if v)
+        if not text or not post.get("name"):
+            continue
+        created = post.get("created_utc")
+        docs.append({
+            "doc_id": f"{spec.name}:{post['name']}",
+            "source": spec.source or f"reddit/{post.get('subreddit') or spec.name}",
+            "path": spec.url,
+            "format": "text",
+            "published": datetime.fromtimestamp(float(created), tz=timezone.utc).isoformat() if created else None,
+            "tlp": spec.tlp,
+            "text": text,
+        })
+    cursor = (children[0].get("data") or {}).get("name") if children else None
+    return docs, cursor
@@ -0,0 +1,33 @@
+# src/intel/stackoverflow_client.py
+"""
+Stack Exchange API questions (e.g. /2.3/questions?site=security&sort=creation&filter=withbody)
+as CTI documents.
+
+`fromdate` takes a unix time and is inclusive, so the since-cursor is the
+newest creation_date + 1. Bodies are HTML; the normalize stage strips them.
+"""
+from __future__ import annotations
+import json
+from datetime import datetime, timezone
+from typing import Optional
+
+def parse_questions(body: bytes, spec) -> tuple[list[dict], Optional[str]]:
+    items = json.loads(body).get("items") or []
+    docs, newest = [], None
+    for q in items:
+        if "question_id" not in q:
+            continue
+        created = q.get("creation_date")
+        if created is not None:
+            newest = max(newest or 0, int(created))
+        tags = " ".join(q.get("tags") or ())
+        docs.append({
+            "doc_id": f"{spec.name}:{q['question_id']}",
+            "source": spec.source or spec.name,
+            "path": q.get("link") or spec.url,
+            "format": "html",
+            "published": datetime.fromtimestamp(int(created), tz=timezone.utc).isoformat() if created else None,
+            "tlp": spec.tlp,
+            "text": f"<h1>{q.get('title') or ''}</h1>\n{q.get('body') or ''}\n<p>tags: {tags}</p>",
+        })
+    return docs, str(newest + 1) if newest is not None else None
@@ -0,0 +1,193 @@
+# src/llm/cache.py
+"""
+Response cache for agent LLM calls.
+
+Level 1: exact-match cache keyed by (backend, model, normalized prompt, params) with
+LRU + TTL eviction in memory and an optional SQLite tier that survives
+restarts and is shared by workers on one host.
+
+Level 2: prefix reuse. The shared system prompt is always sent first and
+byte-identical, and the runners pass backend hints (Ollama keep_alive,
+llama.cpp cache_prompt; vLLM reuses it with --enable-prefix-caching) so it is
+not re-prefilled on every call. We only estimate those savings here.
+
+Stats are kept per agent: hits, misses, hit ratio and tokens saved.
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import AsyncIterator, Optional
+
+from src.llm.runners.base import Completion, GenParams, Runner
+
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "4096"))
+LLM_CACHE_TTL_SEC = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+LLM_CACHE_SQLITE = os.getenv("LLM_CACHE_SQLITE", "")  # path; empty disables the disk tier
+
+_WS = re.compile(r"\s+")
+
+def normalize_prompt(prompt: str) -> str:
+    return _WS.sub(" ", prompt).strip()
+
+def cache_key(params: GenParams, prompt: str, backend: str = "") -> str:
+    raw = json.dumps([backend, asdict(params), normalize_prompt(prompt)], separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def estimate_tokens(text: str | None) -> int:
+    return (len(text) + 3) // 4 if text else 0  # ~4 chars/token; good enough for accounting
+
+class _SqliteTier:
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as c:
+            c.execute("CREATE TABLE IF NOT EXISTS llm_cache (k TEXT PRIMARY KEY, v TEXT NOT NULL, exp REAL NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, key: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT v, exp FROM llm_cache WHERE k = ?", (key,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def put(self, key: str, value: dict, ttl_sec: float) -> None:
+        with self._conn() as c:
+            c.execute("INSERT OR REPLACE INTO llm_cache (k, v, exp) VALUES (?, ?, ?)",
+                      (key, json.dumps(value), time.time() + ttl_sec))
+
+class ResponseCache:
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, ttl_sec: float = LLM_CACHE_TTL_SEC,
+                 sqlite_path: str = LLM_CACHE_SQLITE):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self._mem: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._disk = _SqliteTier(sqlite_path) if sqlite_path else None
+
+    async def get(self, key: str) -> Optional[Completion]:
+        item = self._mem.get(key)
+        if item is not None:
+            if item[0] >= time.monotonic():
+                self._mem.move_to_end(key)
+                return Completion(**item[1])
+            del self._mem[key]
+        if self._disk is not None:
+            value = await asyncio.to_thread(self._disk.get, key)
+            if value is not None:
+                self._remember(key, value)
+                return Completion(**value)
+        return None
+
+    async def put(self, key: str, completion: Completion) -> None:
+        value = asdict(completion)
+        self._remember(key, value)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.put, key, value, self.ttl_sec)
+
+    def _remember(self, key: str, value: dict) -> None:
+        self._mem[key] = (time.monotonic() + self.ttl_sec, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+class _AgentStats:
+    __slots__ = ("hits", "misses", "saved_prompt_tokens", "saved_completion_tokens", "prefix_reuse_tokens")
+
+    def __init__(self):
+        self.hits = self.misses = 0
+        self.saved_prompt_tokens = self.saved_completion_tokens = self.prefix_reuse_tokens = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            "saved_tokens": self.saved_prompt_tokens + self.saved_completion_tokens,
+            "prefix_reuse_tokens_est": self.prefix_reuse_tokens,
+        }
+
+class CachedRunner:
+    """Runner front-end that answers repeated agent prompts from ResponseCache."""
+
+    def __init__(self, runner: Runner, cache: ResponseCache | None = None):
+        self.runner = runner
+        self.cache = cache or ResponseCache()
+        self._agents: dict[str, _AgentStats] = {}
+        self._seen_prefixes: set[tuple[str, str]] = set()
+
+    def _stats(self, agent: str | None) -> _AgentStats:
+        key = agent or "-"
+        st = self._agents.get(key)
+        if st is None:
+            st = self._agents[key] = _AgentStats()
+        return st
+
+    def _note_prefix(self, st: _AgentStats, params: GenParams) -> None:
+        if not params.system:
+            return
+        pk = (params.model, params.system)
+        if pk in self._seen_prefixes:
+            st.prefix_reuse_tokens += estimate_tokens(params.system)
+        else:
+            self._seen_prefixes.add(pk)
+
+    async def generate(self, prompt: str, *, agent: str | None = None, model: str | None = None,
+                       system: str | None = None, **kw) -> Completion:
+        params = self.runner.params(model, system, **kw)
+        key = cache_key(params, prompt, self.runner.name)
+        st = self._stats(agent)
+        hit = await self.cache.get(key)
+        if hit is not None:
+            st.hits += 1
+            st.saved_prompt_tokens += hit.prompt_tokens or estimate_tokens(prompt) + estimate_tokens(system)
+            st.saved_completion_tokens += hit.completion_tokens or estimate_tokens(hit.text)
+            hit.meta = {**hit.meta, "cached": True}
+            return hit
+        st.misses += 1
+        self._note_prefix(st, params)
+        res = await self.runner.generate(prompt, model=model, system=system, **kw)
+        await self.cache.put(key, res)
+        return res
+
+    async def stream(self, prompt: str, *, agent: str | None = None, model: str | None = None,
+                     system: str | None = None, usage: dict | None = None, **kw) -> AsyncIterator[str]:
+        """Like Runner.stream; a cached answer comes back as one chunk with the usage it was stored with."""
+        params = self.runner.params(model, system, **kw)
+        key = cache_key(params, prompt, self.runner.name)
+        st = self._stats(agent)
+        usage = {} if usage is None else usage
+        hit = await self.cache.get(key)
+        if hit is not None:
+            st.hits += 1
+            st.saved_prompt_tokens += hit.prompt_tokens or estimate_tokens(prompt) + estimate_tokens(system)
+            st.saved_completion_tokens += hit.completion_tokens or estimate_tokens(hit.text)
+            usage.update(prompt_tokens=hit.prompt_tokens, completion_tokens=hit.completion_tokens, cached=True)
+            yield hit.text
+            return
+        st.misses += 1
+        self._note_prefix(st, params)
+        parts: list[str] = []
+        async for tok in self.runner.stream(prompt, model=model, system=system, usage=usage, **kw):
+            parts.append(tok)
+            yield tok
+        # only complete streams are cached, with the usage the backend reported for them
+        await self.cache.put(key, Completion(text="".join(parts), model=params.model,
+                                             prompt_tokens=int(usage.get("prompt_tokens", 0)),
+                                             completion_tokens=int(usage.get("completion_tokens", 0))))
+
+    def stats(self) -> dict:
+        return {agent: st.as_dict() for agent, st in self._agents.items()}
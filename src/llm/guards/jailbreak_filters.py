@@ -0,0 +1,199 @@
+# src/llm/guards/jailbreak_filters.py
+"""
+Jailbreak / prompt-injection screening for user messages, retrieved chunks
+and streamed model output.
+
+All phrases from policies/prompt_guard.yaml are compiled into one regex
+shaped as a trie: at every node the alternatives start with distinct
+characters, so the engine never tries rules one after another. A scan costs
+O(len(text) * longest phrase) whatever the number of rules, and runs in C.
+
+Text is normalized before matching (and phrases the same way at compile
+time): NFKC, casefold, Cyrillic/Greek homoglyphs and leetspeak folded to
+ASCII letters, zero-width and soft-hyphen characters dropped, and every run
+of punctuation/whitespace collapsed to one space. Matches are on word
+boundaries and report the rule, not an offset into the original text.
+
+    hits = screen(user_message)               # [] when clean
+    s = default_filter().stream()
+    for tok in tokens: hits += s.feed(tok)    # streaming, chunk-boundary safe
+    hits += s.close()
+"""
+from __future__ import annotations
+import itertools
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable
+
+import yaml
+
+PROMPT_GUARD_PATH = os.getenv("PROMPT_GUARD_PATH", os.path.join(os.path.dirname(__file__), "..", "..", "..",
+                                                                "policies", "prompt_guard.yaml"))
+
+_ZERO_WIDTH = ("\u00ad\u034f\u061c\u115f\u1160\u17b4\u17b5\u180e\u200b\u200c\u200d\u200e\u200f"
+               "\u202a\u202b\u202c\u202d\u202e\u2060\u2061\u2062\u2063\u2064\ufeff")
+# lower-case confusables left over after NFKC + casefold, and common leetspeak
+_FOLD = {
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h", "о": "o", "р": "p", "с": "c",
+    "т": "t", "у": "y", "х": "x", "і": "i", "ї": "i", "ј": "j", "ѕ": "s", "ԁ": "d", "ԛ": "q", "ԝ": "w",
+    "α": "a", "β": "b", "ε": "e", "η": "n", "ι": "i", "κ": "k", "ν": "v", "ο": "o", "ρ": "p", "τ": "t",
+    "υ": "u", "χ": "x", "ɑ": "a", "ɡ": "g", "ı": "i", "ℓ": "l",
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s",
+}
+_TABLE = str.maketrans({**{c: None for c in _ZERO_WIDTH}, **_FOLD})
+_SEPARATORS = re.compile(r"[\W_]+")
+
+def normalize(text: str) -> str:
+    if not text.isascii():
+        text = unicodedata.normalize("NFKC", text)
+    return _SEPARATORS.sub(" ", text.casefold().translate(_TABLE))
+
+_BRACES = re.compile(r"\{([^{}]*)\}")
+
+def expand(phrase: str) -> list[str]:
+    """`{a|b|} c` -> ["a c", "b c", "c"] (normalized)."""
+    parts = _BRACES.split(phrase)  # literal, alternatives, literal, ...
+    options = [[p] if i % 2 == 0 else p.split("|") for i, p in enumerate(parts)]
+    out = []
+    for combo in itertools.product(*options):
+        norm = normalize("".join(combo)).strip()
+        if norm:
+            out.append(norm)
+    return out
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+@dataclass(frozen=True)
+class Rule:
+    id: str
+    category: str
+    severity: str  # block | flag
+    phrases: tuple[str, ...]
+
+@dataclass(frozen=True)
+class Hit:
+    rule_id: str
+    category: str
+    severity: str
+    match: str  # normalized text that matched
+
+    @property
+    def policy_hit(self) -> str:
+        return f"prompt_guard:{self.rule_id}"
+
+class JailbreakFilter:
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = tuple(rules)
+        self._by_phrase: dict[str, list[Rule]] = {}
+        for rule in self.rules:
+            for p in rule.phrases:
+                for norm in expand(p):
+                    self._by_phrase.setdefault(norm, []).append(rule)
+        self.max_len = max((len(p) for p in self._by_phrase), default=0)
+        self._re = (re.compile(r"(?<![a-z0-9])(?:" + _trie_pattern(self._by_phrase) + r")(?![a-z0-9])")
+                    if self._by_phrase else None)
+
+    @classmethod
+    def from_yaml(cls, path: str = PROMPT_GUARD_PATH) -> "JailbreakFilter":
+        with open(path, encoding="utf-8") as f:
+            doc = yaml.safe_load(f) or {}
+        return cls(Rule(str(r["id"]), str(r.get("category", "")), str(r.get("severity", "flag")),
+                        tuple(map(str, r.get("phrases") or ())))
+                   for r in doc.get("rules") or ())
+
+    def __len__(self) -> int:
+        return len(self._by_phrase)
+
+    def _hits(self, norm: str, pos: int = 0) -> list[tuple[int, int, Hit]]:
+        if self._re is None:
+            return []
+        out = []
+        for m in self._re.finditer(norm, pos):
+            for rule in self._by_phrase[m.group()]:
+                out.append((m.start(), m.end(), Hit(rule.id, rule.category, rule.severity, m.group())))
+        return out
+
+    def scan(self, text: str) -> list[Hit]:
+        return [h for _, _, h in self._hits(normalize(text))]
+
+    def blocked(self, text: str) -> bool:
+        return any(h.severity == "block" for h in self.scan(text))
+
+    def stream(self) -> "StreamScanner":
+        return StreamScanner(self)
+
+class StreamScanner:
+    """
+    Incremental scan over streamed text. Keeps the last `max_len + 2`
+    normalized characters so phrases split across chunks are found with the
+    character before them still in view for the word-boundary check; a
+    match touching the end of the buffered text is held until the next
+    chunk (or close()) shows it really ends on a word boundary. A match at
+    offset 0 of a trimmed tail has no left context and lay entirely in text
+    already scanned, so it is skipped. Each match is reported once, and the
+    hits equal scan() over the concatenated chunks.
+    """
+
+    def __init__(self, guard: JailbreakFilter):
+        self.guard = guard
+        self._tail = ""
+        self._base = 0          # absolute offset of _tail[0] in the normalized stream
+        self._reported = 0      # absolute end of the last reported match
+
+    def _scan(self, text: str, final: bool) -> list[Hit]:
+        out, reported = [], self._reported
+        # resume where the last reported match ended, as finditer over the whole stream would
+        for start, end, hit in self.guard._hits(text, max(self._reported - self._base, 0)):
+            abs_end = self._base + end
+            if abs_end <= self._reported or (end == len(text) and not final) or (start == 0 and self._base > 0):
+                continue
+            out.append(hit)
+            reported = max(reported, abs_end)
+        self._reported = reported
+        return out
+
+    def feed(self, chunk: str) -> list[Hit]:
+        norm = normalize(chunk)
+        if self._tail.endswith(" ") and norm.startswith(" "):
+            norm = norm[1:]
+        text = self._tail + norm
+        hits = self._scan(text, final=False)
+        keep = self.guard.max_len + 2  # a held phrase plus the character before it
+        if len(text) > keep:
+            self._base += len(text) - keep
+            text = text[-keep:]
+        self._tail = text
+        return hits
+
+    def close(self) -> list[Hit]:
+        hits = self._scan(self._tail, final=True)
+        self._tail = ""
+        return hits
+
+@lru_cache(maxsize=1)
+def default_filter() -> JailbreakFilter:
+    return JailbreakFilter.from_yaml()
+
+def screen(text: str) -> list[Hit]:
+    return default_filter().scan(text)
@@ -0,0 +1,216 @@
+# src/llm/guards/output_sanitizer.py
+"""
+Sanitizer for model output, on a whole completion or token by token.
+
+One compiled regex covers:
+  - dangerous shell one-liners: pipes into an interpreter (`curl .. | sh`),
+    `rm -rf /`, mkfs / dd onto a device, fork bombs, /dev/tcp and `nc -e`
+    reverse shells, PowerShell download cradles and -EncodedCommand.
+    The dangerous part is replaced by `[removed: unsafe command]`;
+  - markdown / HTML injection: openers of active tags (script, iframe, img,
+    svg, ..., comments) and of any tag carrying an event handler or URL
+    attribute are escaped (`<` -> `&lt;`); `<b>` or a `<dir>` placeholder
+    stay. Character references are escaped so they cannot smuggle a scheme;
+    javascript:/vbscript:/data:/file: link targets become `#`; markdown
+    images lose their `!` so nothing is fetched when the text is rendered;
+  - tool invocations written as `<tool_call>{"name": .., "args": ..}</tool_call>`
+    that the tool policy (src/orchestrator/policies.py) rejects, or that do
+    not parse, are replaced by `[removed: tool call ...]`.
+
+Every pattern has a bounded length (tool calls at most TOOL_CALL_MAX chars),
+so a stream only has to hold back the last _HOLD characters, plus an open
+<tool_call> until it closes, to produce exactly what sanitize() produces on
+the whole text:
+
+    s = default_sanitizer().stream()
+    for tok in tokens: out += s.feed(tok)
+    out += s.flush()                    # == sanitize("".join(tokens)); s.hits has the kinds
+"""
+from __future__ import annotations
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Optional
+
+from src.orchestrator.policies import validate_tool_request
+
+TOOL_CALL_MAX = int(os.getenv("SANITIZER_TOOL_CALL_MAX", "512"))
+
+_W = r"(?<!\w.)"  # right after the anchor: the anchor starts a word
+# (kind, anchor characters, rest of the pattern after the anchor). Every
+# alternative of the compiled regex starts with a literal, so sre skips text
+# without any anchor character in C instead of trying each rule everywhere.
+_SHELL = [
+    # curl .. | sh, base64 -d | bash, iwr .. | iex
+    ("|", r"[ \t]{0,4}(?:sudo[ \t]{1,4})?(?:(?:ba|z|da|k|c|tc|fi)?sh|python[23]?|perl|ruby|node|php|iex|pwsh|powershell)"
+          r"(?:\.exe)?(?=[ \t]{0,4}(?:$|[-;&)`'\"]))"),
+    ("r", _W + r"m[ \t]{1,4}-[A-Za-z]{0,3}[rR][A-Za-z]{0,3}(?:[ \t]{1,4}--?[\w-]{1,20}){0,2}[ \t]{1,4}(?:/\*?|~/?|\*|\$HOME/?)"
+          r"(?=$|[\s;&|)`'\"])"),
+    ("m", _W + r"kfs(?:\.\w{1,8})?[ \t]{1,4}(?:-\w{1,4}[ \t]{1,4}){0,2}/dev/"),
+    ("d", _W + r"d[ \t]{1,4}(?:\S{1,32}[ \t]{1,4}){0,2}of=/dev/(?:sd|hd|nvme|xvd|vd|mmcblk|disk)\w{0,8}"),
+    (":", r"\(\)[ \t]{0,2}\{[ \t]{0,2}:[ \t]{0,2}\|[ \t]{0,2}:[ \t]{0,2}&[ \t]{0,2}\}[ \t]{0,2};[ \t]{0,2}:"),
+    ("/", r"dev/(?:tcp|udp)/[\w.-]{1,64}/\d{1,5}"),
+    ("n", _W + r"c(?:at)?(?:\.exe)?(?:[ \t]{1,4}\S{1,24}){0,3}?[ \t]{1,4}-[ce][ \t]{1,4}(?:/bin/)?(?:ba)?sh\b"),
+    ("iI", _W + r"(?i:ex|nvoke-expression)[ \t]{0,4}\("),
+    (".", r"(?i:downloadstring)[ \t]{0,2}\("),
+    ("cC", _W + r"(?i:ertutil(?:\.exe)?[ \t]{1,4}-urlcache)\b"),
+    ("pP", _W + r"(?i:(?:owershell|wsh)(?:\.exe)?\b[^\n]{0,40}?[ \t]-e(?:nc|ncodedcommand)?[ \t]{1,4})(?=[A-Za-z0-9+/]{20})"),
+]
+_ACTIVE_TAGS = ("script|iframe|frame|frameset|object|embed|applet|svg|math|style|link|meta|base|form|input|button"
+                "|textarea|select|img|image|video|audio|source|track|template|noscript|xml|marquee")
+_ACTIVE_ATTRS = r"on\w{1,24}|style|href|src|srcdoc|action|formaction|xlink:href"
+_SCHEME = r"(?i:javascript|vbscript|data|file)[ \t]{0,2}:"
+_RULES = [
+    ("tool_call", "<", r"tool_call>(?P<call>(?s:.){0,%d}?)</tool_call>" % TOOL_CALL_MAX),
+    *(("shell", anchors, rest) for anchors, rest in _SHELL),
+    ("html", "<", r"(?=[!?]|/?(?i:" + _ACTIVE_TAGS + r")\b|[A-Za-z][\w-]{0,32}[^>\n]{0,48}?\s(?i:" + _ACTIVE_ATTRS
+                  + r")[ \t]{0,2}=)"),
+    ("entity", "&", r"(?=#[0-9A-Za-z]{1,8};?|[A-Za-z]{2,8};)"),
+    ("link", "]", r"\([ \t]{0,4}<?[ \t]{0,4}" + _SCHEME),
+    # link reference definition `[ref]: javascript:..` at the start of a line (indent <= 3)
+    ("refdef", "[", r"(?:(?<=^\[)|(?<=^ \[)|(?<=^  \[)|(?<=^   \[))(?P<ref>[^\]\n]{1,64}\]:[ \t]{0,4}<?)" + _SCHEME),
+    ("image", "!", r"(?=\[[^\]\n]{0,64}\][(\[])"),
+]
+# no attempt of a rule other than tool_call reads more than this many characters
+_HOLD = 128
+_CALL_SPAN = len("<tool_call>") + TOOL_CALL_MAX + len("</tool_call>")
+_OPEN = "<tool_call>"
+_FIXED = {"shell": "[removed: unsafe command]", "html": "&lt;", "entity": "&amp;", "link": "](#", "image": ""}
+
+class OutputSanitizer:
+    def __init__(self, validate: Callable[[str, dict], list[str]] = validate_tool_request):
+        self.validate = validate
+        branches, self._kinds = [], [None]  # group i -> kind
+        for kind, anchors, rest in _RULES:
+            for ch in anchors:
+                branches.append(f"{re.escape(ch)}({rest})")
+                self._kinds += [kind] + [None] * re.compile(rest).groups
+        self._re = re.compile("|".join(branches), re.M)
+
+    def _tool_call(self, m: re.Match) -> Optional[str]:
+        """None when the call is allowed and stays as written."""
+        try:
+            call = json.loads(m.group("call"))
+            name, args = str(call["name"]), call.get("args") or {}
+            if not isinstance(args, dict):
+                raise TypeError
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return "[removed: malformed tool call]"
+        hits = self.validate(name, args)
+        return f"[removed: tool call {name}: {', '.join(hits)}]" if hits else None
+
+    def _replace(self, m: re.Match, hits: Optional[list]) -> str:
+        kind = self._kinds[m.lastindex]
+        if kind == "tool_call":
+            out = self._tool_call(m)
+            if out is None:
+                return m.group()
+        elif kind == "refdef":
+            out = "[" + m.group("ref") + "#"
+        else:
+            out = _FIXED[kind]
+        if hits is not None:
+            hits.append(kind)
+        return out
+
+    def sanitize(self, text: str, hits: Optional[list] = None) -> str:
+        """Sanitized text; the kind of every rewrite is appended to `hits` when given."""
+        return self._re.sub(lambda m: self._replace(m, hits), text)
+
+    def sanitize_obj(self, obj: Any, hits: Optional[list] = None) -> Any:
+        if isinstance(obj, str):
+            return self.sanitize(obj, hits)
+        if isinstance(obj, dict):
+            return {k: self.sanitize_obj(v, hits) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return type(obj)(self.sanitize_obj(v, hits) for v in obj)
+        return obj
+
+    def stream(self) -> "SanitizerStream":
+        return SanitizerStream(self)
+
+class SanitizerStream:
+    """
+    Incremental sanitize(). Chunks are only appended to a list until more
+    than _HOLD + _MIN_EMIT characters are pending, so most tokens cost one
+    list append. Then everything before the last _HOLD characters (and
+    before an open <tool_call> that may still close) is scanned and
+    emitted; a rewrite that crosses that cut is held back whole. A few
+    emitted characters stay buffered as context for `^` and `\\b`.
+    """
+
+    _MIN_EMIT = 64
+    _CTX = 16
+
+    def __init__(self, sanitizer: OutputSanitizer):
+        self.s = sanitizer
+        self.hits: list[str] = []
+        self._buf = ""
+        self._pos = 0        # _buf[:_pos] is already emitted (context only)
+        self._chunks: list[str] = []
+        self._pending = 0    # chars in _chunks
+
+    def _emit(self, cut: int) -> str:
+        buf, pos, out = self._buf, self._pos, []
+        for m in self.s._re.finditer(buf, pos):
+            if m.end() > cut:
+                if m.start() < cut:
+                    cut = m.start()
+                break
+            out.append(buf[pos:m.start()])
+            out.append(self.s._replace(m, self.hits))
+            pos = m.end()
+        out.append(buf[pos:cut])
+        keep = max(0, cut - self._CTX)
+        self._buf, self._pos = buf[keep:], cut - keep
+        return "".join(out)
+
+    def _take(self) -> None:
+        if self._chunks:
+            self._buf += "".join(self._chunks)
+            self._chunks.clear()
+            self._pending = 0
+
+    def feed(self, chunk: str) -> str:
+        self._chunks.append(chunk)
+        self._pending += len(chunk)
+        if len(self._buf) - self._pos + self._pending < _HOLD + self._MIN_EMIT:
+            return ""
+        self._take()
+        n = len(self._buf)
+        cut = n - _HOLD
+        # a tool call opened within the last _CALL_SPAN chars may still close: hold from its start
+        p = self._buf.find(_OPEN, max(self._pos, n - _CALL_SPAN))
+        if p >= 0:
+            cut = min(cut, p)
+        return self._emit(cut) if cut > self._pos else ""
+
+    def flush(self) -> str:
+        self._take()
+        out = self._emit(len(self._buf))
+        self._buf, self._pos = "", 0
+        return out
+
+@lru_cache(maxsize=1)
+def default_sanitizer() -> OutputSanitizer:
+    return OutputSanitizer()
+
+def sanitize(text: str, hits: Optional[list] = None) -> str:
+    return default_sanitizer().sanitize(text, hits)
+
+def sanitize_obj(obj: Any, hits: Optional[list] = None) -> Any:
+    return default_sanitizer().sanitize_obj(obj, hits)
+
+async def asanitize_stream(tokens: AsyncIterator[str], hits: Optional[list] = None) -> AsyncIterator[str]:
+    """Wrap a token stream (e.g. Runner.stream()); yields sanitized text as soon as it is safe."""
+    s = default_sanitizer().stream()
+    async for tok in tokens:
+        out = s.feed(tok)
+        if out:
+            yield out
+    out = s.flush()
+    if hits is not None:
+        hits.extend(s.hits)
+    if out:
+        yield out
@@ -0,0 +1,303 @@
+# src/llm/guards/pii_redaction.py
+"""
+PII / secret redaction for everything we persist (messages, traces).
+
+One compiled regex tokenizes a text in a single left-to-right pass. It
+starts with a small class of anchor characters (`@`, `:`, `=`, `_`, `-`,
+digits, a few capitals), so sre skips everything else in C and only tries
+the detectors where one of them occurs: the domain of an email at its `@`,
+`password=`/IPv6 at the `:`/`=`, provider key prefixes at their `-`/`_`.
+Parts before the anchor (email local part, `ghp`, leading IPv6 group) are
+taken in by walking back over the word. Noisy kinds are confirmed by a
+cheap validator (Luhn for card numbers, octet ranges for IPv4, ipaddress
+for IPv6) before being replaced by `[REDACTED:<kind>]`; keyword-led secrets
+(`password=`, `Bearer `) lose only their value.
+
+IP addresses are IOCs in this app, so they are only redacted when
+PII_REDACT_IPS says so: "off" (default), "private" (RFC 1918, loopback,
+link-local, CGNAT, IPv6 ULA: the customer's internal hosts) or "all".
+
+    clean = redact(text)
+    doc = redact_obj(step)                     # every str inside dicts/lists
+    s = default_redactor().stream()
+    out = "".join(s.feed(tok) for tok in tokens) + s.close()   # == redact("".join(tokens))
+
+reredact_collection() rewrites historic documents in _id order with one
+bulk_write per page; see scripts/reredact_history.py.
+"""
+from __future__ import annotations
+import ipaddress
+import os
+import re
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+from pymongo import UpdateOne
+
+PII_REDACTION = os.getenv("PII_REDACTION", "1") not in {"0", "false", "off", ""}
+PII_REDACT_IPS = os.getenv("PII_REDACT_IPS", "off")  # off | private | all
+
+IP_MODES = ("off", "private", "all")
+
+# (kind, anchor characters, what follows the anchor). Every alternative of the compiled regex
+# starts with a literal anchor, so sre derives a prefix charset, skips all other text in C, and
+# only tries the alternatives for the anchor at hand. The first one that matches wins.
+_DETECTORS = [
+    ("email", "@", r"(?<=[\w.%+-]@)(?:[A-Za-z0-9-]+\.)+[A-Za-z]{2,}(?![\w-])"),
+    ("kv", ":=", ""),  # `password: value` or an IPv6 address, decided in _kv()
+    ("aws_key", "A", r"(?<!\w.)[KS]IA[0-9A-Z]{16}(?![A-Za-z0-9])"),
+    ("api_key", "A", r"(?<!\w.)Iza[0-9A-Za-z_-]{35}"),
+    ("api_key", "-", r"(?<=\bsk-)(?:ant-|proj-)?[A-Za-z0-9_-]{20,}|(?<=\bxox[abposr]-)[A-Za-z0-9-]{10,}"),
+    ("api_key", "_", r"(?<=\bgh[pousr]_)[A-Za-z0-9]{36,}|(?<=\bgithub_)pat_\w{22,}"
+                     r"|(?<=\b[rs]k_)(?:live|test)_[0-9A-Za-z]{16,}"),
+    ("jwt", "J", r"(?<=eyJ)(?<![\w-]eyJ)[\w-]{8,}\.[\w-]{8,}\.[\w-]{8,}"),
+    ("token", "Bb", r"(?<!\w.)(?i:earer)[ \t]{1,3}[\w.~+/-]{16,}=*"),
+    ("card", "0123456789", r"(?<![\w.-].)(?:[ -]?\d){12,18}(?!\d)"),
+]
+_IPV4 = ("ipv4", "0123456789", r"(?<![\w.].)\d{0,2}(?:\.\d{1,3}){3}(?!\.?\d)")
+
+_SECRET_KEY = re.compile(r"(?<!\w)(?i:password|passwd|pwd|secret|client[_-]?secret|api[_-]?key|apikey"
+                         r"|access[_-]?token|auth[_-]?token|refresh[_-]?token|token)[\"']?[ \t]{0,3}\Z")
+_SECRET_KEY_SPAN = 18  # longest keyword + quote + padding
+_SECRET_VALUE = re.compile(r"[ \t]{0,3}[\"']?([^\s\"',;]{6,})")
+_IPV6 = re.compile(r"[0-9A-Fa-f]{0,4}(?::[0-9A-Fa-f]{0,4}){2,7}(?![\w:])")
+
+# kinds whose match starts after the anchor's word start: chars to walk back over, and how far
+_LOCAL = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_.%+-")
+_LETTERS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_HEX = frozenset("0123456789abcdefABCDEF")
+_BACK = {"email": (_LOCAL, 64), "api_key": (_LETTERS, 6), "jwt": (_LETTERS, 2)}
+
+# a match (or a failed attempt) that spans whitespace is at most this long before its last word:
+# 19 card digits + 18 separators, or keyword + quote/space/`=` padding
+_WS_SPAN = 40
+STREAM_MAX_HOLD = int(os.getenv("PII_STREAM_MAX_HOLD", "16384"))
+
+def luhn_ok(digits: str) -> bool:
+    total, double = 0, False
+    for ch in reversed(digits):
+        d = ord(ch) - 48
+        if double:
+            d = d * 2 - 9 if d > 4 else d * 2
+        total += d
+        double = not double
+    return total % 10 == 0
+
+def _card_len(cand: str) -> int:
+    """Length of the longest Luhn-valid prefix of a digit run, ending on a digit group; 0 if none."""
+    while True:
+        digits = cand.replace(" ", "").replace("-", "")
+        if len(digits) < 13:
+            return 0
+        if len(digits) <= 19 and luhn_ok(digits):
+            return len(cand)
+        cut = max(cand.rfind(" "), cand.rfind("-"))
+        if cut < 0:
+            return 0
+        cand = cand[:cut]
+
+def _private_v4(octets: tuple[int, ...]) -> bool:
+    a, b = octets[0], octets[1]
+    return (a == 10 or a == 127 or (a == 172 and 16 <= b <= 31) or (a == 192 and b == 168)
+            or (a == 169 and b == 254) or (a == 100 and 64 <= b <= 127))
+
+def _back(text: str, i: int, floor: int, chars: frozenset, limit: int) -> int:
+    lo = max(floor, i - limit)
+    while i > lo and text[i - 1] in chars:
+        i -= 1
+    return i
+
+class PIIRedactor:
+    def __init__(self, ips: str = PII_REDACT_IPS):
+        if ips not in IP_MODES:
+            raise ValueError(f"PII_REDACT_IPS must be one of {IP_MODES}, got {ips!r}")
+        self.ips = ips
+        detectors = _DETECTORS + ([_IPV4] if ips != "off" else [])
+        branches, self._kinds = [], [None]  # group i -> kind
+        for kind, anchors, rest in detectors:
+            for ch in anchors:
+                branches.append(f"{re.escape(ch)}({rest})")
+                self._kinds.append(kind)
+        self._re = re.compile("|".join(branches))
+
+    def _kv(self, text: str, a: int, floor: int) -> Optional[tuple[int, int, str]]:
+        if _SECRET_KEY.search(text, max(0, a - _SECRET_KEY_SPAN), a):
+            v = _SECRET_VALUE.match(text, a + 1)
+            if v:
+                return v.start(1), v.end(1), "secret"
+        if text[a] == ":" and self.ips != "off":
+            start = _back(text, a, floor, _HEX, 4)
+            if start > 0 and (text[start - 1].isalnum() or text[start - 1] in "_:."):
+                return None  # inside a longer word, or more than 4 hex digits before the `:`
+            m = _IPV6.match(text, start)
+            if m:
+                try:
+                    ip = ipaddress.IPv6Address(m.group())
+                except ValueError:
+                    return None
+                if self.ips == "all" or ip.is_private or ip.is_link_local:
+                    return start, m.end(), "ipv6"
+        return None
+
+    def spans(self, text: str, pos: int = 0) -> Iterator[tuple[int, int, int, str]]:
+        """(anchor, start, end, kind) of every redaction from `pos`, left to right."""
+        floor, search = pos, self._re.search
+        m = search(text, pos)
+        while m:
+            a, kind = m.start(), self._kinds[m.lastindex]
+            start, end = a, m.end()
+            if kind == "kv":
+                hit = self._kv(text, a, floor)
+                if hit:
+                    start, end, kind = hit
+            elif kind == "token":
+                start = a + 6  # past "bearer" and its padding
+                while text[start] in " \t":
+                    start += 1
+            elif kind == "card":
+                n = _card_len(text[a:end])
+                end = a + n if n else 0
+            elif kind == "ipv4":
+                octets = tuple(map(int, m.group().split(".")))
+                if max(octets) > 255 or (self.ips == "private" and not _private_v4(octets)):
+                    end = 0
+            elif kind in _BACK:
+                start = _back(text, a, floor, *_BACK[kind])
+            if kind == "kv" or not end:
+                m = search(text, a + 1)  # rejected: it must not hide anything starting inside it
+                continue
+            yield a, start, end, kind
+            floor = end
+            m = search(text, end)
+
+    def redact(self, text: str) -> str:
+        out, last = [], 0
+        for _, start, end, kind in self.spans(text):
+            out.append(text[last:start])
+            out.append(f"[REDACTED:{kind}]")
+            last = end
+        if not out:
+            return text
+        out.append(text[last:])
+        return "".join(out)
+
+    def redact_obj(self, obj: Any) -> Any:
+        """Copy of obj with every string inside dicts/lists/tuples redacted (keys untouched)."""
+        if isinstance(obj, str):
+            return self.redact(obj)
+        if isinstance(obj, dict):
+            return {k: self.redact_obj(v) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return type(obj)(self.redact_obj(v) for v in obj)
+        return obj
+
+    def stream(self) -> "StreamRedactor":
+        return StreamRedactor(self)
+
+_SPACES = " \t\n\r\f\v"
+
+class StreamRedactor:
+    """
+    Incremental redaction with output identical to redact() over the whole
+    text. Everything up to a safe cut is emitted: the cut sits _WS_SPAN
+    characters before the end, moved back to the start of the word it falls
+    in, and further back to the anchor of any redaction still touching the
+    end. Already-emitted text stays in the buffer as context for lookbehinds
+    and the `password =` keyword check. A single word longer than
+    STREAM_MAX_HOLD is flushed as is.
+    """
+
+    _CTX = 24
+
+    def __init__(self, redactor: PIIRedactor):
+        self.r = redactor
+        self._buf = ""
+        self._pos = 0   # start of the not-yet-emitted text in _buf; _buf[:_pos] is context
+
+    def _emit(self, cut: int) -> str:
+        buf, pos, out = self._buf, self._pos, []
+        for a, start, end, kind in self.r.spans(buf, pos):
+            if end > cut:
+                cut = max(pos, min(cut, a, start))
+                break
+            out.append(buf[pos:start])
+            out.append(f"[REDACTED:{kind}]")
+            pos = end
+        out.append(buf[pos:cut])
+        keep = max(0, cut - self._CTX)
+        self._buf, self._pos = buf[keep:], cut - keep
+        return "".join(out)
+
+    def feed(self, chunk: str) -> str:
+        self._buf += chunk
+        cut = len(self._buf) - _WS_SPAN
+        if cut <= self._pos:
+            return ""
+        # the word being streamed may still grow into (or out of) a match: cut before it
+        cut = max(self._buf.rfind(c, self._pos, cut) for c in _SPACES) + 1
+        if len(self._buf) - cut > STREAM_MAX_HOLD:
+            cut = len(self._buf)
+        return self._emit(cut) if cut > self._pos else ""
+
+    def close(self) -> str:
+        out = self._emit(len(self._buf))
+        self._buf, self._pos = "", 0
+        return out
+
+@lru_cache(maxsize=1)
+def default_redactor() -> PIIRedactor:
+    return PIIRedactor()
+
+def redact(text: str) -> str:
+    return default_redactor().redact(text)
+
+def redact_obj(obj: Any) -> Any:
+    return default_redactor().redact_obj(obj)
+
+# ---- historic data ----
+def message_changes(doc: dict, redactor: Optional[PIIRedactor] = None) -> Optional[dict]:
+    """$set for a `messages` document, or None when nothing needs redacting."""
+    content = doc.get("content")
+    if not isinstance(content, str):
+        return None
+    clean = (redactor or default_redactor()).redact(content)
+    return {"content": clean} if clean != content else None
+
+async def reredact_collection(
+    coll,
+    changes: Callable[[dict], Optional[dict]],
+    *,
+    projection: Optional[dict] = None,
+    batch_size: int = 500,
+    start_after: Any = None,
+    dry_run: bool = False,
+    on_page: Optional[Callable[[dict], Awaitable[None] | None]] = None,
+) -> dict:
+    """
+    Walk `coll` in _id order, `batch_size` documents per page (keyset on
+    _id, so pages stay cheap however far in), and apply `changes(doc)` as
+    one unordered bulk_write of UpdateOne($set) per page. Returns counts and
+    the last _id seen, which can be passed back as start_after to resume.
+    """
+    stats = {"scanned": 0, "updated": 0, "last_id": start_after}
+    last = start_after
+    while True:
+        query = {"_id": {"$gt": last}} if last is not None else {}
+        docs = await coll.find(query, projection).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not docs:
+            return stats
+        ops = []
+        for doc in docs:
+            upd = changes(doc)
+            if upd:
+                ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": upd}))
+        if ops and not dry_run:
+            await coll.bulk_write(ops, ordered=False)
+        last = docs[-1]["_id"]
+        stats["scanned"] += len(docs)
+        stats["updated"] += len(ops)
+        stats["last_id"] = last
+        if on_page is not None:
+            res = on_page(stats)
+            if res is not None:
+                await res
@@ -0,0 +1,15 @@
+# src/llm/prompts/loader.py
+from functools import lru_cache
+from pathlib import Path
+
+PROMPTS_DIR = Path(__file__).parent
+
+@lru_cache(maxsize=None)
+def system_prompt(role_instructions: str = "") -> str:
+    """
+    Shared system prompt (+ optional role instructions appended after it).
+    Cached so every call sends a byte-identical prefix, which is what lets
+    backends reuse their prompt KV cache.
+    """
+    base = (PROMPTS_DIR / "system" / "base.md").read_text(encoding="utf-8").strip()
+    return f"{base}\n\n{role_instructions.strip()}" if role_instructions else base
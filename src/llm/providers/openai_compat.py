@@ -0,0 +1,96 @@
+# src/llm/providers/openai_compat.py
+"""
+Runner for any server exposing the OpenAI-compatible /v1/completions API
+(vLLM, llama.cpp server, LM Studio, ...). Uses raw completions rather than
+chat so a whole micro-batch fits in one request (`prompt` may be a list).
+"""
+from __future__ import annotations
+import json
+from typing import AsyncIterator
+
+from src.config.settings import LLM_API_KEY
+from src.llm.runners.base import Completion, GenParams, Runner, RunnerError, render_prompt
+
+class OpenAICompatRunner(Runner):
+    name = "openai_compat"
+    default_base_url = "http://127.0.0.1:8000"
+    supports_batch = True
+
+    def __init__(self, *args, api_key: str = LLM_API_KEY, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.api_key = api_key
+
+    def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+    def _body(self, prompts: list[str], params: GenParams, stream: bool) -> dict:
+        rendered = [render_prompt(p, params.system) for p in prompts]
+        body = {
+            "model": params.model,
+            "prompt": rendered if len(rendered) > 1 else rendered[0],
+            "temperature": params.temperature,
+            "max_tokens": params.max_tokens,
+            "stream": stream,
+        }
+        if params.stop:
+            body["stop"] = list(params.stop)
+        if stream:
+            body["stream_options"] = {"include_usage": True}  # usage arrives in a last, choice-less chunk
+        return body
+
+    async def _complete_batch(self, prompts: list[str], params: GenParams) -> list[Completion]:
+        r = await self.client.post(
+            f"{self.base_url}/v1/completions",
+            json=self._body(prompts, params, stream=False),
+            headers=self._headers(),
+        )
+        if r.status_code >= 400:
+            raise RunnerError(f"{self.name} {r.status_code}: {r.text[:200]}")
+        data = r.json()
+        choices = sorted(data.get("choices", []), key=lambda c: c.get("index", 0))
+        if len(choices) != len(prompts):
+            raise RunnerError(f"{self.name}: expected {len(prompts)} choices, got {len(choices)}")
+        usage = data.get("usage") or {}
+        n = len(prompts)
+        return [
+            Completion(
+                text=c.get("text", ""),
+                model=data.get("model", params.model),
+                # usage is reported for the whole request; split it evenly
+                prompt_tokens=int(usage.get("prompt_tokens", 0)) // n,
+                completion_tokens=int(usage.get("completion_tokens", 0)) // n,
+                meta={"finish_reason": c.get("finish_reason")},
+            )
+            for c in choices
+        ]
+
+    async def _embed_batch(self, texts: list[str], model: str) -> list[list[float]]:
+        r = await self.client.post(f"{self.base_url}/v1/embeddings",
+                                   json={"model": model, "input": texts}, headers=self._headers())
+        if r.status_code >= 400:
+            raise RunnerError(f"{self.name} {r.status_code}: {r.text[:200]}", r.status_code)
+        data = sorted(r.json().get("data", []), key=lambda d: d.get("index", 0))
+        return [d["embedding"] for d in data]
+
+    async def _stream(self, prompt: str, params: GenParams, usage: dict) -> AsyncIterator[str]:
+        async with self.client.stream(
+            "POST",
+            f"{self.base_url}/v1/completions",
+            json=self._body([prompt], params, stream=True),
+            headers=self._headers(),
+        ) as r:
+            if r.status_code >= 400:
+                raise RunnerError(f"{self.name} {r.status_code}: {(await r.aread())[:200]!r}")
+            async for line in r.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    break
+                data = json.loads(payload)
+                if data.get("usage"):
+                    usage["prompt_tokens"] = int(data["usage"].get("prompt_tokens", 0))
+                    usage["completion_tokens"] = int(data["usage"].get("completion_tokens", 0))
+                choices = data.get("choices") or []
+                if choices and choices[0].get("text"):
+                    yield choices[0]["text"]
@@ -0,0 +1,268 @@
+# src/llm/runners/base.py
+"""
+Runner abstraction shared by all local LLM backends.
+
+- one pooled httpx.AsyncClient per event loop (keep-alive, HTTP/2 if `h2` is
+  installed); sync entry points run a fresh loop per call, and a client's
+  connections cannot be used from another loop
+- per-model concurrency limits (semaphores, also per event loop)
+- micro-batching: concurrent generate() calls for the same model and params
+  arriving within a short window go out as one request on backends that
+  accept a list of prompts
+- stream() yields tokens as an async iterator; token usage comes from the
+  backend's final stream message, not from the number of chunks
+"""
+from __future__ import annotations
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from src.config.settings import (
+    LLM_BATCH_WINDOW_MS,
+    LLM_HTTP_KEEPALIVE,
+    LLM_HTTP_MAX_CONNECTIONS,
+    LLM_MAX_BATCH,
+    LLM_MAX_CONCURRENCY_PER_MODEL,
+    LLM_MODEL,
+    LLM_TIMEOUT_SEC,
+)
+
+# ---- shared HTTP client (one per event loop) ----
+_clients: dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+def _drop_closed_loops(by_loop: dict) -> None:
+    """Forget state of loops that have ended (asyncio.run closes its loop on return)."""
+    for loop in [lp for lp in by_loop if lp.is_closed()]:
+        del by_loop[loop]
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def get_http_client() -> httpx.AsyncClient:
+    """The running loop's pooled client; must be called from a coroutine."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        _drop_closed_loops(_clients)
+        client = _clients[loop] = httpx.AsyncClient(
+            http2=_http2_available(),
+            timeout=httpx.Timeout(LLM_TIMEOUT_SEC, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_KEEPALIVE,
+            ),
+        )
+    return client
+
+async def close_http_client() -> None:
+    """Close the running loop's client (call before the loop ends)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+# ---- request/response types ----
+@dataclass(frozen=True)
+class GenParams:
+    model: str
+    system: Optional[str] = None
+    temperature: float = 0.2
+    max_tokens: int = 512
+    stop: tuple[str, ...] = ()
+
+@dataclass
+class Completion:
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: float = 0.0
+    batch_size: int = 1
+    meta: dict = field(default_factory=dict)
+
+class RunnerError(RuntimeError):
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+# ---- micro-batcher ----
+class _MicroBatcher:
+    """Groups concurrent prompts with identical GenParams into one backend call."""
+
+    def __init__(self, runner: "Runner", window_ms: float, max_batch: int):
+        self.runner = runner
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_batch = max(1, max_batch)
+        # keyed by loop too: futures and timers belong to the loop that submitted them
+        self._pending: dict[tuple[asyncio.AbstractEventLoop, GenParams], list[tuple[str, asyncio.Future]]] = {}
+        self._timers: dict[tuple[asyncio.AbstractEventLoop, GenParams], asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()  # in-flight batches; the loop only holds weak refs
+
+    async def submit(self, prompt: str, params: GenParams) -> Completion:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        key = (loop, params)
+        bucket = self._pending.setdefault(key, [])
+        bucket.append((prompt, fut))
+        if len(bucket) >= self.max_batch:
+            self._fire(key)
+        elif len(bucket) == 1:
+            self._timers[key] = loop.call_later(self.window, self._fire, key)
+        return await fut
+
+    def _fire(self, key: tuple[asyncio.AbstractEventLoop, GenParams]) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        bucket = self._pending.pop(key, None)
+        if bucket:
+            task = key[0].create_task(self._run(bucket, key[1]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, bucket: list[tuple[str, asyncio.Future]], params: GenParams) -> None:
+        try:
+            results = await self.runner._complete_many([p for p, _ in bucket], params)
+        except asyncio.CancelledError:
+            for _, fut in bucket:
+                fut.cancel()
+            raise
+        except Exception as e:
+            for _, fut in bucket:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut), res in zip(bucket, results):
+            if not fut.done():
+                fut.set_result(res)
+
+# ---- runner ----
+class Runner(ABC):
+    name: str = "runner"
+    default_base_url: str = ""
+    # True when the backend accepts a list of prompts in one request
+    supports_batch: bool = False
+
+    def __init__(
+        self,
+        base_url: str = "",
+        model: str = LLM_MODEL,
+        *,
+        max_concurrency: int = LLM_MAX_CONCURRENCY_PER_MODEL,
+        batch_window_ms: float = LLM_BATCH_WINDOW_MS,
+        max_batch: int = LLM_MAX_BATCH,
+        client: httpx.AsyncClient | None = None,
+    ):
+        self.base_url = (base_url or self.default_base_url).rstrip("/")
+        self.model = model
+        self.max_concurrency = max(1, max_concurrency)
+        self._client = client
+        # loop -> model -> semaphore; a semaphore binds to the first loop that waits on it
+        self._slots: dict[asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]] = {}
+        self._batcher = _MicroBatcher(self, batch_window_ms, max_batch)
+        self.requests = 0
+        self.prompts = 0
+        self.completion_tokens = 0
+        self.stream_chunks = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_http_client()
+
+    def params(self, model: str | None = None, system: str | None = None, **kw) -> GenParams:
+        if "stop" in kw and kw["stop"] is not None:
+            kw["stop"] = tuple(kw["stop"])
+        return GenParams(model=model or self.model, system=system, **{k: v for k, v in kw.items() if v is not None})
+
+    def _slot(self, model: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            _drop_closed_loops(self._slots)
+            slots = self._slots[loop] = {}
+        sem = slots.get(model)
+        if sem is None:
+            sem = slots[model] = asyncio.Semaphore(self.max_concurrency)
+        return sem
+
+    # ---- public API ----
+    async def generate(self, prompt: str, *, model: str | None = None, system: str | None = None, **kw) -> Completion:
+        params = self.params(model, system, **kw)
+        if self.supports_batch and self._batcher.max_batch > 1:
+            return await self._batcher.submit(prompt, params)
+        return (await self._complete_many([prompt], params))[0]
+
+    async def stream(self, prompt: str, *, model: str | None = None, system: str | None = None,
+                     usage: dict | None = None, **kw) -> AsyncIterator[str]:
+        """
+        Yield text chunks as they arrive. A chunk is not a token: the real
+        prompt_tokens/completion_tokens reported at the end of the stream are
+        written into `usage` when the caller passes a dict.
+        """
+        params = self.params(model, system, **kw)
+        usage = {} if usage is None else usage
+        async with self._slot(params.model):
+            self.requests += 1
+            self.prompts += 1
+            try:
+                async for tok in self._stream(prompt, params, usage):
+                    self.stream_chunks += 1
+                    yield tok
+            finally:
+                self.completion_tokens += int(usage.get("completion_tokens", 0))
+
+    async def _complete_many(self, prompts: list[str], params: GenParams) -> list[Completion]:
+        if len(prompts) > 1 and not self.supports_batch:
+            chunks = await asyncio.gather(*(self._complete_many([p], params) for p in prompts))
+            return [c for chunk in chunks for c in chunk]
+        t0 = time.perf_counter()
+        async with self._slot(params.model):
+            self.requests += 1
+            results = await self._complete_batch(prompts, params)
+        latency = (time.perf_counter() - t0) * 1000
+        self.prompts += len(prompts)
+        for r in results:
+            r.latency_ms = latency
+            r.batch_size = len(prompts)
+            self.completion_tokens += r.completion_tokens
+        return results
+
+    async def embed(self, texts: list[str], *, model: str | None = None) -> list[list[float]]:
+        """One embeddings request for a batch of texts (callers choose the batch size)."""
+        model = model or self.model
+        async with self._slot(model):
+            self.requests += 1
+            return await self._embed_batch(texts, model)
+
+    # ---- backend hooks ----
+    async def _embed_batch(self, texts: list[str], model: str) -> list[list[float]]:
+        raise RunnerError(f"{self.name} does not support embeddings")
+
+    @abstractmethod
+    async def _complete_batch(self, prompts: list[str], params: GenParams) -> list[Completion]:
+        """One backend request. len(prompts) > 1 only when supports_batch."""
+
+    @abstractmethod
+    def _stream(self, prompt: str, params: GenParams, usage: dict) -> AsyncIterator[str]:
+        """Yield text chunks; set usage["prompt_tokens"/"completion_tokens"] when the backend reports them."""
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "requests": self.requests,
+            "prompts": self.prompts,
+            "avg_batch": (self.prompts / self.requests) if self.requests else 0.0,
+            "completion_tokens": self.completion_tokens,
+            "stream_chunks": self.stream_chunks,
+        }
+
+def render_prompt(prompt: str, system: str | None) -> str:
+    """Flatten system + user prompt for raw-completion endpoints."""
+    return f"{system.strip()}\n\n{prompt}" if system else prompt
@@ -0,0 +1,169 @@
+# src/llm/runners/fake_server.py
+"""
+Deterministic fake LLM server for tests and benchmarks (stdlib only).
+
+Speaks enough of both APIs the runners use:
+  POST /api/generate     Ollama-style, JSON or NDJSON stream
+  POST /v1/completions   OpenAI-style, str or list prompt, JSON or SSE stream
+  POST /api/embed, /v1/embeddings   deterministic HashEmbedder vectors
+Output tokens are derived from a hash of the prompt, so the same prompt
+always yields the same text. `token_delay_ms` simulates decode speed and
+`request_overhead_ms` a fixed per-request (prefill) cost.
+
+    python -m src.llm.runners.fake_server --port 11555 --token-delay-ms 2
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.rag.embedding import HashEmbedder
+
+WORDS = ("block", "scan", "port", "ioc", "alert", "edge", "host", "triage", "patch", "ssh", "tls", "rule")
+
+def fake_tokens(prompt: str, n: int) -> list[str]:
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    return [WORDS[digest[i % len(digest)] % len(WORDS)] + " " for i in range(n)]
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body go out as separate writes; avoid the 40 ms delayed-ACK stall
+
+    def log_message(self, *args):  # quiet
+        pass
+
+    def _json(self, obj: dict) -> None:
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _start_stream(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def do_POST(self):
+        srv: FakeLLMServer = self.server.owner  # type: ignore[attr-defined]
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", "0"))) or b"{}")
+        srv.record(self.path, body)
+        time.sleep(srv.request_overhead_ms / 1000)
+        if self.path == "/api/generate":
+            self._ollama(srv, body)
+        elif self.path == "/v1/completions":
+            self._openai(srv, body)
+        elif self.path in ("/api/embed", "/v1/embeddings"):
+            self._embed(srv, body)
+        else:
+            self.send_error(404)
+
+    def _ollama(self, srv: "FakeLLMServer", body: dict) -> None:
+        n = min(int(body.get("options", {}).get("num_predict", 32)), srv.max_tokens)
+        prompt = (body.get("system") or "") + body.get("prompt", "")
+        toks = fake_tokens(prompt, n)
+        if not body.get("stream", True):
+            time.sleep(srv.token_delay_ms * n / 1000)
+            return self._json({"model": body.get("model"), "response": "".join(toks), "done": True,
+                               "prompt_eval_count": len(prompt.split()), "eval_count": n})
+        self._start_stream("application/x-ndjson")
+        for t in toks:
+            time.sleep(srv.token_delay_ms / 1000)
+            self._chunk(json.dumps({"model": body.get("model"), "response": t, "done": False}).encode() + b"\n")
+        self._chunk(json.dumps({"model": body.get("model"), "response": "", "done": True,
+                                "prompt_eval_count": len(prompt.split()), "eval_count": n}).encode() + b"\n")
+        self._chunk(b"")
+
+    def _embed(self, srv: "FakeLLMServer", body: dict) -> None:
+        texts = body.get("input", [])
+        texts = texts if isinstance(texts, list) else [texts]
+        if sum(len(t) for t in texts) > srv.max_embed_chars:
+            self.send_error(413, "batch too large")
+            return
+        time.sleep(srv.token_delay_ms * len(texts) / 1000)
+        vecs = srv.embedder.embed(texts)
+        if self.path == "/api/embed":
+            return self._json({"model": body.get("model"), "embeddings": vecs})
+        return self._json({"data": [{"index": i, "embedding": v} for i, v in enumerate(vecs)]})
+
+    def _openai(self, srv: "FakeLLMServer", body: dict) -> None:
+        prompts = body.get("prompt", "")
+        prompts = prompts if isinstance(prompts, list) else [prompts]
+        n = min(int(body.get("max_tokens", 32)), srv.max_tokens)
+        if not body.get("stream"):
+            # a batch decodes in lockstep: cost is n token steps, not n * len(prompts)
+            time.sleep(srv.token_delay_ms * n / 1000)
+            choices = [{"index": i, "text": "".join(fake_tokens(p, n)), "finish_reason": "length"} for i, p in enumerate(prompts)]
+            return self._json({"model": body.get("model"), "choices": choices,
+                               "usage": {"prompt_tokens": sum(len(p.split()) for p in prompts),
+                                         "completion_tokens": n * len(prompts)}})
+        self._start_stream("text/event-stream")
+        for t in fake_tokens(prompts[0], n):
+            time.sleep(srv.token_delay_ms / 1000)
+            self._chunk(b"data: " + json.dumps({"choices": [{"index": 0, "text": t}]}).encode() + b"\n\n")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            usage = {"prompt_tokens": len(prompts[0].split()), "completion_tokens": n}
+            self._chunk(b"data: " + json.dumps({"choices": [], "usage": usage}).encode() + b"\n\n")
+        self._chunk(b"data: [DONE]\n\n")
+        self._chunk(b"")
+
+class FakeLLMServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, *, token_delay_ms: float = 0.0,
+                 request_overhead_ms: float = 0.0, max_tokens: int = 64, embed_dim: int = 256,
+                 max_embed_chars: int = 1 << 30):
+        self.token_delay_ms = token_delay_ms
+        self.embedder = HashEmbedder(embed_dim)
+        self.max_embed_chars = max_embed_chars
+        self.request_overhead_ms = request_overhead_ms
+        self.max_tokens = max_tokens
+        self.requests: list[tuple[str, dict]] = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self  # type: ignore[attr-defined]
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, path: str, body: dict) -> None:
+        with self._lock:
+            self.requests.append((path, body))
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11555)
+    ap.add_argument("--token-delay-ms", type=float, default=0.0)
+    ap.add_argument("--request-overhead-ms", type=float, default=0.0)
+    args = ap.parse_args()
+    srv = FakeLLMServer(args.host, args.port, token_delay_ms=args.token_delay_ms,
+                        request_overhead_ms=args.request_overhead_ms)
+    print(f"fake LLM server on {srv.url}")
+    srv._httpd.serve_forever()
@@ -0,0 +1,14 @@
+# src/llm/runners/llama_cpp_runner.py
+from src.llm.providers.openai_compat import OpenAICompatRunner
+from src.llm.runners.base import GenParams
+
+class LlamaCppRunner(OpenAICompatRunner):
+    """llama.cpp `llama-server`; one prompt per request, parallelism via its slots."""
+    name = "llama_cpp"
+    default_base_url = "http://127.0.0.1:8080"
+    supports_batch = False
+
+    def _body(self, prompts: list[str], params: GenParams, stream: bool) -> dict:
+        body = super()._body(prompts, params, stream)
+        body["cache_prompt"] = True  # reuse the slot's KV cache for the shared prefix
+        return body
@@ -0,0 +1,60 @@
+# src/llm/runners/ollama_runner.py
+"""Runner for Ollama's native /api/generate (NDJSON streaming)."""
+from __future__ import annotations
+import json
+from typing import AsyncIterator
+
+from src.config.settings import LLM_KEEP_ALIVE
+from src.llm.runners.base import Completion, GenParams, Runner, RunnerError
+
+class OllamaRunner(Runner):
+    name = "ollama"
+    default_base_url = "http://127.0.0.1:11434"
+    # no list-prompt API; concurrent requests are parallelised by OLLAMA_NUM_PARALLEL
+    supports_batch = False
+
+    def _body(self, prompt: str, params: GenParams, stream: bool) -> dict:
+        options = {"temperature": params.temperature, "num_predict": params.max_tokens}
+        if params.stop:
+            options["stop"] = list(params.stop)
+        # keep_alive keeps the model loaded so the shared system-prompt prefix stays in its KV cache
+        body = {"model": params.model, "prompt": prompt, "stream": stream, "options": options,
+                "keep_alive": LLM_KEEP_ALIVE}
+        if params.system:
+            body["system"] = params.system
+        return body
+
+    async def _complete_batch(self, prompts: list[str], params: GenParams) -> list[Completion]:
+        (prompt,) = prompts
+        r = await self.client.post(f"{self.base_url}/api/generate", json=self._body(prompt, params, stream=False))
+        if r.status_code >= 400:
+            raise RunnerError(f"ollama {r.status_code}: {r.text[:200]}")
+        data = r.json()
+        return [Completion(
+            text=data.get("response", ""),
+            model=data.get("model", params.model),
+            prompt_tokens=int(data.get("prompt_eval_count", 0)),
+            completion_tokens=int(data.get("eval_count", 0)),
+        )]
+
+    async def _embed_batch(self, texts: list[str], model: str) -> list[list[float]]:
+        r = await self.client.post(f"{self.base_url}/api/embed",
+                                   json={"model": model, "input": texts, "keep_alive": LLM_KEEP_ALIVE})
+        if r.status_code >= 400:
+            raise RunnerError(f"ollama {r.status_code}: {r.text[:200]}", r.status_code)
+        return r.json()["embeddings"]
+
+    async def _stream(self, prompt: str, params: GenParams, usage: dict) -> AsyncIterator[str]:
+        async with self.client.stream("POST", f"{self.base_url}/api/generate", json=self._body(prompt, params, stream=True)) as r:
+            if r.status_code >= 400:
+                raise RunnerError(f"ollama {r.status_code}: {(await r.aread())[:200]!r}")
+            async for line in r.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    usage["prompt_tokens"] = int(chunk.get("prompt_eval_count", 0))
+                    usage["completion_tokens"] = int(chunk.get("eval_count", 0))
+                    break
@@ -0,0 +1,44 @@
+# src/llm/runners/registry.py
+from src.config.settings import LLM_BACKEND, LLM_BASE_URL, LLM_MODEL
+from src.llm.cache import CachedRunner
+from src.llm.runners.base import Runner
+
+_runners: dict[tuple[str, str, str], Runner] = {}
+_cached: dict[tuple[str, str, str], CachedRunner] = {}
+
+def _runner_class(backend: str) -> type[Runner]:
+    if backend == "ollama":
+        from src.llm.runners.ollama_runner import OllamaRunner
+        return OllamaRunner
+    if backend == "vllm":
+        from src.llm.runners.vllm_runner import VLLMRunner
+        return VLLMRunner
+    if backend == "llama_cpp":
+        from src.llm.runners.llama_cpp_runner import LlamaCppRunner
+        return LlamaCppRunner
+    if backend == "openai_compat":
+        from src.llm.providers.openai_compat import OpenAICompatRunner
+        return OpenAICompatRunner
+    raise ValueError(f"unknown LLM backend {backend!r}")
+
+def get_runner(backend: str = LLM_BACKEND, base_url: str = LLM_BASE_URL, model: str = LLM_MODEL) -> Runner:
+    """Process-wide runner per (backend, url, model); all share the running loop's pooled HTTP client."""
+    key = (backend, base_url, model)
+    runner = _runners.get(key)
+    if runner is None:
+        runner = _runners[key] = _runner_class(backend)(base_url, model)
+    return runner
+
+def all_runners() -> list[Runner]:
+    return list(_runners.values())
+
+def get_cached_runner(backend: str = LLM_BACKEND, base_url: str = LLM_BASE_URL, model: str = LLM_MODEL) -> CachedRunner:
+    """What agents should call: get_runner() behind the response cache."""
+    key = (backend, base_url, model)
+    cached = _cached.get(key)
+    if cached is None:
+        cached = _cached[key] = CachedRunner(get_runner(backend, base_url, model))
+    return cached
+
+def all_cached_runners() -> list[CachedRunner]:
+    return list(_cached.values())
@@ -0,0 +1,10 @@
+# src/llm/runners/vllm_runner.py
+from src.llm.providers.openai_compat import OpenAICompatRunner
+
+class VLLMRunner(OpenAICompatRunner):
+    """
+    vLLM's OpenAI-compatible server; continuous batching makes list prompts cheap.
+    Start it with --enable-prefix-caching so the shared system prompt is prefilled once.
+    """
+    name = "vllm"
+    default_base_url = "http://127.0.0.1:8000"
@@ -0,0 +1,185 @@
+# src/memory/episodic.py
+"""
+Token-budgeted episodic memory for incident threads.
+
+State per conversation lives on the conversation document under `episodic`:
+
+  notes    one short line per folded message ("user: first sentence..."),
+           oldest dropped first once notes and iocs exceed EPISODIC_SUMMARY_TOKENS
+  iocs     indicators seen in folded messages (most recent EPISODIC_MAX_IOCS)
+  dropped  notes condensed away so far
+  folded   number of messages folded so far (monotonic; guards concurrent writers)
+  through  {created_at, id} of the last folded message
+
+A turn loads that state (already fetched with the conversation) plus the
+unfolded tail of db.messages: one query after `through` on
+ix_messages_conv_created, newest first, capped at EPISODIC_FETCH_MAX.
+`window()` then keeps the newest messages that fit the token budget
+verbatim behind a system message rendering the summary, and folds
+everything older into the state, which is persisted with the exchange. The
+tail therefore stays bounded, and so does the work per turn, however long
+the thread gets. Threads from before this module (or that fell behind) are
+folded in pages once, on their first load.
+"""
+from __future__ import annotations
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+from bson import ObjectId
+
+from src.intel.normalizers import extract_iocs
+from src.rag.preprocess.chunk import count_tokens
+
+EPISODIC_TOKEN_BUDGET = int(os.getenv("EPISODIC_TOKEN_BUDGET", "2048"))
+EPISODIC_SUMMARY_TOKENS = int(os.getenv("EPISODIC_SUMMARY_TOKENS", "512"))
+EPISODIC_NOTE_TOKENS = int(os.getenv("EPISODIC_NOTE_TOKENS", "32"))
+EPISODIC_MAX_IOCS = int(os.getenv("EPISODIC_MAX_IOCS", "32"))
+# most messages kept verbatim; keeps the next turn's tail query under EPISODIC_FETCH_MAX
+EPISODIC_RECENT_MAX = int(os.getenv("EPISODIC_RECENT_MAX", "24"))
+EPISODIC_FETCH_MAX = int(os.getenv("EPISODIC_FETCH_MAX", "64"))
+
+_PROJECTION = {"role": 1, "content": 1, "created_at": 1, "tokens": 1}
+_FIRST_SENTENCE = re.compile(r".+?(?:[.!?](?=\s)|\n|$)", re.S)
+
+def message_tokens(m: dict) -> int:
+    """Token count stored on the message at persist time, else counted."""
+    n = m.get("tokens")
+    return n if isinstance(n, int) else count_tokens(m.get("content") or "")
+
+def _note(m: dict) -> str:
+    text = (m.get("content") or "").strip()
+    first = _FIRST_SENTENCE.match(text)
+    words = (first.group().strip() if first else "").split()
+    clipped = " ".join(words[:EPISODIC_NOTE_TOKENS])
+    if len(words) > EPISODIC_NOTE_TOKENS or len(clipped) < len(" ".join(text.split())):
+        clipped += " ..."
+    return f"{m.get('role', 'user')}: {clipped}"
+
+def fold(state: dict, messages: list[dict], summary_tokens: int = EPISODIC_SUMMARY_TOKENS) -> dict:
+    """New state with `messages` (oldest first) folded into the rolling summary."""
+    notes = list(state.get("notes", []))
+    iocs = list(state.get("iocs", []))
+    dropped = state.get("dropped", 0)
+    for m in messages:
+        notes.append(_note(m))
+        for ioc in extract_iocs(m.get("content") or ""):
+            if ioc.value in iocs:
+                iocs.remove(ioc.value)
+            iocs.append(ioc.value)
+    iocs = iocs[-EPISODIC_MAX_IOCS:]
+    # notes and the indicator line share the summary budget; oldest notes go first
+    used = sum(count_tokens(n) for n in notes) + count_tokens(", ".join(iocs))
+    while notes and used > summary_tokens:
+        used -= count_tokens(notes.pop(0))
+        dropped += 1
+    while iocs and used > summary_tokens:
+        used -= count_tokens(iocs.pop(0)) + 1
+    out = {"notes": notes, "iocs": iocs, "dropped": dropped,
+           "folded": state.get("folded", 0) + len(messages), "through": state.get("through")}
+    last = next((m for m in reversed(messages) if "_id" in m), None)
+    if last is not None:
+        out["through"] = {"created_at": last.get("created_at"), "id": str(last["_id"])}
+    return out
+
+def render_summary(state: dict) -> str:
+    if not state.get("notes") and not state.get("iocs"):
+        return ""
+    lines = [f"Summary of {state.get('folded', 0)} earlier messages in this incident thread"
+             + (f" (oldest {state['dropped']} condensed away)" if state.get("dropped") else "") + ":"]
+    lines += [f"- {n}" for n in state.get("notes", [])]
+    if state.get("iocs"):
+        lines.append("Indicators mentioned: " + ", ".join(state["iocs"]))
+    return "\n".join(lines)
+
+def _after(through: Optional[dict]) -> dict:
+    if not through:
+        return {}
+    ts, oid = through["created_at"], ObjectId(through["id"])
+    return {"$or": [{"created_at": {"$gt": ts}}, {"created_at": ts, "_id": {"$gt": oid}}]}
+
+@dataclass
+class Episode:
+    conversation_id: str
+    state: dict = field(default_factory=dict)
+    tail: list[dict] = field(default_factory=list)  # unfolded stored messages, oldest first
+    dirty: bool = False  # state advanced while loading (catch-up), persist it
+
+@dataclass
+class Window:
+    messages: list[dict]    # context for the turn: summary (system) + recent messages
+    tokens: int
+    state: Optional[dict]   # updated episodic state to persist, None if unchanged
+
+class EpisodicMemory:
+    def __init__(self, budget: int = EPISODIC_TOKEN_BUDGET, summary_tokens: int = EPISODIC_SUMMARY_TOKENS,
+                 recent_max: int = EPISODIC_RECENT_MAX, fetch_max: int = EPISODIC_FETCH_MAX):
+        self.budget = budget
+        self.summary_tokens = min(summary_tokens, budget // 2)
+        self.recent_max = recent_max
+        self.fetch_max = max(fetch_max, recent_max + 1)
+
+    async def load(self, db, conv: dict) -> Episode:
+        """Unfolded tail of the conversation; `conv` is the already-fetched conversation document."""
+        oid = ObjectId(conv["id"])
+        state = dict(conv.get("episodic") or {})
+        q = {"conversation_id": oid, **_after(state.get("through"))}
+        tail = await (db.messages.find(q, _PROJECTION)
+                      .sort([("created_at", -1), ("_id", -1)]).limit(self.fetch_max).to_list(self.fetch_max))
+        tail.reverse()
+        ep = Episode(conv["id"], state, tail)
+        if len(tail) == self.fetch_max:
+            await self._catch_up(db, oid, ep)
+        return ep
+
+    async def _catch_up(self, db, oid: ObjectId, ep: Episode) -> None:
+        """Fold everything between the stored summary and the fetched tail, one page at a time."""
+        first = ep.tail[0]
+        before = {"$or": [{"created_at": {"$lt": first["created_at"]}},
+                          {"created_at": first["created_at"], "_id": {"$lt": first["_id"]}}]}
+        while True:
+            after = _after(ep.state.get("through"))
+            q = {"conversation_id": oid, "$and": [before, after] if after else [before]}
+            page = await (db.messages.find(q, _PROJECTION)
+                          .sort([("created_at", 1), ("_id", 1)]).limit(self.fetch_max).to_list(self.fetch_max))
+            if not page:
+                return
+            ep.state = fold(ep.state, page, self.summary_tokens)
+            ep.dirty = True
+
+    def window(self, ep: Episode, new_messages: list[dict]) -> Window:
+        """
+        Context for this turn within the token budget. The newest user message
+        is always kept whole; older messages that do not fit are folded.
+        """
+        recent = ep.tail + [{"role": m["role"], "content": m["content"]} for m in new_messages]
+        sizes = [message_tokens(m) for m in recent]
+        last_user = max((i for i, m in enumerate(recent) if m["role"] == "user"), default=len(recent))
+        # newest first, as many as fit next to the summary as it stands
+        keep, used = len(recent), 0
+        budget = self.budget - count_tokens(render_summary(ep.state))
+        while keep > 0 and (keep - 1 >= last_user or (used + sizes[keep - 1] <= budget
+                                                       and len(recent) - keep < self.recent_max)):
+            keep -= 1
+            used += sizes[keep]
+        while True:
+            state = fold(ep.state, ep.tail[:keep], self.summary_tokens) if keep else ep.state
+            # new messages that already overflow (a long first request) are summarised for this turn only
+            summary = render_summary(fold(state, recent[len(ep.tail):keep], self.summary_tokens)
+                                     if keep > len(ep.tail) else state)
+            tokens = used + count_tokens(summary)
+            # folding grew the summary past what was reserved for it: give up the oldest kept message
+            if tokens <= self.budget or keep >= last_user:
+                break
+            used -= sizes[keep]
+            keep += 1
+        messages = ([{"role": "system", "content": summary}] if summary else []) + [
+            {"role": m["role"], "content": m["content"]} for m in recent[keep:]]
+        changed = keep > 0 and bool(ep.tail)
+        return Window(messages, tokens, state if (changed or ep.dirty) else None)
+
+@lru_cache(maxsize=1)
+def default_memory() -> EpisodicMemory:
+    return EpisodicMemory()
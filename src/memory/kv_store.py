@@ -0,0 +1,240 @@
+# src/memory/kv_store.py
+"""
+Embedded key-value store shared by the uvicorn workers on one host.
+
+One SQLite file in WAL mode, table kv(k PRIMARY KEY, v JSON, exp) WITHOUT
+ROWID. Any number of processes open the same path: SQLite's file locks
+serialise writers, and WAL readers never wait for them, so reads run inline
+on the event loop (a primary-key lookup is a few microseconds) while writes
+go to a worker thread.
+
+Writes are write-behind. set/mset/delete land in an in-process pending map
+that reads check first (read-your-writes), and one background task commits
+everything pending in a single transaction. It starts at once when idle,
+so writes pick up no batching delay; under load, every write that arrives
+during a commit shares the next one. Other processes see a write once its
+batch commits. Pass durable=True (or await flush()) to wait for that.
+
+A failed commit fails the writes waiting on it, but the pending writes
+stay queued and the writer retries them with exponential backoff (up to
+KV_RETRY_MAX_SECONDS apart) until they commit. close() tries
+KV_CLOSE_ATTEMPTS times before giving up on them.
+
+Entries carry an absolute expiry (ttl seconds; 0/None never expires).
+Expired rows are invisible at once and swept every KV_SWEEP_SECONDS.
+
+The file lives under DATA_DIR unless KV_STORE_PATH says otherwise, so every
+worker opens the same one whatever its working directory.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Iterable, Mapping, Optional
+
+from src.config.settings import DATA_DIR
+
+log = logging.getLogger(__name__)
+
+KV_STORE_PATH = os.getenv("KV_STORE_PATH", os.path.join(DATA_DIR, "kv", "kv.sqlite"))
+KV_DEFAULT_TTL_SECONDS = float(os.getenv("KV_DEFAULT_TTL_SECONDS", "0"))  # 0: keep until overwritten
+KV_MAX_BATCH = int(os.getenv("KV_MAX_BATCH", "4096"))
+KV_SWEEP_SECONDS = float(os.getenv("KV_SWEEP_SECONDS", "60"))
+KV_RETRY_MAX_SECONDS = float(os.getenv("KV_RETRY_MAX_SECONDS", "5"))
+KV_CLOSE_ATTEMPTS = int(os.getenv("KV_CLOSE_ATTEMPTS", "5"))
+
+_DELETED = object()
+_IN_CHUNK = 500  # keys per IN (...) query, under SQLite's bound-parameter limit
+_RETRY_MIN_SECONDS = 0.05
+
+class KVStore:
+    def __init__(self, path: str = KV_STORE_PATH, default_ttl: float = KV_DEFAULT_TTL_SECONDS,
+                 max_batch: int = KV_MAX_BATCH, sweep_sec: float = KV_SWEEP_SECONDS,
+                 retry_max_sec: float = KV_RETRY_MAX_SECONDS, close_attempts: int = KV_CLOSE_ATTEMPTS):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.max_batch = max(1, max_batch)
+        self.sweep_sec = sweep_sec
+        self.retry_max_sec = max(_RETRY_MIN_SECONDS, retry_max_sec)
+        self.close_attempts = max(1, close_attempts)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._local = threading.local()
+        self._writer = self._connect(check_same_thread=False)
+        self._writer.execute("CREATE TABLE IF NOT EXISTS kv (k TEXT PRIMARY KEY, v TEXT NOT NULL, exp REAL) WITHOUT ROWID")
+        self._writer.execute("CREATE INDEX IF NOT EXISTS ix_kv_exp ON kv (exp) WHERE exp IS NOT NULL")
+        self._writer.commit()
+        # key -> (json value | _DELETED, exp); values not yet committed
+        self._pending: dict[str, tuple[Any, Optional[float]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._waiters: list[asyncio.Future] = []
+        self._swept = time.time()
+        self.flushes = 0
+        self.written = 0
+        self.failures = 0
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _exp(self, ttl: Optional[float]) -> Optional[float]:
+        ttl = self.default_ttl if ttl is None else ttl
+        return time.time() + ttl if ttl and ttl > 0 else None
+
+    # ---- reads ----
+    def _pending_value(self, key: str, now: float) -> tuple[bool, Any]:
+        """(found, value) from the pending map; found=True with None for a pending delete or expiry."""
+        item = self._pending.get(key)
+        if item is None:
+            return False, None
+        raw, exp = item
+        if raw is _DELETED or (exp is not None and exp <= now):
+            return True, None
+        return True, json.loads(raw)
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        found, value = self._pending_value(key, now)
+        if found:
+            return default if value is None else value
+        row = self._reader().execute("SELECT v FROM kv WHERE k = ? AND (exp IS NULL OR exp > ?)", (key, now)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    async def mget(self, keys: Iterable[str]) -> dict[str, Any]:
+        """Values of the keys that are present (missing and expired keys are left out)."""
+        now = time.time()
+        out: dict[str, Any] = {}
+        misses: list[str] = []
+        for k in keys:
+            found, value = self._pending_value(k, now)
+            if not found:
+                misses.append(k)
+            elif value is not None:
+                out[k] = value
+        conn = self._reader()
+        for i in range(0, len(misses), _IN_CHUNK):
+            chunk = misses[i:i + _IN_CHUNK]
+            rows = conn.execute(f"SELECT k, v FROM kv WHERE k IN ({','.join('?' * len(chunk))}) "
+                                "AND (exp IS NULL OR exp > ?)", (*chunk, now)).fetchall()
+            out.update((k, json.loads(v)) for k, v in rows)
+        return out
+
+    # ---- writes ----
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None, durable: bool = False) -> None:
+        self._pending[key] = (json.dumps(value, separators=(",", ":"), ensure_ascii=False), self._exp(ttl))
+        await self._schedule(durable)
+
+    async def mset(self, items: Mapping[str, Any], ttl: Optional[float] = None, durable: bool = False) -> None:
+        exp = self._exp(ttl)
+        for k, v in items.items():
+            self._pending[k] = (json.dumps(v, separators=(",", ":"), ensure_ascii=False), exp)
+        await self._schedule(durable)
+
+    async def delete(self, key: str, durable: bool = False) -> None:
+        self._pending[key] = (_DELETED, None)
+        await self._schedule(durable)
+
+    async def flush(self) -> None:
+        """Return once everything written so far is committed."""
+        await self._schedule(True)
+
+    async def close(self) -> None:
+        """Flush, retrying failed commits; raises (and drops the pending writes) once the attempts run out."""
+        for attempt in range(1, self.close_attempts + 1):
+            try:
+                await self.flush()
+                break
+            except Exception:
+                if attempt == self.close_attempts:
+                    log.error("kv store closing with %d uncommitted keys after %d attempts",
+                              len(self._pending), attempt)
+                    if self._task is not None:
+                        self._task.cancel()
+                    raise
+        if self._task is not None:
+            await self._task
+
+    async def _schedule(self, wait: bool) -> None:
+        fut = None
+        if wait:
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="kv-write-behind")
+        if fut is not None:
+            await fut
+
+    async def _run(self) -> None:
+        delay = 0.0
+        while self._pending or self._waiters:
+            keys = list(self._pending)[:self.max_batch]
+            batch = [(k, *self._pending[k]) for k in keys]
+            waiters = self._waiters if len(keys) == len(self._pending) else []
+            if waiters:
+                self._waiters = []
+            try:
+                if batch:
+                    await asyncio.to_thread(self._commit, batch)
+            except Exception as e:
+                self.failures += 1
+                delay = min(max(delay * 2, _RETRY_MIN_SECONDS), self.retry_max_sec)
+                log.exception("kv write-behind flush of %d keys failed; retrying in %.2fs", len(batch), delay)
+                for fut in waiters + self._waiters:
+                    if not fut.done():
+                        fut.set_exception(e)
+                self._waiters = []
+                # the writes stay pending; commit them (and whatever arrives meanwhile) after a backoff
+                await asyncio.sleep(delay)
+                continue
+            delay = 0.0
+            for k, raw, exp in batch:
+                # drop from pending unless it was overwritten while the commit ran
+                if self._pending.get(k) == (raw, exp):
+                    del self._pending[k]
+            self.flushes += bool(batch)
+            self.written += len(batch)
+            for fut in waiters:
+                if not fut.done():
+                    fut.set_result(None)
+
+    def _commit(self, batch: list[tuple[str, Any, Optional[float]]]) -> None:
+        now = time.time()
+        c = self._writer
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            c.executemany("INSERT OR REPLACE INTO kv (k, v, exp) VALUES (?, ?, ?)",
+                          [(k, raw, exp) for k, raw, exp in batch if raw is not _DELETED])
+            c.executemany("DELETE FROM kv WHERE k = ?", [(k,) for k, raw, _ in batch if raw is _DELETED])
+            if now - self._swept >= self.sweep_sec:
+                c.execute("DELETE FROM kv WHERE exp IS NOT NULL AND exp <= ?", (now,))
+                self._swept = now
+            c.execute("COMMIT")
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> dict:
+        return {"path": self.path, "pending": len(self._pending), "flushes": self.flushes, "written": self.written,
+                "failures": self.failures, "avg_batch": self.written / self.flushes if self.flushes else 0.0}
+
+@lru_cache(maxsize=1)
+def default_kv() -> KVStore:
+    return KVStore()
+
+async def close_default_kv() -> None:
+    """Flush the shared store's pending writes, if it was ever opened."""
+    if default_kv.cache_info().currsize:
+        await default_kv().close()
@@ -0,0 +1,266 @@
+# src/memory/semantic.py
+"""
+Semantic memory of past incidents: near-duplicate goals reuse a decision.
+
+Each clean turn (no guard, policy or sanitizer hits) stores its goal from
+planner.decompose with the FinalDecision. Goals are embedded as MinHash
+signatures over word 3-shingles of the casefolded text with indicators
+masked to their kind (`<ipv4>`, `<domain>`, ...) and numbers to `<n>`, so a
+recurring scan campaign from a new source address still reads as the same
+incident. LSH banding (SEMANTIC_BANDS bands of rows) finds candidates in a
+few dict probes; the estimated Jaccard similarity must reach
+SEMANTIC_THRESHOLD.
+
+Entries are scoped to the owner of the turn: buckets are keyed by owner,
+so one user's incidents are never candidates for another's. Goals are
+stored redacted (PII_REDACTION) and never leave the store; a recall's
+provenance is only the memory id and similarity.
+
+A match is only reused while it is still valid:
+  - younger than SEMANTIC_TTL_SECONDS
+  - decided under the tool policy that is loaded now
+  - same intel verdicts: the goal's indicator kinds and whether each is
+    known bad in the indicator index, so a newly listed IOC re-runs the agents
+
+Entries persist in SQLite (WAL) when SEMANTIC_MEMORY_PATH is set (under
+DATA_DIR by default). Every
+worker keeps the signatures in memory and picks up rows other workers
+added at most SEMANTIC_SYNC_SECONDS later.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from src.config.settings import DATA_DIR
+from src.intel.normalizers import default_index, extract_iocs
+from src.llm.guards.pii_redaction import PII_REDACTION, redact
+from src.utils.schema import FinalDecision
+
+SEMANTIC_MEMORY_PATH = os.getenv("SEMANTIC_MEMORY_PATH", os.path.join(DATA_DIR, "memory", "semantic.sqlite"))
+SEMANTIC_FASTPATH = os.getenv("SEMANTIC_FASTPATH", "1") not in {"0", "false", "off", ""}
+SEMANTIC_THRESHOLD = float(os.getenv("SEMANTIC_THRESHOLD", "0.8"))
+SEMANTIC_TTL_SECONDS = float(os.getenv("SEMANTIC_TTL_SECONDS", "86400"))
+SEMANTIC_MAX_ENTRIES = int(os.getenv("SEMANTIC_MAX_ENTRIES", "100000"))
+SEMANTIC_SYNC_SECONDS = float(os.getenv("SEMANTIC_SYNC_SECONDS", "1"))
+SEMANTIC_BANDS = int(os.getenv("SEMANTIC_BANDS", "16"))
+SEMANTIC_ROWS = int(os.getenv("SEMANTIC_ROWS", "4"))
+
+_PRIME = np.uint64(4294967311)  # > 2**32, so (a * x) never wraps for 32-bit a, x
+_WORD = re.compile(r"<\w+>|\w+")
+_NUMBER = re.compile(r"\d+")
+
+@lru_cache(maxsize=4)
+def _perms(n: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0x5E3A)
+    return (rng.integers(1, 2**32, n, dtype=np.uint64), rng.integers(0, 2**32, n, dtype=np.uint64))
+
+def mask(goal: str) -> str:
+    """
+    Casefolded goal with each indicator replaced by its kind and other
+    numbers (counts, ports, host suffixes) by <n>. CVE ids stay literal: a
+    different vulnerability is a different incident.
+    """
+    out, pos = [], 0
+    for ioc in extract_iocs(goal, unique=False):
+        out.append(_NUMBER.sub("<n>", goal[pos:ioc.start]))
+        out.append(f" {ioc.value.replace('-', '_')} " if ioc.kind == "cve" else f" <{ioc.kind}> ")
+        pos = ioc.end
+    out.append(_NUMBER.sub("<n>", goal[pos:]))
+    return "".join(out).casefold()
+
+def shingles(text: str, k: int = 3) -> set[str]:
+    words = _WORD.findall(text)
+    if len(words) < k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+def minhash(items: set[str], n: int) -> np.ndarray:
+    if not items:
+        return np.zeros(n, dtype=np.uint32)
+    a, b = _perms(n)
+    xs = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in items), dtype=np.uint64, count=len(items))
+    return ((((a[:, None] * xs[None, :]) % _PRIME + b[:, None]) % _PRIME).min(axis=1)).astype(np.uint32)
+
+def intel_verdicts(goal: str) -> list[str]:
+    """Distinct (kind, known bad) pairs for the goal's indicators."""
+    index = default_index()
+    return sorted({f"{i.kind}:{int(index.lookup(i.value) is not None)}" for i in extract_iocs(goal)})
+
+@dataclass
+class Entry:
+    id: int
+    owner: str
+    goal: str  # redacted
+    sig: np.ndarray
+    decision: dict
+    intel: list[str]
+    policy: str
+    created: float
+
+@dataclass
+class Recall:
+    entry: Entry
+    similarity: float
+
+    @property
+    def decision(self) -> FinalDecision:
+        return FinalDecision(**self.entry.decision)
+
+    def provenance(self) -> dict:
+        return {"source": "semantic_memory", "memory_id": self.entry.id, "similarity": round(self.similarity, 3)}
+
+class _SqliteTier:
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._conn() as c:
+            c.execute("CREATE TABLE IF NOT EXISTS semantic_memory (id INTEGER PRIMARY KEY, goal TEXT NOT NULL, "
+                      "sig BLOB NOT NULL, decision TEXT NOT NULL, intel TEXT NOT NULL, policy TEXT NOT NULL, "
+                      "created REAL NOT NULL, owner TEXT NOT NULL DEFAULT '')")
+            if "owner" not in {r[1] for r in c.execute("PRAGMA table_info(semantic_memory)")}:
+                # files from before owner scoping: their rows match no owner and age out
+                c.execute("ALTER TABLE semantic_memory ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def since(self, last_id: int, not_before: float) -> list[Entry]:
+        rows = self._conn().execute(
+            "SELECT id, owner, goal, sig, decision, intel, policy, created FROM semantic_memory "
+            "WHERE id > ? AND created >= ? AND owner != '' ORDER BY id", (last_id, not_before)).fetchall()
+        return [Entry(r[0], r[1], r[2], np.frombuffer(r[3], dtype=np.uint32), json.loads(r[4]), json.loads(r[5]),
+                      r[6], r[7]) for r in rows]
+
+    def insert(self, e: Entry, expire_before: float) -> int:
+        with self._conn() as c:
+            cur = c.execute("INSERT INTO semantic_memory (owner, goal, sig, decision, intel, policy, created) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (e.owner, e.goal, e.sig.tobytes(), json.dumps(e.decision), json.dumps(e.intel), e.policy,
+                             e.created))
+            c.execute("DELETE FROM semantic_memory WHERE created < ?", (expire_before,))
+            return cur.lastrowid
+
+class SemanticMemory:
+    def __init__(self, path: str = SEMANTIC_MEMORY_PATH, threshold: float = SEMANTIC_THRESHOLD,
+                 ttl_sec: float = SEMANTIC_TTL_SECONDS, max_entries: int = SEMANTIC_MAX_ENTRIES,
+                 bands: int = SEMANTIC_BANDS, rows: int = SEMANTIC_ROWS, sync_sec: float = SEMANTIC_SYNC_SECONDS):
+        self.threshold = threshold
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.bands, self.rows = bands, rows
+        self.sync_sec = sync_sec
+        self._entries: dict[int, Entry] = {}  # insertion order, roughly oldest first
+        self._buckets: dict[tuple[str, int, bytes], list[int]] = {}  # (owner, band, rows) -> ids
+        self._last_id = 0
+        self._local_id = 0  # negative ids for entries when there is no disk tier
+        self._synced = 0.0
+        self._disk = _SqliteTier(path) if path else None
+        self.hits = self.misses = self.stored = 0
+
+    def signature(self, goal: str) -> np.ndarray:
+        return minhash(shingles(mask(goal)), self.bands * self.rows)
+
+    def _bands(self, owner: str, sig: np.ndarray) -> list[tuple[str, int, bytes]]:
+        r = self.rows
+        return [(owner, i, sig[i * r:(i + 1) * r].tobytes()) for i in range(self.bands)]
+
+    def _add(self, e: Entry) -> None:
+        if e.id in self._entries:
+            return
+        self._entries[e.id] = e
+        for key in self._bands(e.owner, e.sig):
+            self._buckets.setdefault(key, []).append(e.id)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, entry_id: int) -> None:
+        e = self._entries.pop(entry_id)
+        for key in self._bands(e.owner, e.sig):
+            ids = self._buckets.get(key)
+            if ids is not None:
+                ids.remove(entry_id)
+                if not ids:
+                    del self._buckets[key]
+
+    async def _sync(self) -> None:
+        """Expire old entries and pick up rows other workers stored since the last sync."""
+        now = time.monotonic()
+        if now - self._synced < self.sync_sec:
+            return
+        cutoff = time.time() - self.ttl_sec
+        while self._entries and next(iter(self._entries.values())).created < cutoff:
+            self._drop(next(iter(self._entries)))
+        if self._disk is None:
+            self._synced = now
+            return
+        self._synced = now
+        for e in await asyncio.to_thread(self._disk.since, self._last_id, time.time() - self.ttl_sec):
+            self._add(e)
+            self._last_id = max(self._last_id, e.id)
+
+    def _best(self, owner: str, sig: np.ndarray) -> Optional[Recall]:
+        candidates = {i for key in self._bands(owner, sig) for i in self._buckets.get(key, ())}
+        best: Optional[Recall] = None
+        for i in candidates:
+            e = self._entries[i]
+            sim = float(np.count_nonzero(e.sig == sig)) / len(sig)
+            if sim >= self.threshold and (best is None or (sim, e.created) > (best.similarity, best.entry.created)):
+                best = Recall(e, sim)
+        return best
+
+    def _valid(self, e: Entry, policy: str, intel: list[str]) -> bool:
+        return time.time() - e.created <= self.ttl_sec and e.policy == policy and e.intel == intel
+
+    async def recall(self, goal: str, policy: str, owner: str) -> Optional[Recall]:
+        """A still-valid decision for a near-duplicate of one of `owner`'s earlier goals, if one is remembered."""
+        if not owner:
+            return None
+        await self._sync()
+        sig = self.signature(goal)
+        hit = self._best(owner, sig) if sig.any() else None
+        if hit is None or not self._valid(hit.entry, policy, intel_verdicts(goal)):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return hit
+
+    async def remember(self, goal: str, decision: FinalDecision, policy: str, owner: str) -> None:
+        sig = self.signature(goal)
+        if not owner or not sig.any():
+            return
+        e = Entry(0, owner, redact(goal) if PII_REDACTION else goal, sig, decision.model_dump(),
+                  intel_verdicts(goal), policy, time.time())
+        if self._disk is not None:
+            e.id = await asyncio.to_thread(self._disk.insert, e, e.created - self.ttl_sec)
+        else:
+            self._local_id -= 1
+            e.id = self._local_id
+        self._add(e)
+        self.stored += 1
+
+    def stats(self) -> dict:
+        looked = self.hits + self.misses
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "stored": self.stored,
+                "hit_ratio": self.hits / looked if looked else 0.0}
+
+@lru_cache(maxsize=1)
+def default_semantic_memory() -> SemanticMemory:
+    return SemanticMemory()
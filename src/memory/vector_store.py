@@ -0,0 +1,491 @@
+# src/memory/vector_store.py
+"""
+Memory-mapped IVF vector store with incremental adds, tombstone deletes and
+background compaction.
+
+Layout under `path`:
+  info.json                {dim, quant}
+  items.sqlite             id <-> key (chunk_id) + JSON metadata
+  CURRENT                  name of the live generation (swapped atomically)
+  gen-N/                   immutable IVF segment: centroids, per-list offsets,
+                           list-sorted vectors (float16 or int8 + scales), ids
+  gen-N/delta.*            append-only rows added since gen-N was built (brute-forced)
+  gen-N/tomb.i64           append-only deleted ids (filtered at query time)
+
+Searches probe the `nprobe` nearest lists of the segment plus the whole
+delta. Compaction folds delta rows in and drops tombstoned rows into gen-N+1
+on a background thread, then flips CURRENT. All large files are opened with
+np.memmap(mode="r"), so any number of uvicorn workers can open the same
+store read-only and share one copy through the page cache; readers notice a
+new generation on their next query. There is one writer process at a time
+(guarded by a flock).
+"""
+from __future__ import annotations
+import fcntl
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from src.rag.index import ivf
+
+VECTOR_NPROBE = int(os.getenv("VECTOR_NPROBE", "16"))
+VECTOR_COMPACT_MIN_DELTA = int(os.getenv("VECTOR_COMPACT_MIN_DELTA", "50000"))
+# a pre-filter mask allowing at most this many ids is scored exactly instead of via IVF probes
+VECTOR_PREFILTER_EXACT_MAX = int(os.getenv("VECTOR_PREFILTER_EXACT_MAX", "50000"))
+
+@dataclass
+class Hit:
+    key: str
+    score: float
+    id: int
+    meta: Optional[dict] = None
+
+class _Appendable:
+    """Append-only fixed-width array file; readers re-map when it grows."""
+
+    def __init__(self, path: Path, dtype, width: int = 1):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.width = width
+        self.row_bytes = self.dtype.itemsize * width
+        self._rows = -1
+        self._view: np.ndarray = np.zeros((0, width) if width > 1 else 0, dtype=self.dtype)
+
+    def rows(self) -> int:
+        try:
+            return self.path.stat().st_size // self.row_bytes
+        except FileNotFoundError:
+            return 0
+
+    def view(self) -> np.ndarray:
+        rows = self.rows()
+        if rows != self._rows:
+            shape = (rows, self.width) if self.width > 1 else (rows,)
+            self._view = (np.memmap(self.path, dtype=self.dtype, mode="r", shape=shape) if rows
+                          else np.zeros(shape, dtype=self.dtype))
+            self._rows = rows
+        return self._view
+
+    def append(self, arr: np.ndarray, sync: bool = False) -> None:
+        with open(self.path, "ab") as f:
+            f.write(np.ascontiguousarray(arr, dtype=self.dtype).tobytes())
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+
+class _Generation:
+    def __init__(self, gdir: Path, dim: int, quant: str):
+        self.dir = gdir
+        info = json.loads((gdir / "info.json").read_text())
+        self.n = int(info["n"])
+        self.nlist = int(info["nlist"])
+        self.trained_on = int(info.get("trained_on", 0))
+        dtype = ivf.storage_dtype(quant)
+        if self.n:
+            self.vectors = np.memmap(gdir / "vectors.bin", dtype=dtype, mode="r", shape=(self.n, dim))
+            self.ids = np.memmap(gdir / "ids.i64", dtype=np.int64, mode="r", shape=(self.n,))
+            self.scales = (np.memmap(gdir / "scales.f32", dtype=np.float32, mode="r", shape=(self.n,))
+                           if quant == "int8" else None)
+        else:
+            self.vectors = np.zeros((0, dim), dtype=dtype)
+            self.ids = np.zeros(0, dtype=np.int64)
+            self.scales = np.zeros(0, dtype=np.float32) if quant == "int8" else None
+        if self.nlist:
+            self.centroids = np.fromfile(gdir / "centroids.f32", dtype=np.float32).reshape(self.nlist, dim)
+            self.offsets = np.fromfile(gdir / "offsets.i64", dtype=np.int64)
+        else:
+            self.centroids = np.zeros((0, dim), dtype=np.float32)
+            self.offsets = np.zeros(1, dtype=np.int64)
+        self.delta_vec = _Appendable(gdir / "delta.vec", dtype, dim)
+        self.delta_ids = _Appendable(gdir / "delta.ids", np.int64)
+        self.delta_scales = _Appendable(gdir / "delta.scales", np.float32) if quant == "int8" else None
+        self.tomb = _Appendable(gdir / "tomb.i64", np.int64)
+        self._pos: Optional[np.ndarray] = None
+
+    def delta(self) -> tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """Consistent (vectors, ids, scales) of the delta; ids are written last."""
+        ids = self.delta_ids.view()
+        vec = self.delta_vec.view()
+        scales = self.delta_scales.view() if self.delta_scales else None
+        n = min(len(ids), len(vec), len(scales) if scales is not None else len(ids))
+        return vec[:n], ids[:n], (scales[:n] if scales is not None else None)
+
+    def positions(self) -> np.ndarray:
+        """id -> row in the main segment (-1 if absent); built lazily for pre-filtered search."""
+        if self._pos is None:
+            pos = np.full(int(self.ids.max()) + 1 if self.n else 0, -1, dtype=np.int64)
+            pos[np.asarray(self.ids)] = np.arange(self.n, dtype=np.int64)
+            self._pos = pos
+        return self._pos
+
+class VectorStore:
+    def __init__(self, path: str | Path, dim: int, *, quant: str = "f16", readonly: bool = False,
+                 nprobe: int = VECTOR_NPROBE, compact_min_delta: int = VECTOR_COMPACT_MIN_DELTA,
+                 auto_compact: bool = True):
+        self.path = Path(path)
+        self.readonly = readonly
+        self.nprobe = nprobe
+        self.compact_min_delta = compact_min_delta
+        self.auto_compact = auto_compact and not readonly
+        self._lock = threading.RLock()
+        self._compactor: Optional[threading.Thread] = None
+        self._lockfile = None
+
+        if readonly and not (self.path / "CURRENT").exists():
+            raise FileNotFoundError(f"no vector store at {self.path}")
+        self.path.mkdir(parents=True, exist_ok=True)
+        if not readonly:
+            self._lockfile = open(self.path / "LOCK", "w")
+            try:
+                fcntl.flock(self._lockfile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise RuntimeError(f"another process is writing {self.path}; open it readonly=True")
+
+        info_p = self.path / "info.json"
+        if info_p.exists():
+            info = json.loads(info_p.read_text())
+            if info["dim"] != dim:
+                raise ValueError(f"store at {self.path} has dim {info['dim']}, not {dim}")
+            quant = info["quant"]
+        elif not readonly:
+            info_p.write_text(json.dumps({"dim": dim, "quant": quant}))
+        if quant not in ("f16", "int8"):
+            raise ValueError(f"unknown quantization {quant!r}")
+        self.dim = dim
+        self.quant = quant
+
+        self.db = sqlite3.connect(self.path / "items.sqlite", check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        if not readonly:
+            self.db.execute("CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                            "key TEXT UNIQUE NOT NULL, meta TEXT)")
+            if not (self.path / "CURRENT").exists():
+                self._write_generation(0, None, np.zeros(0, np.int64), None, None, 0)
+                self._set_current(0)
+        self._current_sig = None
+        self._open_current()
+
+    # ---- generations ----
+    def _gen_dir(self, g: int) -> Path:
+        return self.path / f"gen-{g:06d}"
+
+    def _set_current(self, g: int) -> None:
+        tmp = self.path / "CURRENT.tmp"
+        tmp.write_text(str(g))
+        os.replace(tmp, self.path / "CURRENT")
+
+    def _open_current(self) -> None:
+        cur = self.path / "CURRENT"
+        st = cur.stat()
+        gen_no = int(cur.read_text())
+        gen = _Generation(self._gen_dir(gen_no), self.dim, self.quant)
+        # searches take `self.gen` once and work on that snapshot; the signature goes last
+        self.gen_no, self.gen = gen_no, gen
+        self._current_sig = (st.st_ino, st.st_mtime_ns)
+
+    def _refresh(self) -> None:
+        """Pick up a newer generation; only the swap is serialized, searches run concurrently."""
+        st = (self.path / "CURRENT").stat()
+        if (st.st_ino, st.st_mtime_ns) != self._current_sig:
+            with self._lock:
+                st = (self.path / "CURRENT").stat()
+                if (st.st_ino, st.st_mtime_ns) != self._current_sig:
+                    self._open_current()
+
+    def _write_generation(self, g: int, centroids: Optional[np.ndarray], ids: np.ndarray,
+                          vectors: Optional[np.ndarray], scales: Optional[np.ndarray], trained_on: int,
+                          offsets: Optional[np.ndarray] = None) -> None:
+        final = self._gen_dir(g)
+        tmp = final.with_name(final.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        nlist = 0 if centroids is None else len(centroids)
+        if len(ids):
+            vectors.tofile(tmp / "vectors.bin")
+            ids.astype(np.int64).tofile(tmp / "ids.i64")
+            if scales is not None:
+                scales.astype(np.float32).tofile(tmp / "scales.f32")
+        if nlist:
+            centroids.astype(np.float32).tofile(tmp / "centroids.f32")
+            offsets.astype(np.int64).tofile(tmp / "offsets.i64")
+        (tmp / "info.json").write_text(json.dumps({"n": int(len(ids)), "nlist": nlist, "trained_on": trained_on}))
+        os.replace(tmp, final)
+
+    # ---- writes ----
+    def _check_writable(self) -> None:
+        if self.readonly:
+            raise RuntimeError("vector store opened readonly")
+
+    def add(self, keys: Sequence[str], vectors, metas: Optional[Sequence[Optional[dict]]] = None) -> list[int]:
+        """Upsert vectors by key; a re-added key tombstones its previous row."""
+        self._check_writable()
+        x = ivf.normalize(np.asarray(vectors, dtype=np.float32).reshape(len(keys), self.dim))
+        rows, scales = ivf.encode(x, self.quant)
+        metas = metas or [None] * len(keys)
+        with self._lock:
+            new_ids, dead = [], []
+            with self.db:
+                for key, meta in zip(keys, metas):
+                    old = self.db.execute("SELECT id FROM items WHERE key = ?", (key,)).fetchone()
+                    if old:
+                        dead.append(old[0])
+                        self.db.execute("DELETE FROM items WHERE id = ?", (old[0],))
+                    cur = self.db.execute("INSERT INTO items (key, meta) VALUES (?, ?)",
+                                          (key, json.dumps(meta) if meta is not None else None))
+                    new_ids.append(cur.lastrowid)
+            g = self.gen
+            g.delta_vec.append(rows)
+            if g.delta_scales is not None:
+                g.delta_scales.append(scales)
+            g.delta_ids.append(np.asarray(new_ids, dtype=np.int64))  # last: makes the rows visible
+            if dead:
+                g.tomb.append(np.asarray(dead, dtype=np.int64))
+            delta_rows = g.delta_ids.rows()
+        if self.auto_compact and delta_rows >= max(self.compact_min_delta, g.n // 10):
+            self.compact(wait=False)
+        return new_ids
+
+    def delete(self, keys: Sequence[str]) -> int:
+        self._check_writable()
+        with self._lock:
+            with self.db:
+                ids = [r[0] for k in keys
+                       for r in self.db.execute("SELECT id FROM items WHERE key = ?", (k,)).fetchall()]
+                self.db.executemany("DELETE FROM items WHERE id = ?", [(i,) for i in ids])
+            if ids:
+                self.gen.tomb.append(np.asarray(ids, dtype=np.int64))
+        return len(ids)
+
+    # ---- reads ----
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def ids_for(self, keys: Sequence[str]) -> dict[str, int]:
+        out: dict[str, int] = {}
+        keys = list(keys)
+        for i in range(0, len(keys), 900):
+            part = keys[i:i + 900]
+            q = f"SELECT key, id FROM items WHERE key IN ({','.join('?' * len(part))})"
+            out.update(self.db.execute(q, part).fetchall())
+        return out
+
+    def max_id(self) -> int:
+        return self.db.execute("SELECT COALESCE(MAX(id), 0) FROM items").fetchone()[0]
+
+    def lookup(self, ids: list[int]) -> dict[int, tuple[str, Optional[dict]]]:
+        out: dict[int, tuple[str, Optional[dict]]] = {}
+        for i in range(0, len(ids), 900):
+            part = ids[i:i + 900]
+            q = f"SELECT id, key, meta FROM items WHERE id IN ({','.join('?' * len(part))})"
+            for id_, key, meta in self.db.execute(q, part):
+                out[id_] = (key, json.loads(meta) if meta else None)
+        return out
+
+    def iter_items(self, after_id: int = 0, batch: int = 10_000):
+        """Live (id, key, meta) rows with id > after_id, in id order (for derived indexes)."""
+        while True:
+            rows = self.db.execute("SELECT id, key, meta FROM items WHERE id > ? ORDER BY id LIMIT ?",
+                                   (after_id, batch)).fetchall()
+            if not rows:
+                return
+            yield [(id_, key, json.loads(meta) if meta else None) for id_, key, meta in rows]
+            after_id = rows[-1][0]
+
+    def search(self, query, k: int = 10, *, mask: Optional[np.ndarray] = None,
+               nprobe: Optional[int] = None, with_meta: bool = True) -> list[Hit]:
+        """
+        Top-k by cosine similarity. `mask` is an optional boolean pre-filter
+        indexed by item id (see ids_for/max_id); selective masks are scored
+        exactly, broad ones restrict the IVF candidates.
+        """
+        self._refresh()
+        q = ivf.normalize(np.asarray(query, dtype=np.float32).reshape(self.dim))
+        g = self.gen
+        dvec, dids, dscales = g.delta()
+        nprobe = nprobe or self.nprobe
+
+        if mask is not None and int(mask.sum()) <= VECTOR_PREFILTER_EXACT_MAX:
+            ids, sc = self._score_masked(g, q, mask, dvec, dids, dscales)
+        else:
+            ids, sc = self._score_probed(g, q, nprobe, dvec, dids, dscales)
+            if mask is not None:
+                inside = ids < len(mask)
+                keep = np.zeros(len(ids), dtype=bool)
+                keep[inside] = mask[ids[inside]]
+                ids, sc = ids[keep], sc[keep]
+
+        tomb = g.tomb.view()
+        if len(tomb) and len(ids):
+            alive = ~np.isin(ids, tomb)
+            ids, sc = ids[alive], sc[alive]
+        if not len(ids):
+            return []
+        top = np.argpartition(-sc, min(k, len(sc)) - 1)[:k] if len(sc) > k else np.arange(len(sc))
+        top = top[np.argsort(-sc[top])]
+        found = self.lookup([int(i) for i in ids[top]])
+        hits = []
+        for i in top:
+            entry = found.get(int(ids[i]))
+            if entry is None:  # deleted after the segment was read
+                continue
+            hits.append(Hit(entry[0], float(sc[i]), int(ids[i]), entry[1] if with_meta else None))
+        return hits
+
+    def _score_probed(self, g: _Generation, q, nprobe, dvec, dids, dscales):
+        parts_ids, parts_sc = [], []
+        if g.n:
+            if g.nlist:
+                probe = np.argpartition(-(g.centroids @ q), min(nprobe, g.nlist) - 1)[:nprobe]
+                ranges = [(int(g.offsets[c]), int(g.offsets[c + 1])) for c in np.sort(probe)]
+                ranges = [(a, b) for a, b in ranges if b > a]
+            else:
+                ranges = [(0, g.n)]
+            for a, b in ranges:
+                parts_sc.append(ivf.scores(g.vectors[a:b], g.scales[a:b] if g.scales is not None else None, q))
+                parts_ids.append(np.asarray(g.ids[a:b]))
+        if len(dids):
+            parts_sc.append(ivf.scores(dvec, dscales, q))
+            parts_ids.append(np.asarray(dids))
+        if not parts_ids:
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+        return np.concatenate(parts_ids), np.concatenate(parts_sc)
+
+    def _score_masked(self, g: _Generation, q, mask, dvec, dids, dscales):
+        allowed = np.flatnonzero(mask)
+        parts_ids, parts_sc = [], []
+        if g.n and len(allowed):
+            pos = g.positions()
+            rows = pos[allowed[allowed < len(pos)]]
+            rows = np.sort(rows[rows >= 0])
+            if len(rows):
+                parts_sc.append(ivf.scores(g.vectors[rows], g.scales[rows] if g.scales is not None else None, q))
+                parts_ids.append(np.asarray(g.ids[rows]))
+        if len(dids):
+            inside = dids < len(mask)
+            sel = np.zeros(len(dids), dtype=bool)
+            sel[inside] = mask[dids[inside]]
+            if sel.any():
+                parts_sc.append(ivf.scores(dvec[sel], dscales[sel] if dscales is not None else None, q))
+                parts_ids.append(np.asarray(dids[sel]))
+        if not parts_ids:
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+        return np.concatenate(parts_ids), np.concatenate(parts_sc)
+
+    # ---- compaction ----
+    def compact(self, wait: bool = True) -> None:
+        """Fold delta rows and tombstones into a new IVF generation (background unless wait)."""
+        self._check_writable()
+        with self._lock:
+            if self._compactor is None or not self._compactor.is_alive():
+                self._compactor = threading.Thread(target=self._compact, name="vector-compact", daemon=True)
+                self._compactor.start()
+            t = self._compactor
+        if wait:
+            t.join()
+
+    def _compact(self) -> None:
+        with self._lock:
+            g = self.gen
+            dvec, dids, dscales = g.delta()
+            n_delta = len(dids)
+            tomb = np.array(g.tomb.view())
+            n_tomb = len(tomb)
+            if not n_delta and not n_tomb:
+                return
+
+        # combined row space: [0, g.n) main segment, [g.n, g.n + n_delta) delta
+        all_ids = np.concatenate([np.asarray(g.ids), np.asarray(dids)])
+        live = np.flatnonzero(~np.isin(all_ids, tomb)) if n_tomb else np.arange(len(all_ids))
+
+        def rows_at(idx: np.ndarray) -> tuple[np.ndarray, Optional[np.ndarray]]:
+            in_main = idx < g.n
+            vec = np.empty((len(idx), self.dim), dtype=g.vectors.dtype)
+            vec[in_main], vec[~in_main] = g.vectors[idx[in_main]], dvec[idx[~in_main] - g.n]
+            if g.scales is None:
+                return vec, None
+            sc = np.empty(len(idx), dtype=np.float32)
+            sc[in_main], sc[~in_main] = g.scales[idx[in_main]], dscales[idx[~in_main] - g.n]
+            return vec, sc
+
+        def decode(idx: np.ndarray) -> np.ndarray:
+            vec, sc = rows_at(idx)
+            x = vec.astype(np.float32)
+            return x * sc[:, None] if sc is not None else x
+
+        n_live = len(live)
+        nlist = ivf.choose_nlist(n_live)
+        centroids, trained_on = None, 0
+        if nlist:
+            if g.nlist and n_live <= 4 * max(g.trained_on, 1):
+                centroids, trained_on = g.centroids, g.trained_on  # still representative; skip retraining
+            else:
+                rng = np.random.default_rng(0)
+                sample = np.sort(rng.choice(live, size=min(n_live, 32 * nlist), replace=False))
+                centroids, trained_on = ivf.train_kmeans(decode(sample), nlist), n_live
+            labels = np.empty(n_live, dtype=np.int32)
+            for i in range(0, n_live, 65536):
+                labels[i:i + 65536] = ivf.assign(decode(live[i:i + 65536]), centroids)
+            order = live[np.argsort(labels, kind="stable")]
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=len(centroids)))])
+        else:
+            order, offsets = live, None
+
+        vec_parts, sc_parts = [], []
+        for i in range(0, n_live, 65536):
+            v, s = rows_at(order[i:i + 65536])
+            vec_parts.append(v)
+            if s is not None:
+                sc_parts.append(s)
+        dtype = ivf.storage_dtype(self.quant)
+        vectors = np.concatenate(vec_parts) if vec_parts else np.zeros((0, self.dim), dtype)
+        scales = np.concatenate(sc_parts) if sc_parts else None
+        new_g = self.gen_no + 1
+        self._write_generation(new_g, centroids, all_ids[order], vectors, scales, trained_on, offsets)
+
+        with self._lock:
+            # carry rows/tombstones that arrived while we were building
+            nd = self._gen_dir(new_g)
+            tail_vec, tail_ids, tail_sc = g.delta()
+            carry = _Generation(nd, self.dim, self.quant)
+            if len(tail_ids) > n_delta:
+                carry.delta_vec.append(np.asarray(tail_vec[n_delta:]))
+                if tail_sc is not None:
+                    carry.delta_scales.append(np.asarray(tail_sc[n_delta:]))
+                carry.delta_ids.append(np.asarray(tail_ids[n_delta:]))
+            late_tomb = g.tomb.view()[n_tomb:]
+            if len(late_tomb):
+                carry.tomb.append(np.asarray(late_tomb))
+            self._set_current(new_g)
+            self._open_current()
+            # keep the previous generation for readers that have not refreshed yet
+            for old in self.path.glob("gen-*"):
+                if old.is_dir() and old.name < self._gen_dir(new_g - 1).name:
+                    shutil.rmtree(old, ignore_errors=True)
+
+    def stats(self) -> dict:
+        g = self.gen
+        return {
+            "generation": self.gen_no,
+            "segment_rows": g.n,
+            "lists": g.nlist,
+            "delta_rows": g.delta_ids.rows(),
+            "tombstones": g.tomb.rows(),
+            "items": len(self),
+            "quant": self.quant,
+        }
+
+    def close(self) -> None:
+        if self._compactor is not None:
+            self._compactor.join()
+        self.db.close()
+        if self._lockfile is not None:
+            fcntl.flock(self._lockfile, fcntl.LOCK_UN)
+            self._lockfile.close()
+            self._lockfile = None
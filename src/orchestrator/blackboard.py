@@ -1,11 +1,30 @@
-from typing import Any
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
 
 class Blackboard:
     def __init__(self):
         self.store: dict[str, list[dict[str, Any]]] = {}
+        self._lock = threading.Lock()  # agents may run concurrently
+        self._memo: dict[Hashable, asyncio.Future] = {}
 
     def append_observation(self, agent: str, data: dict[str, Any]):
-        self.store.setdefault(agent, []).append(data)
+        with self._lock:
+            self.store.setdefault(agent, []).append(data)
+
+    def get(self, agent: str) -> list[dict[str, Any]]:
+        with self._lock:
+            return list(self.store.get(agent, []))
 
     def get_all(self) -> dict[str, list[dict[str, Any]]]:
         return self.store
+
+    async def amemo(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+        """Per-turn memo: agents asking for the same key share one (possibly in-flight) result."""
+        with self._lock:
+            fut = self._memo.get(key)
+            if fut is None:
+                fut = self._memo[key] = asyncio.ensure_future(compute())
+        return await asyncio.shield(fut)
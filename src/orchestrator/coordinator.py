@@ -1,68 +1,181 @@
-from typing import Literal
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Literal
 from src.utils.schema import ConversationResult, FinalDecision
 from src.orchestrator.blackboard import Blackboard
+from src.orchestrator.scheduler import Phase, run_graph
 from src.orchestrator.trace import make_step
-from src.orchestrator.policies import validate_tool_request
+from src.orchestrator.policies import engine as policy_engine, validate_tool_requests
+from src.llm.guards.jailbreak_filters import screen
+from src.llm.guards.output_sanitizer import sanitize_obj
 from src.agents.attacker import Attacker
 from src.agents.defender import Defender
 from src.agents.decider import Decider
 from src.agents.intel_analyst import IntelAnalyst
 from src.agents.toolsmith import Toolsmith
+from src.memory.semantic import SEMANTIC_FASTPATH, default_semantic_memory
 from src.utils.schema import TraceStep
 
-def run_conversation(messages: list[dict], mode: Literal["assist","simulate"]="assist", game_id: str|None=None) -> dict:
-    """
-    Turn engine v0: one pass of (intel -> attacker -> defender -> toolsmith -> decider).
-    Emits traceable steps you can show in the UI.
-    """
-    bb = Blackboard()
-    steps: list[TraceStep] = []
+# max agent phases running at once within one turn
+MAX_PHASE_CONCURRENCY = int(os.getenv("ORCH_MAX_PHASE_CONCURRENCY", "4"))
 
-    goal = __import__("src.orchestrator.planner", fromlist=["decompose"]).decompose(messages)
+# phase -> phases whose blackboard output it reads
+PHASE_DEPS: dict[str, tuple[str, ...]] = {
+    "intel_analyst": (),
+    "attacker": (),
+    "defender": (),
+    "toolsmith": ("attacker", "defender"),
+    "decider": ("intel_analyst", "attacker", "defender", "toolsmith"),
+}
+PHASE_ORDER = list(PHASE_DEPS)
 
-    # instantiate agents
+def _build_phases(bb: Blackboard, goal: str, guard_hits: list[str]) -> list[Phase[TraceStep]]:
     attacker = Attacker(bb)
     defender = Defender(bb)
     decider  = Decider(bb)
     intel    = IntelAnalyst(bb)
     tools    = Toolsmith(bb)
 
-    # Intel phase
-    rationale = intel.plan(goal)
-    outputs = intel.act()
-    intel.observe(outputs)
-    steps.append(make_step("intel_analyst", rationale, outputs))
-
-    # Attacker hypothesis
-    rationale = attacker.plan(goal)
-    outputs = attacker.act()
-    attacker.observe(outputs)
-    steps.append(make_step("attacker", rationale, outputs))
-
-    # Defender triage
-    rationale = defender.plan(goal)
-    outputs = defender.act()
-    defender.observe(outputs)
-    steps.append(make_step("defender", rationale, outputs))
+    def simple(agent):
+        async def run() -> TraceStep:
+            rationale = await agent.aplan(goal)
+            outputs = await agent.aact()
+            await agent.aobserve(outputs)
+            return make_step(agent.name, rationale, outputs)
+        return run
 
     # Toolsmith proposes tools -> policy check (no execution yet)
-    rationale = tools.plan(goal)
-    tool_outputs = tools.act()
-    hits: list[str] = []
-    for t in tool_outputs.get("tools_requested", []):
-        hits.extend(validate_tool_request(t["name"], t.get("args", {})))
-    steps.append(make_step("toolsmith", rationale, tool_outputs, tool_calls=tool_outputs.get("tools_requested", []), policy_hits=hits))
+    async def toolsmith() -> TraceStep:
+        rationale = await tools.aplan(goal)
+        tool_outputs = await tools.aact()
+        hits = [h for per_tool in validate_tool_requests(tool_outputs.get("tools_requested", [])) for h in per_tool]
+        await tools.aobserve({**tool_outputs, "policy_hits": hits})
+        return make_step("toolsmith", rationale, tool_outputs, tool_calls=tool_outputs.get("tools_requested", []), policy_hits=hits)
 
     # Decider makes a recommendation (later: consider bb, hits, intel credibility)
-    rationale = decider.plan(goal)
-    outputs = decider.act()
-    decider.observe(outputs)
-    steps.append(make_step("decider", rationale, outputs, policy_hits=hits))
+    async def decide() -> TraceStep:
+        hits = guard_hits + [h for obs in bb.get("toolsmith") for h in obs.get("policy_hits", [])]
+        rationale = await decider.aplan(goal)
+        outputs = await decider.aact()
+        await decider.aobserve(outputs)
+        return make_step("decider", rationale, outputs, policy_hits=hits)
+
+    runners = {
+        "intel_analyst": simple(intel),
+        "attacker": simple(attacker),
+        "defender": simple(defender),
+        "toolsmith": toolsmith,
+        "decider": decide,
+    }
+    # agent text leaves the turn sanitized; rewrites show up as policy hits on the step
+    def sanitized(run):
+        async def wrapped() -> TraceStep:
+            step = await run()
+            kinds: list[str] = []
+            step.rationale = sanitize_obj(step.rationale, kinds)
+            step.outputs = sanitize_obj(step.outputs, kinds)
+            if kinds:
+                step.policy_hits = step.policy_hits + sorted({f"output_sanitizer:{k}" for k in kinds})
+            return step
+        return wrapped
+
+    def timed(run):
+        async def wrapped() -> TraceStep:
+            t0 = time.perf_counter()
+            step = await run()
+            step.latency_ms = round((time.perf_counter() - t0) * 1000, 3)
+            return step
+        return wrapped
+
+    return [Phase(name, timed(sanitized(runners[name])), PHASE_DEPS[name]) for name in PHASE_ORDER]
 
-    final = FinalDecision(
+def _final_decision(decision_step: TraceStep) -> FinalDecision:
+    outputs = decision_step.outputs
+    hits = decision_step.policy_hits
+    return FinalDecision(
         summary=outputs.get("decision", "No decision."),
         risk_score=0.6 if not hits else 0.4,  # toy logic
         recommendations=[outputs.get("decision", "Document findings.")]
     )
 
+async def aiter_conversation(messages: list[dict], mode: Literal["assist","simulate"]="assist", game_id: str|None=None,
+                             owner_id: str|None=None) -> AsyncIterator[TraceStep | FinalDecision]:
+    """
+    Turn engine v1 as an async generator: agent phases run over the PHASE_DEPS
+    graph (independent ones concurrently), each TraceStep is yielded as soon as
+    its agent finishes, and the FinalDecision comes last. Only agents marked
+    `blocking` leave the event loop. A goal that matches a block-severity
+    prompt-guard rule never reaches an agent: one `prompt_guard` step
+    records the hits and the turn ends with a refusal. A still-valid decision for a
+    near-duplicate of one of `owner_id`'s incidents in semantic memory
+    short-circuits the agents: one `semantic_memory` step carries its
+    provenance. Without an owner the memory is not used.
+    """
+    bb = Blackboard()
+
+    goal = __import__("src.orchestrator.planner", fromlist=["decompose"]).decompose(messages)
+
+    # jailbreak / injection phrases in the request surface as policy hits on the decision
+    screened = screen(goal)
+    guard_hits = sorted({h.policy_hit for h in screened})
+    # block rules: the text must not reach a prompt, so no agent is scheduled
+    blocked = sorted({h.policy_hit for h in screened if h.severity == "block"})
+    if blocked:
+        step = make_step("prompt_guard", "The request matched blocking prompt-guard rules; no agent ran on it.",
+                         {"blocked": blocked}, policy_hits=guard_hits, confidence=1.0)
+        step.latency_ms = 0.0
+        yield step
+        yield FinalDecision(summary="Request blocked by the prompt guard.", risk_score=0.4,
+                            recommendations=["Restate the incident without instructions aimed at the assistant."])
+        return
+
+    # near-duplicate of a recent clean incident under the same policy: reuse its decision
+    use_memory = SEMANTIC_FASTPATH and owner_id and mode == "assist" and not guard_hits
+    memory = default_semantic_memory() if use_memory else None
+    policy = policy_engine.version() if memory is not None else ""
+    if memory is not None:
+        t0 = time.perf_counter()
+        recall = await memory.recall(goal, policy, owner_id)
+        if recall is not None:
+            step = make_step("semantic_memory", "Near-duplicate of a remembered incident; reusing its decision.",
+                             recall.provenance(), confidence=recall.similarity)
+            step.latency_ms = round((time.perf_counter() - t0) * 1000, 3)
+            yield step
+            yield recall.decision
+            return
+
+    decision_step: TraceStep | None = None
+    clean = True
+    async for name, step in run_graph(_build_phases(bb, goal, guard_hits), max_concurrency=MAX_PHASE_CONCURRENCY):
+        if name == "decider":
+            decision_step = step
+        clean = clean and not step.policy_hits
+        yield step
+
+    final = _final_decision(decision_step)
+    if memory is not None and clean:
+        await memory.remember(goal, final, policy, owner_id)
+    yield final
+
+async def arun_conversation(messages: list[dict], mode: Literal["assist","simulate"]="assist", game_id: str|None=None,
+                            owner_id: str|None=None) -> dict:
+    """
+    Run one full turn and return steps (in declared phase order) plus the final decision.
+    Emits traceable steps you can show in the UI.
+    """
+    steps: list[TraceStep] = []
+    final: FinalDecision | None = None
+    async for item in aiter_conversation(messages, mode, game_id, owner_id):
+        if isinstance(item, FinalDecision):
+            final = item
+        else:
+            steps.append(item)
+    steps.sort(key=lambda s: PHASE_ORDER.index(s.agent) if s.agent in PHASE_ORDER else -1)
+
     return ConversationResult(steps=steps, final=final).model_dump()
+
+def run_conversation(messages: list[dict], mode: Literal["assist","simulate"]="assist", game_id: str|None=None,
+                     owner_id: str|None=None) -> dict:
+    """Sync entry point for scripts/workers; must not be called from a running event loop."""
+    return asyncio.run(arun_conversation(messages, mode, game_id, owner_id))
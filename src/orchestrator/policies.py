@@ -1,14 +1,313 @@
-# simple policy primitives; later read YAML from policies/tool_allowlist.yaml
-ALLOWED_TOOLS = {"nmap": {"allowed_flags": ["-sS", "-sV", "-Pn", "-T4"]}}
+# src/orchestrator/policies.py
+"""
+Tool policy engine compiled from policies/tool_allowlist.yaml.
 
-def validate_tool_request(name: str, args: dict) -> list[str]:
-    hits = []
-    if name not in ALLOWED_TOOLS:
-        hits.append("tool_not_allowed")
+The YAML is compiled once into immutable lookup structures: frozensets of
+bare flags, one anchored regex per value-taking flag, merged integer ranges
+for the target CIDR allow/deny lists (checked with bisect) and a per-tool
+argument schema. Validation then does no parsing of the policy at all.
+
+The engine re-stats the file at most every POLICY_RELOAD_SECONDS and swaps
+in a freshly compiled policy with a single reference assignment, so every
+worker picks up edits without a restart and a request never sees a
+half-built policy. A file that fails to load keeps the previous policy.
+"""
+from __future__ import annotations
+import bisect
+import fnmatch
+import ipaddress
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Mapping, Optional
+
+import yaml
+
+POLICY_PATH = os.getenv("TOOL_POLICY_PATH", os.path.join(os.path.dirname(__file__), "..", "..", "policies",
+                                                         "tool_allowlist.yaml"))
+POLICY_RELOAD_SECONDS = float(os.getenv("POLICY_RELOAD_SECONDS", "2"))
+
+log = logging.getLogger(__name__)
+
+class PolicyError(ValueError):
+    pass
+
+# ---- targets ----
+def _merge(nets: Iterable) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    """Sorted, merged [start, end] integer ranges -> (starts, ends) for bisect."""
+    spans = sorted((int(n.network_address), int(n.broadcast_address)) for n in nets)
+    merged: list[list[int]] = []
+    for a, b in spans:
+        if merged and a <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], b)
+        else:
+            merged.append([a, b])
+    return tuple(a for a, _ in merged), tuple(b for _, b in merged)
+
+def _nets(values: Iterable[str], where: str) -> tuple[list, list]:
+    v4, v6 = [], []
+    for v in values or ():
+        try:
+            net = ipaddress.ip_network(str(v), strict=False)
+        except ValueError as e:
+            raise PolicyError(f"{where}: {e}") from None
+        (v4 if net.version == 4 else v6).append(net)
+    return v4, v6
+
+@dataclass(frozen=True)
+class _Ranges:
+    starts: tuple[int, ...]
+    ends: tuple[int, ...]
+
+    def covers(self, lo: int, hi: int) -> bool:
+        i = bisect.bisect_right(self.starts, lo) - 1
+        return i >= 0 and self.ends[i] >= hi
+
+    def overlaps(self, lo: int, hi: int) -> bool:
+        i = bisect.bisect_right(self.starts, hi) - 1
+        return i >= 0 and self.ends[i] >= lo
+
+_IPV4 = re.compile(r"(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})(?:/(\d{1,2}))?")
+
+def _span(target: str) -> Optional[tuple[int, int, int]]:
+    """(ip version, first, last) address of an IP or CIDR; plain IPv4 skips the ipaddress module."""
+    m = _IPV4.fullmatch(target)
+    if m:
+        a, b, c, d, plen = m.groups()
+        octets = (int(a), int(b), int(c), int(d))
+        plen = 32 if plen is None else int(plen)
+        # leading zeros are ambiguous (octal to some tools): leave them to ipaddress, which rejects them
+        if max(octets) <= 255 and plen <= 32 and not any(len(x) > 1 and x[0] == "0" for x in (a, b, c, d)):
+            ip = octets[0] << 24 | octets[1] << 16 | octets[2] << 8 | octets[3]
+            host = (1 << (32 - plen)) - 1
+            return 4, ip & ~host, ip | host
+    try:
+        net = ipaddress.ip_network(target, strict=False)
+    except ValueError:
+        return None
+    return net.version, int(net.network_address), int(net.broadcast_address)
+
+@dataclass(frozen=True)
+class TargetRule:
+    allow: Mapping[int, _Ranges]   # ip version -> ranges
+    deny: Mapping[int, _Ranges]
+    hostnames: Optional[re.Pattern]
+
+    @classmethod
+    def compile(cls, spec: Mapping[str, Any], where: str) -> "TargetRule":
+        allow4, allow6 = _nets(spec.get("allow"), f"{where}.allow")
+        deny4, deny6 = _nets(spec.get("deny"), f"{where}.deny")
+        globs = [fnmatch.translate(str(h).lower()) for h in spec.get("hostnames") or ()]
+        return cls(
+            allow={4: _Ranges(*_merge(allow4)), 6: _Ranges(*_merge(allow6))},
+            deny={4: _Ranges(*_merge(deny4)), 6: _Ranges(*_merge(deny6))},
+            hostnames=re.compile("|".join(globs)) if globs else None,
+        )
+
+    def check(self, value: str) -> list[str]:
+        hits = []
+        for t in re.split(r"[\s,]+", value.strip()):
+            if not t:
+                continue
+            span = _span(t)
+            if span is None:
+                if not (self.hostnames and self.hostnames.fullmatch(t.lower())):
+                    hits.append(f"target_not_allowed:{t}")
+                continue
+            version, lo, hi = span
+            if self.deny[version].overlaps(lo, hi):
+                hits.append(f"target_denied:{t}")
+            elif not self.allow[version].covers(lo, hi):
+                hits.append(f"target_not_allowed:{t}")
+        if not hits and not value.strip():
+            hits.append("target_missing")
+        return hits
+
+# ---- args ----
+ARG_TYPES = frozenset({"target", "flags", "string", "int", "enum"})
+
+@dataclass(frozen=True)
+class ArgRule:
+    name: str
+    type: str
+    required: bool = False
+    pattern: Optional[re.Pattern] = None
+    choices: frozenset = frozenset()
+
+@dataclass(frozen=True)
+class ToolRule:
+    name: str
+    flags: frozenset[str]
+    value_flags: Mapping[str, re.Pattern]
+    attached: Optional[re.Pattern]          # "-p22"-style flag+value in one token
+    args: Optional[Mapping[str, ArgRule]]   # None: legacy policy, only `scan` is checked
+    required: tuple[str, ...]
+    targets: Optional[TargetRule]
+
+    def check_flags(self, value: str) -> list[str]:
+        hits = []
+        tokens = value.split()
+        i = 0
+        while i < len(tokens):
+            tok = tokens[i]
+            i += 1
+            if tok in self.flags:
+                continue
+            pat = self.value_flags.get(tok)
+            if pat is not None:
+                if i < len(tokens) and pat.fullmatch(tokens[i]):
+                    i += 1
+                else:
+                    hits.append(f"flag_value_invalid:{tok}")
+                continue
+            if tok.startswith("-"):
+                m = self.attached.fullmatch(tok) if self.attached else None
+                if m is None or not self.value_flags[m.group(1)].fullmatch(m.group(2)):
+                    hits.append(f"flag_not_allowed:{tok}")
+            elif self.args is not None:
+                hits.append(f"token_not_allowed:{tok}")  # e.g. an extra target smuggled into the flags
         return hits
-    # simple arg check (expand later)
-    flags = args.get("scan", "")
-    for token in flags.split():
-        if token.startswith("-") and token not in ALLOWED_TOOLS[name]["allowed_flags"]:
-            hits.append(f"flag_not_allowed:{token}")
-    return hits
+
+    def check(self, args: Mapping[str, Any]) -> list[str]:
+        if self.args is None:
+            return self.check_flags(str(args.get("scan", "")))
+        hits = [f"arg_missing:{n}" for n in self.required if n not in args]
+        for name, value in args.items():
+            rule = self.args.get(name)
+            if rule is None:
+                hits.append(f"arg_not_allowed:{name}")
+            elif rule.type == "flags":
+                hits.extend(self.check_flags(str(value)))
+            elif rule.type == "target":
+                hits.extend(self.targets.check(str(value)) if self.targets else [])
+            elif rule.type == "int":
+                if isinstance(value, bool) or not isinstance(value, int) and not str(value).isdigit():
+                    hits.append(f"arg_invalid:{name}")
+            elif rule.type == "enum":
+                if str(value) not in rule.choices:
+                    hits.append(f"arg_invalid:{name}")
+            elif rule.pattern is not None and not rule.pattern.fullmatch(str(value)):
+                hits.append(f"arg_invalid:{name}")
+        return hits
+
+def _compile_tool(name: str, spec: Mapping[str, Any], default_targets: Optional[TargetRule]) -> ToolRule:
+    where = f"tools.{name}"
+    value_flags = {str(f): re.compile(p) for f, p in (spec.get("value_flags") or {}).items()}
+    short = sorted((f for f in value_flags if not f.startswith("--")), key=len, reverse=True)
+    attached = re.compile("(" + "|".join(map(re.escape, short)) + ")(.+)") if short else None
+    args = None
+    if "args" in spec:
+        args = {}
+        for arg, a in (spec["args"] or {}).items():
+            a = a or {}
+            kind = a.get("type", "string")
+            if kind not in ARG_TYPES:
+                raise PolicyError(f"{where}.args.{arg}: unknown type {kind!r}")
+            args[arg] = ArgRule(arg, kind, bool(a.get("required")),
+                                re.compile(a["pattern"]) if a.get("pattern") else None,
+                                frozenset(map(str, a.get("values") or ())))
+    targets = TargetRule.compile(spec["targets"], f"{where}.targets") if "targets" in spec else default_targets
+    return ToolRule(
+        name=name,
+        flags=frozenset(map(str, spec.get("allowed_flags") or ())),
+        value_flags=value_flags,
+        attached=attached,
+        args=args,
+        required=tuple(a for a, r in (args or {}).items() if r.required),
+        targets=targets,
+    )
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    tools: Mapping[str, ToolRule]
+    source: str = ""
+    loaded_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_dict(cls, doc: Mapping[str, Any], source: str = "") -> "CompiledPolicy":
+        if not isinstance(doc, Mapping) or not isinstance(doc.get("tools"), Mapping):
+            raise PolicyError(f"{source or 'policy'}: expected a mapping with a `tools` section")
+        default_targets = TargetRule.compile(doc["targets"], "targets") if doc.get("targets") else None
+        return cls({str(n): _compile_tool(str(n), s or {}, default_targets) for n, s in doc["tools"].items()},
+                   source)
+
+    def validate(self, name: str, args: Mapping[str, Any]) -> list[str]:
+        rule = self.tools.get(name)
+        if rule is None:
+            return ["tool_not_allowed"]
+        return rule.check(args or {})
+
+class PolicyEngine:
+    def __init__(self, path: str = POLICY_PATH, reload_seconds: float = POLICY_RELOAD_SECONDS):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        self._sig: Optional[tuple] = None
+        self._checked = 0.0
+        self._policy: Optional[CompiledPolicy] = None
+        self.reloads = 0
+        self.errors = 0
+
+    def _load(self, sig: tuple) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                policy = CompiledPolicy.from_dict(yaml.safe_load(f), self.path)
+        except (OSError, yaml.YAMLError, PolicyError, re.error) as e:
+            self.errors += 1
+            if self._policy is None:
+                raise
+            log.error("tool policy reload failed, keeping previous policy: %s", e)
+        else:
+            self._policy = policy  # atomic swap; readers hold whichever snapshot they took
+            self.reloads += 1
+        self._sig = sig
+
+    def current(self) -> CompiledPolicy:
+        now = time.monotonic()
+        if self._policy is not None and now - self._checked < self.reload_seconds:
+            return self._policy
+        with self._lock:
+            if self._policy is None or now - self._checked >= self.reload_seconds:
+                try:
+                    st = os.stat(self.path)
+                except OSError as e:  # missing, or caught mid-replace
+                    self.errors += 1
+                    self._checked = now
+                    if self._policy is None:
+                        raise
+                    log.error("tool policy stat failed, keeping previous policy: %s", e)
+                    return self._policy
+                sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+                if sig != self._sig:
+                    self._load(sig)
+                self._checked = now
+        return self._policy
+
+    def version(self) -> str:
+        """Identity of the loaded policy file (mtime, size, inode); the same in every worker."""
+        self.current()
+        return "-".join(map(str, self._sig or ()))
+
+    def validate(self, name: str, args: Mapping[str, Any]) -> list[str]:
+        return self.current().validate(name, args)
+
+    def validate_batch(self, requests: Iterable[Mapping[str, Any]]) -> list[list[str]]:
+        """Hits per request ({"name", "args"}), all checked against one policy snapshot."""
+        policy = self.current()
+        return [policy.validate(r.get("name", ""), r.get("args") or {}) for r in requests]
+
+    def stats(self) -> dict:
+        p = self._policy
+        return {"tools": sorted(p.tools) if p else [], "loaded_at": p.loaded_at if p else None,
+                "reloads": self.reloads, "errors": self.errors}
+
+engine = PolicyEngine()
+
+def validate_tool_request(name: str, args: dict) -> list[str]:
+    return engine.validate(name, args)
+
+def validate_tool_requests(requests: list[dict]) -> list[list[str]]:
+    return engine.validate_batch(requests)
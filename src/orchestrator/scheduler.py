@@ -0,0 +1,81 @@
+# src/orchestrator/scheduler.py
+"""
+Dependency-graph scheduler for agent phases.
+
+Each Phase names the phases it reads from (`after`). Phases whose inputs are
+ready run concurrently as asyncio tasks (bounded by a semaphore); a
+dependent phase starts as soon as its last input completes, before that
+input's result is handed to the consumer. Results are yielded in
+completion order.
+"""
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Generic, Sequence, TypeVar
+
+T = TypeVar("T")
+
+@dataclass(frozen=True)
+class Phase(Generic[T]):
+    name: str
+    run: Callable[[], Awaitable[T]]
+    after: tuple[str, ...] = ()
+
+def check_graph(phases: Sequence[Phase]) -> None:
+    """Raise ValueError on duplicate names, unknown dependencies or cycles."""
+    names = [p.name for p in phases]
+    if len(set(names)) != len(names):
+        raise ValueError(f"duplicate phase names: {names}")
+    deps = {p.name: set(p.after) for p in phases}
+    for name, after in deps.items():
+        unknown = after - deps.keys()
+        if unknown:
+            raise ValueError(f"phase {name!r} depends on unknown phases {sorted(unknown)}")
+    # Kahn's algorithm: anything left over sits on a cycle
+    done: set[str] = set()
+    ready = [n for n, a in deps.items() if not a]
+    while ready:
+        done.add(ready.pop())
+        ready.extend(n for n, a in deps.items() if n not in done and n not in ready and a <= done)
+    if len(done) != len(deps):
+        raise ValueError(f"dependency cycle among phases {sorted(deps.keys() - done)}")
+
+async def run_graph(phases: Sequence[Phase[T]], max_concurrency: int = 4) -> AsyncIterator[tuple[str, T]]:
+    """
+    Run phases respecting `after` edges; yield (name, result) as each finishes.
+    The first failing phase cancels everything still in flight and re-raises.
+    """
+    check_graph(phases)
+    sem = asyncio.Semaphore(max(1, max_concurrency))
+    waiting = {p.name: p for p in phases}
+    done: set[str] = set()
+    running: dict[asyncio.Task, str] = {}
+
+    async def guarded(p: Phase[T]) -> T:
+        async with sem:
+            return await p.run()
+
+    def start_ready() -> None:
+        for name, p in list(waiting.items()):
+            if set(p.after) <= done:
+                running[asyncio.create_task(guarded(p), name=f"phase:{name}")] = name
+                del waiting[name]
+
+    try:
+        start_ready()
+        while running:
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            results = []
+            for task in finished:
+                name = running.pop(task)
+                results.append((name, task.result()))
+                done.add(name)
+            # dependents start before the results go out: the consumer may sit on a slow client
+            start_ready()
+            for item in results:
+                yield item
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
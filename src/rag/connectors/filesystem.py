@@ -0,0 +1,74 @@
+# src/rag/connectors/filesystem.py
+"""
+Stream documents from a directory tree (CTI reports, runbooks, feed dumps).
+
+- .txt/.md/.html/.htm: one document per file; size+mtime let ingest skip
+  unchanged files without reading them
+- .jsonl: one document per line ({"id", "text", "source", "published", "tlp", ...})
+Files are visited in sorted order, one directory at a time, so memory stays
+flat on huge trees.
+"""
+from __future__ import annotations
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+TEXT_EXTS = {".txt", ".md", ".html", ".htm"}
+
+def _walk(root: Path) -> Iterator[os.DirEntry]:
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            entries = sorted(os.scandir(d), key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for e in entries:
+            if e.is_dir(follow_symlinks=False):
+                subdirs.append(Path(e.path))
+            elif e.is_file():
+                yield e
+        stack.extend(reversed(subdirs))
+
+def iter_documents(root: str | Path, default_tlp: str = "clear") -> Iterator[dict]:
+    root = Path(root)
+    for entry in _walk(root):
+        path = Path(entry.path)
+        rel = path.relative_to(root).as_posix()
+        ext = path.suffix.lower()
+        # first path component doubles as the source name (e.g. reports/, runbooks/)
+        source = rel.split("/", 1)[0] if "/" in rel else root.name
+        st = entry.stat()
+        if ext in TEXT_EXTS:
+            yield {
+                "doc_id": rel,
+                "source": source,
+                "path": rel,
+                "format": "html" if ext in {".html", ".htm"} else "text",
+                "published": datetime.fromtimestamp(st.st_mtime, tz=timezone.utc).isoformat(),
+                "tlp": default_tlp,
+                "text": path.read_text(encoding="utf-8", errors="replace"),
+                "size": st.st_size,
+                "mtime": st.st_mtime,
+            }
+        elif ext == ".jsonl":
+            with open(path, encoding="utf-8", errors="replace") as f:
+                for lineno, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    rec = json.loads(line)
+                    text = rec.get("text") or ""
+                    if not text:
+                        continue
+                    yield {
+                        "doc_id": str(rec.get("id") or f"{rel}#{lineno}"),
+                        "source": rec.get("source") or source,
+                        "path": rel,
+                        "format": rec.get("format", "text"),
+                        "published": rec.get("published"),
+                        "tlp": (rec.get("tlp") or default_tlp).lower(),
+                        "text": text,
+                    }
@@ -0,0 +1,95 @@
+# src/rag/embed_cache.py
+"""
+Content-addressed embedding cache: (embedding model, chunk sha256) -> float16 vector.
+
+Vectors live in one append-only, memory-mapped float16 matrix
+(vectors.f16, row-major, `dim` columns); a SQLite table maps
+(model, sha) -> row. The embedder's model_id is part of the key, so
+switching EMBED_MODEL to another model of the same dimension re-embeds
+instead of reusing the old model's vectors. A row is appended and fsynced
+before its sha is committed, so after a crash the worst case is an orphan
+row, never a sha pointing at garbage.
+"""
+from __future__ import annotations
+import os
+import sqlite3
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+class EmbeddingCache:
+    def __init__(self, path: str | Path, dim: int, model: str):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.model = model
+        self.vec_path = self.path / "vectors.f16"
+        self.row_bytes = 2 * dim
+        self.db = sqlite3.connect(self.path / "index.sqlite")
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # `emb` (sha -> row) predates the model key; its vectors' model is unknown, so they are not reused
+        self.db.execute("DROP TABLE IF EXISTS emb")
+        self.db.execute("CREATE TABLE IF NOT EXISTS vec (model TEXT NOT NULL, sha TEXT NOT NULL, "
+                        "row INTEGER NOT NULL, PRIMARY KEY (model, sha))")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT)")
+        self._check_dim()
+        self._repair()
+
+    def _check_dim(self) -> None:
+        row = self.db.execute("SELECT v FROM meta WHERE k = 'dim'").fetchone()
+        if row is None:
+            with self.db:
+                self.db.execute("INSERT INTO meta VALUES ('dim', ?)", (str(self.dim),))
+        elif int(row[0]) != self.dim:
+            raise ValueError(f"embedding cache at {self.path} has dim {row[0]}, not {self.dim}")
+
+    def _repair(self) -> None:
+        size = self.vec_path.stat().st_size if self.vec_path.exists() else 0
+        self.rows = size // self.row_bytes
+        if size != self.rows * self.row_bytes:
+            os.truncate(self.vec_path, self.rows * self.row_bytes)  # torn tail
+        with self.db:
+            self.db.execute("DELETE FROM vec WHERE row >= ?", (self.rows,))
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM vec WHERE model = ?", (self.model,)).fetchone()[0]
+
+    def lookup(self, shas: Iterable[str]) -> dict[str, int]:
+        shas = list(dict.fromkeys(shas))
+        found: dict[str, int] = {}
+        for i in range(0, len(shas), 900):  # stay under SQLite's host-parameter limit
+            part = shas[i:i + 900]
+            q = f"SELECT sha, row FROM vec WHERE model = ? AND sha IN ({','.join('?' * len(part))})"
+            found.update(self.db.execute(q, [self.model, *part]).fetchall())
+        return found
+
+    def matrix(self) -> np.memmap | np.ndarray:
+        """Read-only float16 view of every row (zero-copy)."""
+        if self.rows == 0:
+            return np.zeros((0, self.dim), dtype=np.float16)
+        return np.memmap(self.vec_path, dtype=np.float16, mode="r", shape=(self.rows, self.dim))
+
+    def get_many(self, shas: list[str]) -> np.ndarray:
+        """float32 vectors for `shas` in order; KeyError if any is missing."""
+        rows = self.lookup(shas)
+        missing = [s for s in shas if s not in rows]
+        if missing:
+            raise KeyError(f"{len(missing)} {self.model} embeddings missing, e.g. {missing[0]} "
+                           "(embedding model changed? rerun the embed stage with --reset)")
+        return np.asarray(self.matrix()[[rows[s] for s in shas]], dtype=np.float32)
+
+    def put_many(self, shas: list[str], vectors) -> None:
+        vecs = np.asarray(vectors, dtype=np.float16).reshape(len(shas), self.dim)
+        start = self.rows
+        with open(self.vec_path, "ab") as f:
+            f.write(vecs.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self.rows += len(shas)
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO vec VALUES (?, ?, ?)",
+                                [(self.model, sha, start + i) for i, sha in enumerate(shas)])
+
+    def close(self) -> None:
+        self.db.close()
@@ -0,0 +1,172 @@
+# src/rag/embedding.py
+"""
+Embedders and the pipeline's embed stage.
+
+HashEmbedder is a deterministic stdlib stub for tests/offline runs.
+RunnerEmbedder sends batches to the local embedding model through the LLM
+runner layer. Each embedder has a `model_id` that namespaces its vectors in
+the EmbeddingCache. EmbedStage only embeds chunks whose sha is not already
+cached for that model, in adaptive batches bounded by EMBED_MAX_BATCH_CHARS.
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import math
+import os
+import re
+import time
+
+EMBED_DIM = int(os.getenv("EMBED_DIM", "256"))
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "hash")      # hash | runner
+EMBED_MODEL = os.getenv("EMBED_MODEL", "nomic-embed-text")
+EMBED_BATCH = int(os.getenv("EMBED_BATCH", "64"))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "512"))
+EMBED_MAX_BATCH_CHARS = int(os.getenv("EMBED_MAX_BATCH_CHARS", "262144"))  # memory bound per request
+
+_TOKEN = re.compile(r"[\w.:/-]+")
+# backend rejections that a smaller request can fix (payload, batch or context size, memory)
+_SIZE_ERROR = re.compile(r"too (?:large|long|many)|payload|context length|maximum|limit|out of memory|\boom\b", re.I)
+
+class HashEmbedder:
+    """
+    Deterministic feature-hashing embedder (stdlib only). Stand-in for the
+    local embedding model in tests and offline runs; same text -> same vector.
+    """
+    name = "hash"
+    model_id = "hash"
+
+    def __init__(self, dim: int = EMBED_DIM):
+        self.dim = dim
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        out = []
+        for text in texts:
+            vec = [0.0] * self.dim
+            for tok in _TOKEN.findall(text.lower()):
+                h = int.from_bytes(hashlib.blake2b(tok.encode("utf-8"), digest_size=8).digest(), "little")
+                vec[h % self.dim] += 1.0 if (h >> 63) else -1.0
+            norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+            out.append([v / norm for v in vec])
+        return out
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        return self.embed(texts)
+
+class RunnerEmbedder:
+    """Sync facade over Runner.embed for the (sync) pipeline stages."""
+    name = "runner"
+
+    def __init__(self, runner=None, model: str = EMBED_MODEL, dim: int = EMBED_DIM):
+        if runner is None:
+            from src.llm.runners.registry import get_runner
+            runner = get_runner()
+        self.runner = runner
+        self.model = model
+        self.model_id = f"{runner.name}:{model}"
+        self.dim = dim
+        self._loop = asyncio.new_event_loop()
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return self._loop.run_until_complete(self.aembed(texts))
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        """For callers already on an event loop (query embedding in the API)."""
+        vecs = await self.runner.embed(texts, model=self.model)
+        if vecs and len(vecs[0]) != self.dim:
+            raise ValueError(f"model {self.model} returned dim {len(vecs[0])}, expected EMBED_DIM={self.dim}")
+        return vecs
+
+    def close(self) -> None:
+        from src.llm.runners.base import close_http_client
+        self._loop.run_until_complete(close_http_client())
+        self._loop.close()
+
+def make_embedder(backend: str = EMBED_BACKEND):
+    if backend == "hash":
+        return HashEmbedder()
+    if backend == "runner":
+        return RunnerEmbedder()
+    raise ValueError(f"unknown EMBED_BACKEND {backend!r}")
+
+def embedder_id(backend: str = EMBED_BACKEND) -> str:
+    """model_id of make_embedder(backend), without opening a runner."""
+    if backend == "hash":
+        return HashEmbedder.model_id
+    if backend == "runner":
+        from src.config.settings import LLM_BACKEND
+        return f"{LLM_BACKEND}:{EMBED_MODEL}"
+    raise ValueError(f"unknown EMBED_BACKEND {backend!r}")
+
+def is_size_error(e: BaseException) -> bool:
+    """True when the backend refused the request for its size, so a smaller batch may pass."""
+    return isinstance(e, MemoryError) or getattr(e, "status", None) == 413 or bool(_SIZE_ERROR.search(str(e)))
+
+class EmbedStage:
+    """
+    Pipeline batch function: attach nothing to the records, but make sure the
+    cache holds a vector for every chunk sha. Batch size adapts: it doubles
+    after a run of clean requests and halves when the backend rejects a
+    request for its size (413, context length, OOM), always within
+    EMBED_MAX_BATCH_CHARS. Any other error is raised as is.
+    """
+
+    def __init__(self, embedder, cache, batch: int = EMBED_BATCH, max_batch: int = EMBED_MAX_BATCH,
+                 max_chars: int = EMBED_MAX_BATCH_CHARS):
+        self.embedder = embedder
+        self.cache = cache
+        self.batch = max(1, batch)
+        self.max_batch = max(self.batch, max_batch)
+        self.max_chars = max_chars
+        self._clean = 0
+        self.cached = 0
+        self.embedded = 0
+        self.seconds = 0.0
+
+    def _next_slice(self, todo: list[dict], start: int) -> int:
+        end, chars = start, 0
+        while end < len(todo) and end - start < self.batch:
+            chars += len(todo[end]["text"])
+            if end > start and chars > self.max_chars:
+                break
+            end += 1
+        return end
+
+    def __call__(self, batch: list[dict]) -> list[dict]:
+        known = self.cache.lookup(c["sha"] for c in batch)
+        todo, seen = [], set(known)
+        for c in batch:
+            if c["sha"] not in seen:
+                seen.add(c["sha"])
+                todo.append(c)
+        self.cached += len(batch) - len(todo)
+
+        t0 = time.perf_counter()
+        i = 0
+        while i < len(todo):
+            end = self._next_slice(todo, i)
+            part = todo[i:end]
+            try:
+                vecs = self.embedder.embed([c["text"] for c in part])
+            except Exception as e:
+                if len(part) == 1 or not is_size_error(e):
+                    raise
+                self.batch = max(1, len(part) // 2)
+                self._clean = 0
+                continue
+            self.cache.put_many([c["sha"] for c in part], vecs)
+            self.embedded += len(part)
+            i = end
+            self._clean += 1
+            if self._clean >= 4 and self.batch < self.max_batch:
+                self.batch = min(self.max_batch, self.batch * 2)
+                self._clean = 0
+        self.seconds += time.perf_counter() - t0
+        return batch
+
+    def stats(self) -> dict:
+        return {
+            "embedded": self.embedded,
+            "cache_hits": self.cached,
+            "chunks_per_s": round(self.embedded / self.seconds, 1) if self.seconds else 0.0,
+            "batch": self.batch,
+        }
@@ -0,0 +1,234 @@
+# src/rag/index/bm25.py
+"""
+Inverted-index BM25 over chunk text, keyed by vector-store item id.
+
+The tokenizer keeps indicators whole (203.0.113.12, cve-2024-3400, hashes,
+evil.example.com) and also emits the parts of hyphen/slash compounds, so
+exact IOC lookups hit the right postings. Terms are stored as 64-bit hashes.
+
+On disk: immutable segments (sorted term hashes + offsets + id/tf postings,
+all memory-mapped), an id-indexed doc length column and a manifest that is
+replaced atomically. Like FacetIndex it is derived from the vector store's
+item table via sync(); small segments are merged once there are more than
+BM25_MAX_SEGMENTS. Postings of items that were later replaced stay until
+the caller drops them (the retriever resolves hits against the live table).
+"""
+from __future__ import annotations
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import threading
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from src.rag.index.facets import IdColumn
+
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+BM25_SEGMENT_DOCS = int(os.getenv("BM25_SEGMENT_DOCS", "100000"))
+BM25_MAX_SEGMENTS = int(os.getenv("BM25_MAX_SEGMENTS", "8"))
+
+_TERM = re.compile(r"[a-z0-9_]+(?:[.\-/][a-z0-9_]+)*")
+_PARTS = re.compile(r"[-/]")
+STOPWORDS = frozenset(
+    "a an and are as at be been but by can for from had has have if in into is it its may of on or "
+    "such than that the their then there these they this to was were which will with".split()
+)
+
+def terms(text: str) -> list[str]:
+    out = []
+    for t in _TERM.findall(text.lower()):
+        if t in STOPWORDS:
+            continue
+        out.append(t)
+        if "-" in t or "/" in t:
+            out.extend(p for p in _PARTS.split(t) if p and p not in STOPWORDS)
+    return out
+
+def term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+class _Segment:
+    def __init__(self, sdir: Path):
+        self.dir = sdir
+        self.terms = np.fromfile(sdir / "terms.u64", dtype=np.uint64)
+        self.offsets = np.fromfile(sdir / "offsets.i64", dtype=np.int64)
+        n = int(self.offsets[-1]) if len(self.offsets) else 0
+        self.ids = np.memmap(sdir / "ids.i64", dtype=np.int64, mode="r", shape=(n,)) if n else np.zeros(0, np.int64)
+        self.tfs = np.memmap(sdir / "tfs.u16", dtype=np.uint16, mode="r", shape=(n,)) if n else np.zeros(0, np.uint16)
+
+    def postings(self, h: np.uint64) -> tuple[np.ndarray, np.ndarray]:
+        i = int(np.searchsorted(self.terms, h))
+        if i == len(self.terms) or self.terms[i] != h:
+            return self.ids[:0], self.tfs[:0]
+        a, b = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self.ids[a:b], self.tfs[a:b]
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(term hash per posting, ids, tfs) for merging."""
+        return np.repeat(self.terms, np.diff(self.offsets)), np.asarray(self.ids), np.asarray(self.tfs)
+
+def _write_segment(sdir: Path, hashes: np.ndarray, ids: np.ndarray, tfs: np.ndarray) -> None:
+    tmp = sdir.with_name(sdir.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+    order = np.lexsort((ids, hashes))
+    hashes, ids, tfs = hashes[order], ids[order], tfs[order]
+    uniq, starts = np.unique(hashes, return_index=True)
+    uniq.astype(np.uint64).tofile(tmp / "terms.u64")
+    np.append(starts, len(hashes)).astype(np.int64).tofile(tmp / "offsets.i64")
+    ids.astype(np.int64).tofile(tmp / "ids.i64")
+    tfs.astype(np.uint16).tofile(tmp / "tfs.u16")
+    os.replace(tmp, sdir)
+
+class BM25Index:
+    def __init__(self, path: str | Path, *, readonly: bool = False):
+        self.path = Path(path)
+        if readonly and not (self.path / "manifest.json").exists():
+            raise FileNotFoundError(f"no BM25 index at {self.path}")
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.doclen = IdColumn(self.path / "doclen.u32", np.uint32)
+        self._sig = None
+        self._lock = threading.Lock()  # held only to reload the manifest, not for searches
+        self.segments: list[_Segment] = []
+        self._load()
+
+    # ---- manifest ----
+    def _load(self) -> None:
+        p = self.path / "manifest.json"
+        if p.exists():
+            st = p.stat()
+            self._sig = (st.st_ino, st.st_mtime_ns)
+            m = json.loads(p.read_text())
+        else:
+            m = {}
+        self.n_docs = m.get("n_docs", 0)
+        self.total_len = m.get("total_len", 0)
+        self.watermark = m.get("watermark", 0)
+        self.next_seg = m.get("next_seg", 0)
+        self.segments = [_Segment(self.path / name) for name in m.get("segments", [])]
+
+    def _save(self) -> None:
+        m = {"n_docs": self.n_docs, "total_len": self.total_len, "watermark": self.watermark,
+             "next_seg": self.next_seg, "segments": [s.dir.name for s in self.segments]}
+        tmp = self.path / "manifest.json.tmp"
+        tmp.write_text(json.dumps(m))
+        os.replace(tmp, self.path / "manifest.json")
+        st = (self.path / "manifest.json").stat()
+        self._sig = (st.st_ino, st.st_mtime_ns)
+
+    def _refresh(self) -> None:
+        st = (self.path / "manifest.json").stat()
+        if (st.st_ino, st.st_mtime_ns) != self._sig:
+            self._load()
+
+    # ---- writes ----
+    def _new_segment_dir(self) -> Path:
+        sdir = self.path / f"seg-{self.next_seg:06d}"
+        self.next_seg += 1
+        return sdir
+
+    def sync(self, store) -> int:
+        """Index the text of store items added since the last sync; returns how many."""
+        hashes, ids, tfs = array("Q"), array("q"), array("H")
+        pending = n = 0
+        last = self.watermark
+        cache: dict[str, int] = {}
+
+        def flush(upto: int) -> None:
+            nonlocal hashes, ids, tfs, pending
+            if pending:
+                sdir = self._new_segment_dir()
+                _write_segment(sdir, np.frombuffer(hashes, dtype=np.uint64), np.frombuffer(ids, dtype=np.int64),
+                               np.frombuffer(tfs, dtype=np.uint16))
+                self.segments.append(_Segment(sdir))
+            self.watermark = upto
+            self._save()  # the segment and the watermark become visible together
+            hashes, ids, tfs, pending = array("Q"), array("q"), array("H"), 0
+
+        for rows in store.iter_items(self.watermark):
+            lens = np.zeros(len(rows), dtype=np.uint32)
+            for j, (id_, _key, meta) in enumerate(rows):
+                toks = terms((meta or {}).get("text", ""))
+                lens[j] = len(toks)
+                for t, tf in Counter(toks).items():
+                    h = cache.get(t)
+                    if h is None:
+                        h = cache[t] = term_hash(t)
+                    hashes.append(h)
+                    ids.append(id_)
+                    tfs.append(min(tf, 65535))
+            self.doclen.write(np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)), lens)
+            self.n_docs += len(rows)
+            self.total_len += int(lens.sum())
+            pending += len(rows)
+            n += len(rows)
+            last = rows[-1][0]
+            if pending >= BM25_SEGMENT_DOCS:
+                flush(last)
+                cache.clear()
+        flush(last)
+        if len(self.segments) > BM25_MAX_SEGMENTS:
+            self.merge()
+        return n
+
+    def merge(self) -> None:
+        """Fold all segments into one (postings sorted by term, then id)."""
+        if len(self.segments) < 2:
+            return
+        parts = [s.arrays() for s in self.segments]
+        sdir = self._new_segment_dir()
+        _write_segment(sdir, *(np.concatenate([p[i] for p in parts]) for i in range(3)))
+        old, self.segments = self.segments, [_Segment(sdir)]
+        self._save()
+        for s in old:
+            shutil.rmtree(s.dir, ignore_errors=True)
+
+    # ---- reads ----
+    def search(self, query: str, k: int = 50, *, mask: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """(ids, scores) of the top-k BM25 matches; `mask` (bool by id) pre-filters postings."""
+        with self._lock:
+            self._refresh()
+            segments, n_docs, total_len = self.segments, self.n_docs, self.total_len
+        empty = np.zeros(0, np.int64), np.zeros(0, np.float32)
+        if not n_docs:
+            return empty
+        avgdl = total_len / n_docs or 1.0
+        dl = self.doclen.view()  # written before the manifest, so it covers every id in `segments`
+        parts_ids, parts_sc = [], []
+        for t in set(terms(query)):
+            h = np.uint64(term_hash(t))
+            lists = [s.postings(h) for s in segments]
+            df = sum(len(ids) for ids, _ in lists)
+            if not df:
+                continue
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for ids, tf in lists:
+                if not len(ids):
+                    continue
+                ids = np.asarray(ids)
+                if mask is not None:
+                    keep = ids < len(mask)
+                    keep[keep] = mask[ids[keep]]
+                    ids, tf = ids[keep], tf[keep]
+                tf = tf.astype(np.float32)
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * dl[ids].astype(np.float32) / avgdl)
+                parts_ids.append(ids)
+                parts_sc.append(idf * tf * (BM25_K1 + 1) / (tf + norm))
+        if not parts_ids:
+            return empty
+        uniq, inv = np.unique(np.concatenate(parts_ids), return_inverse=True)
+        sc = np.bincount(inv, weights=np.concatenate(parts_sc)).astype(np.float32)
+        if len(sc) > k:
+            top = np.argpartition(-sc, k - 1)[:k]
+        else:
+            top = np.arange(len(sc))
+        top = top[np.argsort(-sc[top])]
+        return uniq[top], sc[top]
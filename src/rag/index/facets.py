@@ -0,0 +1,169 @@
+# src/rag/index/facets.py
+"""
+Metadata pre-filter index over vector-store item ids.
+
+Each filterable field is a fixed-width column indexed by item id (source and
+TLP as dictionary codes, published as a date ordinal; 0 = unknown). A filter
+becomes a boolean bitmap over the id space: one cached bitmap per
+(field, value), OR-ed within a field and AND-ed across fields, with the date
+range as a vectorized comparison. Retrieval passes the bitmap down to BM25
+and the vector store so filtering happens before ranking.
+
+The index is derived from the vector store's item table: sync() catches up
+on items with id > watermark, so it is crash-safe and needs no hooks in the
+write path.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+FACET_FIELDS = ("source", "tlp")
+
+class IdColumn:
+    """Fixed-width column indexed by item id (sparse file; unwritten ids read as 0)."""
+
+    def __init__(self, path: Path, dtype):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self._rows = -1
+        self._view = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self) -> int:
+        try:
+            return self.path.stat().st_size // self.dtype.itemsize
+        except FileNotFoundError:
+            return 0
+
+    def view(self) -> np.ndarray:
+        rows = len(self)
+        if rows != self._rows:
+            self._view = (np.memmap(self.path, dtype=self.dtype, mode="r", shape=(rows,)) if rows
+                          else np.zeros(0, dtype=self.dtype))
+            self._rows = rows
+        return self._view
+
+    def write(self, ids: np.ndarray, values: np.ndarray) -> None:
+        if not len(ids):
+            return
+        need = int(ids.max()) + 1
+        if need > len(self):
+            with open(self.path, "ab") as f:
+                f.truncate(need * self.dtype.itemsize)
+        mm = np.memmap(self.path, dtype=self.dtype, mode="r+", shape=(len(self),))
+        mm[ids] = values
+        mm.flush()
+        del mm
+
+def date_ordinal(value) -> int:
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal()
+    except (TypeError, ValueError):
+        return 0
+
+class FacetIndex:
+    def __init__(self, path: str | Path, *, readonly: bool = False):
+        self.path = Path(path)
+        if readonly and not (self.path / "dict.json").exists():
+            raise FileNotFoundError(f"no facet index at {self.path}")
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.columns = {f: IdColumn(self.path / f"{f}.u16", np.uint16) for f in FACET_FIELDS}
+        self.published = IdColumn(self.path / "published.i32", np.int32)
+        self._sig = None
+        self._lock = threading.Lock()  # held only to reload the dictionary, not for lookups
+        self._bitmaps: dict[tuple[str, int], np.ndarray] = {}
+        self._load()
+
+    def _load(self) -> None:
+        p = self.path / "dict.json"
+        if p.exists():
+            st = p.stat()
+            self._sig = (st.st_ino, st.st_mtime_ns)
+            d = json.loads(p.read_text())
+        else:
+            d = {}
+        self.watermark = d.get("watermark", 0)
+        self.values: dict[str, list[str]] = {f: d.get(f, []) for f in FACET_FIELDS}
+        self._codes = {f: {v: i + 1 for i, v in enumerate(vs)} for f, vs in self.values.items()}
+        self._bitmaps.clear()
+
+    def _save(self) -> None:
+        tmp = self.path / "dict.json.tmp"
+        tmp.write_text(json.dumps({"watermark": self.watermark, **self.values}))
+        os.replace(tmp, self.path / "dict.json")
+
+    def _code(self, field: str, value) -> int:
+        if value is None or value == "":
+            return 0
+        value = str(value).lower()
+        codes = self._codes[field]
+        if value not in codes:
+            self.values[field].append(value)
+            codes[value] = len(self.values[field])
+        return codes[value]
+
+    def sync(self, store) -> int:
+        """Index store items added since the last sync; returns how many."""
+        n = 0
+        for rows in store.iter_items(self.watermark):
+            ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+            metas = [r[2] or {} for r in rows]
+            for f in FACET_FIELDS:
+                self.columns[f].write(ids, np.fromiter((self._code(f, m.get(f)) for m in metas),
+                                                       dtype=np.uint16, count=len(rows)))
+            self.published.write(ids, np.fromiter((date_ordinal(m.get("published")) for m in metas),
+                                                  dtype=np.int32, count=len(rows)))
+            self.watermark = int(ids[-1])
+            n += len(rows)
+        self._save()
+        self._bitmaps.clear()
+        return n
+
+    def _refresh(self) -> None:
+        p = self.path / "dict.json"
+        st = p.stat()
+        if (st.st_ino, st.st_mtime_ns) != self._sig:
+            self._load()
+
+    def _bitmap(self, field: str, code: int) -> np.ndarray:
+        col = self.columns[field].view()
+        key = (field, code)
+        bm = self._bitmaps.get(key)
+        if bm is None or len(bm) != len(col):
+            bm = self._bitmaps[key] = col == code
+        return bm
+
+    def mask(self, *, sources: Iterable[str] = (), tlp: Iterable[str] = (),
+             since: Optional[str] = None, until: Optional[str] = None) -> Optional[np.ndarray]:
+        """Boolean bitmap over item ids, or None when no filter is set (everything allowed)."""
+        wanted = {"source": [s.lower() for s in sources], "tlp": [t.lower() for t in tlp]}
+        if not any(wanted.values()) and not since and not until:
+            return None
+        with self._lock:
+            self._refresh()
+            all_codes = self._codes
+        n = max([len(self.published)] + [len(c) for c in self.columns.values()])
+        m = np.ones(n, dtype=bool)
+        for field, vals in wanted.items():
+            if not vals:
+                continue
+            codes = [all_codes[field][v] for v in vals if v in all_codes[field]]
+            if not codes:
+                return np.zeros(n, dtype=bool)
+            col_mask = np.zeros(n, dtype=bool)
+            for c in codes:
+                bm = self._bitmap(field, c)
+                col_mask[:len(bm)] |= bm
+            m &= col_mask
+        if since or until:
+            pub = np.zeros(n, dtype=np.int32)
+            view = self.published.view()
+            pub[:len(view)] = view
+            lo, hi = date_ordinal(since) if since else 1, date_ordinal(until) if until else np.iinfo(np.int32).max
+            m &= (pub >= max(lo, 1)) & (pub <= hi)
+        return m
@@ -0,0 +1,58 @@
+# src/rag/index/ivf.py
+"""IVF building blocks (numpy only): spherical k-means, list assignment, quantization."""
+from __future__ import annotations
+import math
+
+import numpy as np
+
+def normalize(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+def choose_nlist(n: int) -> int:
+    """~4*sqrt(n) lists, so a probe of 16 lists touches a few thousand rows at 1M."""
+    if n < 1024:
+        return 0  # not worth clustering; brute force is faster
+    return int(min(8192, max(16, 4 * math.sqrt(n))))
+
+def assign(x: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    """Nearest centroid (max inner product) for each row of x, in chunks to bound memory."""
+    out = np.empty(len(x), dtype=np.int32)
+    for i in range(0, len(x), chunk):
+        block = np.asarray(x[i:i + chunk], dtype=np.float32)
+        out[i:i + chunk] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+def train_kmeans(sample: np.ndarray, nlist: int, iters: int = 8, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on a (normalized) float32 sample."""
+    rng = np.random.default_rng(seed)
+    sample = normalize(sample)
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=len(sample) < nlist)].copy()
+    for _ in range(iters):
+        labels = assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=nlist)
+        empty = counts == 0
+        if empty.any():  # re-seed dead centroids from random points
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids.astype(np.float32)
+
+# ---- storage codecs ----
+def encode(x: np.ndarray, quant: str) -> tuple[np.ndarray, np.ndarray | None]:
+    """float32 rows -> (stored rows, per-row scales or None)."""
+    if quant == "f16":
+        return x.astype(np.float16), None
+    if quant == "int8":
+        scales = np.maximum(np.abs(x).max(axis=1), 1e-12) / 127.0
+        return np.clip(np.rint(x / scales[:, None]), -127, 127).astype(np.int8), scales.astype(np.float32)
+    raise ValueError(f"unknown quantization {quant!r}")
+
+def scores(rows: np.ndarray, scales: np.ndarray | None, q: np.ndarray) -> np.ndarray:
+    s = rows.astype(np.float32) @ q
+    return s * scales if scales is not None else s
+
+def storage_dtype(quant: str):
+    return np.float16 if quant == "f16" else np.int8
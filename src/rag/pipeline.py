@@ -0,0 +1,276 @@
+# src/rag/pipeline.py
+"""
+Streaming, resumable RAG pipeline: ingest -> normalize -> chunk -> embed -> index.
+
+Stages talk through append-only JSONL spools in a work dir. Each stage reads
+its input spool from a saved byte offset in bounded batches, appends its
+output, and then commits (input offset, output size) to a SQLite state DB.
+So:
+  - memory is bounded by one batch, never the corpus
+  - a crashed stage resumes from its last committed batch (the partial output
+    tail is truncated first)
+  - re-running after new documents arrive only processes the appended tail
+  - resetting a stage also resets every stage downstream of it, whose
+    checkpoints point into spools that are about to be rewritten
+Ingest additionally records per-document content hashes in the same
+transaction, so unchanged documents are skipped.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+PIPELINE_WORK_DIR = os.getenv("PIPELINE_WORK_DIR", "data/pipeline")
+PIPELINE_BATCH_SIZE = int(os.getenv("PIPELINE_BATCH_SIZE", "256"))
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "1"))
+
+STAGES = ("ingest", "normalize", "chunk", "embed", "index")
+
+BatchFn = Callable[[list[dict]], Iterable[dict]]
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def spool_path(work_dir: str | Path, stage: str) -> Path:
+    return Path(work_dir) / f"{stage}.jsonl"
+
+# ---- state (checkpoints + content hashes) ----
+@dataclass
+class Checkpoint:
+    stage: str
+    in_offset: int = 0
+    out_size: int = 0
+    records_in: int = 0
+    records_out: int = 0
+
+class PipelineState:
+    def __init__(self, work_dir: str | Path = PIPELINE_WORK_DIR):
+        self.work_dir = Path(work_dir)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.work_dir / "state.sqlite")
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                stage TEXT PRIMARY KEY, in_offset INTEGER, out_size INTEGER,
+                records_in INTEGER, records_out INTEGER, updated_at REAL);
+            CREATE TABLE IF NOT EXISTS doc_hashes (
+                doc_id TEXT PRIMARY KEY, sha TEXT, size INTEGER, mtime REAL);
+        """)
+
+    def checkpoint(self, stage: str) -> Checkpoint:
+        row = self.db.execute(
+            "SELECT in_offset, out_size, records_in, records_out FROM checkpoints WHERE stage = ?", (stage,)
+        ).fetchone()
+        return Checkpoint(stage, *row) if row else Checkpoint(stage)
+
+    def commit(self, ck: Checkpoint, doc_hashes: Iterable[tuple[str, str, int, float]] = ()) -> None:
+        """Persist a checkpoint (and ingest hashes) atomically."""
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO doc_hashes VALUES (?, ?, ?, ?)", doc_hashes)
+            self.db.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)",
+                (ck.stage, ck.in_offset, ck.out_size, ck.records_in, ck.records_out, time.time()),
+            )
+
+    def doc_hash(self, doc_id: str) -> Optional[tuple[str, int, float]]:
+        return self.db.execute("SELECT sha, size, mtime FROM doc_hashes WHERE doc_id = ?", (doc_id,)).fetchone()
+
+    def reset(self, stage: str) -> list[str]:
+        """Forget `stage` and every stage after it: checkpoints, output spools (and ingest's doc hashes)."""
+        stages = list(STAGES[STAGES.index(stage):])
+        with self.db:
+            self.db.executemany("DELETE FROM checkpoints WHERE stage = ?", [(s,) for s in stages])
+            if stage == "ingest":
+                self.db.execute("DELETE FROM doc_hashes")
+        for s in stages:
+            spool_path(self.work_dir, s).unlink(missing_ok=True)
+        return stages
+
+    def close(self) -> None:
+        self.db.close()
+
+# ---- spool IO ----
+def iter_batches(path: Path, start: int, batch_size: int) -> Iterator[tuple[list[dict], int]]:
+    """Yield (records, offset after the batch) from a JSONL spool, starting at byte `start`."""
+    if not path.exists():
+        return
+    with open(path, "rb") as f:
+        f.seek(start)
+        batch: list[dict] = []
+        offset = start
+        while True:
+            line = f.readline()
+            if not line or not line.endswith(b"\n"):
+                break  # EOF or a torn tail line; picked up on the next run
+            offset += len(line)
+            if line.strip():
+                batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                yield batch, offset
+                batch = []
+        if batch:
+            yield batch, offset
+
+class _Spool:
+    """Append-only output spool, truncated back to the last committed size on open."""
+
+    def __init__(self, path: Path, committed_size: int):
+        self.f = open(path, "ab")
+        self.f.truncate(committed_size)
+        self.f.seek(committed_size)
+
+    def write(self, records: Iterable[dict]) -> int:
+        n = 0
+        for r in records:
+            self.f.write(json.dumps(r, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n")
+            n += 1
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        return n
+
+    def size(self) -> int:
+        return self.f.tell()
+
+    def close(self) -> None:
+        self.f.close()
+
+def _materialize(fn: BatchFn, batch: list[dict]) -> list[dict]:
+    return list(fn(batch))
+
+def _ordered_map(fn: BatchFn, batches: Iterator[tuple[list[dict], int]], workers: int
+                 ) -> Iterator[tuple[int, int, list[dict]]]:
+    """
+    Yield (n_in, offset, outputs) per batch in input order. With workers > 1
+    batches are sharded across a process pool with at most 2*workers in
+    flight, so output order (and the checkpoints) stay deterministic and
+    memory stays bounded. `fn` must be a picklable module-level function.
+    """
+    if workers <= 1:
+        for batch, offset in batches:
+            yield len(batch), offset, list(fn(batch))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        inflight: deque = deque()
+        for batch, offset in batches:
+            inflight.append((len(batch), offset, pool.submit(_materialize, fn, batch)))
+            if len(inflight) >= 2 * workers:
+                n, off, fut = inflight.popleft()
+                yield n, off, fut.result()
+        while inflight:
+            n, off, fut = inflight.popleft()
+            yield n, off, fut.result()
+
+@dataclass
+class StageStats:
+    stage: str
+    records_in: int = 0
+    records_out: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+    extra: dict = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        rate = self.records_in / self.seconds if self.seconds else 0.0
+        line = (f"{self.stage}: in={self.records_in} out={self.records_out} skipped={self.skipped} "
+                f"{self.seconds:.2f}s ({rate:.0f} rec/s)")
+        return line + "".join(f" {k}={v}" for k, v in self.extra.items())
+
+def run_stage(
+    state: PipelineState,
+    stage: str,
+    fn: BatchFn,
+    *,
+    upstream: str,
+    batch_size: int = PIPELINE_BATCH_SIZE,
+    write_output: bool = True,
+    workers: int = 1,
+) -> StageStats:
+    """Run `fn` over the unprocessed tail of the upstream spool, one checkpointed batch at a time."""
+    ck = state.checkpoint(stage)
+    upstream_path = spool_path(state.work_dir, upstream)
+    upstream_size = upstream_path.stat().st_size if upstream_path.exists() else 0
+    if ck.in_offset > upstream_size:
+        raise RuntimeError(f"{stage} checkpoint is at byte {ck.in_offset} but {upstream_path.name} has "
+                           f"{upstream_size}; {upstream} was rewritten, rerun {stage} with --reset")
+    stats = StageStats(stage)
+    t0 = time.perf_counter()
+    out = _Spool(spool_path(state.work_dir, stage), ck.out_size) if write_output else None
+    try:
+        batches = iter_batches(upstream_path, ck.in_offset, batch_size)
+        for n_in, offset, produced in _ordered_map(fn, batches, workers):
+            n_out = out.write(produced) if out else len(produced)
+            ck.in_offset = offset
+            ck.out_size = out.size() if out else 0
+            ck.records_in += n_in
+            ck.records_out += n_out
+            state.commit(ck)
+            stats.records_in += n_in
+            stats.records_out += n_out
+    finally:
+        if out:
+            out.close()
+    stats.seconds = time.perf_counter() - t0
+    return stats
+
+def run_ingest(
+    state: PipelineState,
+    docs: Iterable[dict],
+    *,
+    batch_size: int = PIPELINE_BATCH_SIZE,
+) -> StageStats:
+    """
+    Append new/changed documents to the ingest spool. `docs` yields dicts with
+    doc_id and text (plus optional size/mtime for a cheap unchanged check).
+    """
+    ck = state.checkpoint("ingest")
+    stats = StageStats("ingest")
+    t0 = time.perf_counter()
+    out = _Spool(spool_path(state.work_dir, "ingest"), ck.out_size)
+    batch: list[dict] = []
+    hashes: list[tuple[str, str, int, float]] = []
+
+    def flush() -> None:
+        n = out.write(batch)
+        ck.out_size = out.size()
+        ck.records_out += n
+        state.commit(ck, hashes)
+        stats.records_out += n
+        batch.clear()
+        hashes.clear()
+
+    try:
+        for doc in docs:
+            stats.records_in += 1
+            ck.records_in += 1
+            size, mtime = int(doc.get("size", -1)), float(doc.get("mtime", -1))
+            prev = state.doc_hash(doc["doc_id"])
+            if prev and size >= 0 and prev[1] == size and prev[2] == mtime:
+                stats.skipped += 1
+                continue
+            sha = doc.get("sha") or sha256_text(doc["text"])
+            if prev and prev[0] == sha:
+                hashes.append((doc["doc_id"], sha, size, mtime))  # touched, content unchanged
+                stats.skipped += 1
+                if len(hashes) >= 8 * batch_size:
+                    flush()
+                continue
+            doc["sha"] = sha
+            doc.pop("size", None)
+            doc.pop("mtime", None)
+            batch.append(doc)
+            hashes.append((doc["doc_id"], sha, size, mtime))
+            if len(batch) >= batch_size or len(hashes) >= 8 * batch_size:
+                flush()
+        if batch or hashes:
+            flush()
+    finally:
+        out.close()
+    stats.seconds = time.perf_counter() - t0
+    return stats
@@ -0,0 +1,96 @@
+# src/rag/preprocess/chunk.py
+"""
+Token-bounded chunking with overlap.
+
+Text is packed sentence by sentence into chunks of at most CHUNK_TOKENS
+tokens; the last ~CHUNK_OVERLAP tokens of sentences are repeated at the start
+of the next chunk. Sentences longer than the budget are cut on token
+boundaries. Token counts come from a regex tokenizer (words / numbers /
+single punctuation, close to BPE counts for CTI prose) or from tiktoken
+when CHUNK_TOKENIZER=tiktoken and it is installed.
+"""
+import hashlib
+import os
+import re
+from functools import lru_cache
+from typing import Callable
+
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "256"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "32"))
+CHUNK_TOKENIZER = os.getenv("CHUNK_TOKENIZER", "regex")  # regex | tiktoken
+
+# metadata carried from the document onto each chunk (used for retrieval filters)
+CHUNK_META = ("source", "published", "tlp", "path")
+
+_TOKEN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_SENTENCE = re.compile(r".+?(?:[.!?]+(?=\s)|\n|$)", re.S)
+
+@lru_cache(maxsize=1)
+def _counter() -> Callable[[str], int]:
+    if CHUNK_TOKENIZER == "tiktoken":
+        try:
+            import tiktoken
+            enc = tiktoken.get_encoding("cl100k_base")
+            return lambda s: len(enc.encode(s, disallowed_special=()))
+        except ImportError:
+            pass
+    return lambda s: sum(1 for _ in _TOKEN.finditer(s))
+
+def count_tokens(text: str) -> int:
+    return _counter()(text)
+
+def _cut_long(sentence: str, size: int) -> list[str]:
+    """Split one oversized sentence on regex-token boundaries."""
+    spans = [m.span() for m in _TOKEN.finditer(sentence)]
+    pieces = []
+    for i in range(0, len(spans), size):
+        group = spans[i:i + size]
+        pieces.append(sentence[group[0][0]:group[-1][1]])
+    return pieces
+
+def split_tokens(text: str, size: int = CHUNK_TOKENS, overlap: int = CHUNK_OVERLAP) -> list[str]:
+    sentences: list[tuple[str, int]] = []
+    for m in _SENTENCE.finditer(text):
+        s = m.group().strip()
+        if not s:
+            continue
+        n = count_tokens(s)
+        if n > size:
+            sentences.extend((p, count_tokens(p)) for p in _cut_long(s, size))
+        else:
+            sentences.append((s, n))
+
+    chunks: list[str] = []
+    cur: list[tuple[str, int]] = []
+    cur_tokens = 0
+    for s, n in sentences:
+        if cur and cur_tokens + n > size:
+            chunks.append(" ".join(t for t, _ in cur))
+            # carry trailing sentences (up to `overlap` tokens) into the next chunk
+            carry: list[tuple[str, int]] = []
+            carried = 0
+            for t, k in reversed(cur):
+                if carried + k > overlap or carried + k + n > size:
+                    break
+                carry.insert(0, (t, k))
+                carried += k
+            cur, cur_tokens = carry, carried
+        cur.append((s, n))
+        cur_tokens += n
+    if cur:
+        chunks.append(" ".join(t for t, _ in cur))
+    return chunks
+
+def chunk_docs(batch: list[dict]) -> list[dict]:
+    out = []
+    for d in batch:
+        for i, text in enumerate(split_tokens(d["text"])):
+            out.append({
+                "chunk_id": f"{d['doc_id']}::{i}",
+                "doc_id": d["doc_id"],
+                "ord": i,
+                "text": text,
+                "sha": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+                **{k: d.get(k) for k in CHUNK_META},
+            })
+    return out
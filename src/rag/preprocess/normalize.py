@@ -0,0 +1,35 @@
+# src/rag/preprocess/normalize.py
+import html
+import re
+import unicodedata
+
+_SCRIPT_STYLE = re.compile(r"<(script|style)\b.*?</\1\s*>", re.I | re.S)
+_BLOCK_TAGS = re.compile(r"</?(p|div|br|li|tr|h[1-6]|pre|table|section|article)\b[^>]*>", re.I)
+_TAGS = re.compile(r"<[^>]+>")
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f\u200b-\u200f\u2060\ufeff]")
+_SPACES = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+def html_to_text(s: str) -> str:
+    s = _SCRIPT_STYLE.sub(" ", s)
+    s = _BLOCK_TAGS.sub("\n", s)
+    s = _TAGS.sub(" ", s)
+    return html.unescape(s)
+
+def normalize_text(s: str, fmt: str = "text") -> str:
+    """Clean extracted CTI text: drop markup, normalize unicode, collapse whitespace."""
+    if fmt == "html":
+        s = html_to_text(s)
+    s = unicodedata.normalize("NFKC", s)
+    s = _CONTROL.sub("", s.replace("\r\n", "\n").replace("\r", "\n"))
+    s = _SPACES.sub(" ", s)
+    s = "\n".join(line.strip() for line in s.split("\n"))
+    return _BLANK_LINES.sub("\n\n", s).strip()
+
+def normalize_docs(batch: list[dict]) -> list[dict]:
+    out = []
+    for d in batch:
+        text = normalize_text(d["text"], d.get("format", "text"))
+        if text:
+            out.append({**d, "text": text, "format": "text"})
+    return out
@@ -0,0 +1,144 @@
+# src/rag/retriever.py
+"""
+Hybrid retrieval for the agents: BM25 (exact tokens: IPs, CVEs, hashes) and
+the IVF vector store (paraphrase), fused with reciprocal-rank fusion.
+
+Filters on source / TLP / published date are turned into a bitmap over item
+ids by FacetIndex and handed to both retrievers, so they restrict the
+candidate sets instead of trimming the final list. Within one turn the
+result is memoized on the Blackboard, so every agent asking the same
+question shares a single retrieval. Searches from concurrent turns run in
+parallel: each index swaps in a newer on-disk generation under its own
+short lock and searches a snapshot of it.
+"""
+from __future__ import annotations
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import anyio
+import numpy as np
+
+from src.memory.vector_store import VectorStore
+from src.rag.embedding import EMBED_DIM, make_embedder
+from src.rag.index.bm25 import BM25Index
+from src.rag.index.facets import FacetIndex
+from src.rag.pipeline import PIPELINE_WORK_DIR
+
+RAG_INDEX_DIR = os.getenv("RAG_INDEX_DIR", os.path.join(PIPELINE_WORK_DIR, "index"))
+RETRIEVE_K = int(os.getenv("RETRIEVE_K", "8"))
+RETRIEVE_CANDIDATES = int(os.getenv("RETRIEVE_CANDIDATES", "50"))  # per retriever, before fusion
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+@dataclass(frozen=True)
+class Filters:
+    sources: tuple[str, ...] = ()
+    tlp: tuple[str, ...] = ()
+    since: Optional[str] = None  # ISO date, inclusive
+    until: Optional[str] = None
+
+@dataclass
+class Passage:
+    chunk_id: str
+    text: str
+    score: float
+    meta: dict
+    ranks: dict[str, int] = field(default_factory=dict)  # retriever -> 1-based rank
+
+_FILTER = re.compile(r"(?<!\S)(source|tlp|since|until):(\S+)", re.I)
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}$")
+
+def parse_filters(text: str) -> tuple[str, Filters]:
+    """Split `source:nvd tlp:clear since:2024-01-01 ...` operators off a query."""
+    sources, tlp, bounds = [], [], {}
+    for key, val in _FILTER.findall(text):
+        key = key.lower()
+        if key == "source":
+            sources.extend(v for v in val.split(",") if v)
+        elif key == "tlp":
+            tlp.extend(v for v in val.lower().split(",") if v)
+        elif _DATE.match(val):
+            bounds[key] = val
+    query = " ".join(_FILTER.sub(" ", text).split())
+    return query, Filters(tuple(sources), tuple(tlp), bounds.get("since"), bounds.get("until"))
+
+class HybridRetriever:
+    def __init__(self, index_dir: str | Path = RAG_INDEX_DIR, embedder=None):
+        index_dir = Path(index_dir)
+        self.store = VectorStore(index_dir / "vectors", EMBED_DIM, readonly=True)
+        self.bm25 = BM25Index(index_dir / "bm25", readonly=True)
+        self.facets = FacetIndex(index_dir / "facets", readonly=True)
+        self.embedder = embedder or make_embedder()
+
+    async def asearch(self, query: str, k: int = RETRIEVE_K, filters: Filters = Filters()) -> list[Passage]:
+        vec = (await self.embedder.aembed([query]))[0] if query else None
+        return await anyio.to_thread.run_sync(self.search_vector, query, vec, k, filters)
+
+    def search(self, query: str, k: int = RETRIEVE_K, filters: Filters = Filters()) -> list[Passage]:
+        vec = self.embedder.embed([query])[0] if query else None
+        return self.search_vector(query, vec, k, filters)
+
+    def search_vector(self, query: str, vec, k: int, filters: Filters) -> list[Passage]:
+        mask = self.facets.mask(sources=filters.sources, tlp=filters.tlp, since=filters.since,
+                                until=filters.until)
+        if mask is not None and not mask.any():
+            return []
+        fused: dict[int, float] = {}
+        ranks: dict[int, dict[str, int]] = {}
+
+        def rank(name: str, ids) -> None:
+            for r, i in enumerate(ids, 1):
+                i = int(i)
+                fused[i] = fused.get(i, 0.0) + 1.0 / (RRF_K + r)
+                ranks.setdefault(i, {})[name] = r
+
+        lex_ids, _ = self.bm25.search(query, RETRIEVE_CANDIDATES, mask=mask)
+        rank("bm25", lex_ids)
+        if vec is not None:
+            hits = self.store.search(np.asarray(vec, dtype=np.float32), RETRIEVE_CANDIDATES, mask=mask,
+                                     with_meta=False)
+            rank("vector", [h.id for h in hits])
+
+        order = sorted(fused, key=fused.__getitem__, reverse=True)[:2 * k]
+        live = self.store.lookup(order)  # drops ids superseded since BM25 indexed them
+        out = []
+        for i in order:
+            if i in live:
+                key, meta = live[i]
+                meta = meta or {}
+                out.append(Passage(key, meta.get("text", ""), fused[i],
+                                   {m: v for m, v in meta.items() if m != "text"}, ranks[i]))
+                if len(out) == k:
+                    break
+        return out
+
+_retriever: Optional[HybridRetriever] = None
+_retriever_lock = threading.Lock()
+
+def get_retriever() -> Optional[HybridRetriever]:
+    """Process-wide retriever over RAG_INDEX_DIR, or None until the pipeline has built the index."""
+    global _retriever
+    with _retriever_lock:
+        if _retriever is None:
+            try:
+                _retriever = HybridRetriever()
+            except FileNotFoundError:
+                return None
+        return _retriever
+
+def set_retriever(retriever: Optional[HybridRetriever]) -> None:
+    """Swap the process-wide retriever (eval harness, tests)."""
+    global _retriever
+    with _retriever_lock:
+        _retriever = retriever
+
+async def retrieve(bb, query: str, filters: Filters = Filters(), k: int = RETRIEVE_K) -> Optional[list[Passage]]:
+    """Turn-scoped retrieval: identical (query, filters, k) within one Blackboard run once."""
+    retriever = get_retriever()
+    if retriever is None:
+        return None
+    key = ("retrieve", " ".join(query.lower().split()), filters, k)
+    return await bb.amemo(key, lambda: retriever.asearch(query, k, filters))
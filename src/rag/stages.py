@@ -0,0 +1,121 @@
+# src/rag/stages.py
+"""Stage wiring for the pipelines/0N_*/run.py entry points."""
+from __future__ import annotations
+import argparse
+import os
+from pathlib import Path
+
+from src.memory.vector_store import VectorStore
+from src.rag.connectors.filesystem import iter_documents
+from src.rag.embed_cache import EmbeddingCache
+from src.rag.embedding import EMBED_DIM, EmbedStage, embedder_id, make_embedder
+from src.rag.index.bm25 import BM25Index
+from src.rag.index.facets import FacetIndex
+from src.rag.pipeline import (
+    PIPELINE_BATCH_SIZE,
+    PIPELINE_WORK_DIR,
+    PIPELINE_WORKERS,
+    STAGES,
+    PipelineState,
+    StageStats,
+    run_ingest,
+    run_stage,
+)
+from src.rag.preprocess.chunk import chunk_docs
+from src.rag.preprocess.normalize import normalize_docs
+
+VECTOR_QUANT = os.getenv("VECTOR_QUANT", "f16")  # f16 | int8
+
+def embedding_cache(state: PipelineState, model: str | None = None) -> EmbeddingCache:
+    return EmbeddingCache(Path(state.work_dir) / "embeddings", EMBED_DIM, model or embedder_id())
+
+def vector_store(work_dir: str | Path, *, readonly: bool = False) -> VectorStore:
+    return VectorStore(Path(work_dir) / "index" / "vectors", EMBED_DIM, quant=VECTOR_QUANT, readonly=readonly)
+
+def _index_fn(index: VectorStore, cache: EmbeddingCache):
+    def add(batch: list[dict]) -> list[dict]:
+        vectors = cache.get_many([c["sha"] for c in batch])
+        index.add([c["chunk_id"] for c in batch], vectors, batch)
+        return batch
+    return add
+
+def run_named_stage(state: PipelineState, stage: str, *, source: str | None = None,
+                    batch_size: int = PIPELINE_BATCH_SIZE, workers: int = PIPELINE_WORKERS) -> StageStats:
+    # workers only applies to the CPU-bound stages (normalize, chunk)
+    if stage == "ingest":
+        if not source:
+            raise ValueError("ingest needs --source")
+        return run_ingest(state, iter_documents(source), batch_size=batch_size)
+    if stage == "normalize":
+        return run_stage(state, "normalize", normalize_docs, upstream="ingest", batch_size=batch_size,
+                         workers=workers)
+    if stage == "chunk":
+        return run_stage(state, "chunk", chunk_docs, upstream="normalize", batch_size=batch_size,
+                         workers=workers)
+    if stage == "embed":
+        embedder = make_embedder()
+        cache = embedding_cache(state, embedder.model_id)
+        try:
+            fn = EmbedStage(embedder, cache)
+            stats = run_stage(state, "embed", fn, upstream="chunk", batch_size=batch_size)
+            stats.extra = fn.stats()
+            return stats
+        finally:
+            cache.close()
+            getattr(embedder, "close", lambda: None)()
+    if stage == "index":
+        cache, index = embedding_cache(state), vector_store(state.work_dir)
+        try:
+            stats = run_stage(state, "index", _index_fn(index, cache), upstream="embed", batch_size=batch_size,
+                              write_output=False)
+            # derived indexes catch up from the item table, so a crash here just redoes the sync
+            root = Path(state.work_dir) / "index"
+            lexical = BM25Index(root / "bm25").sync(index)
+            FacetIndex(root / "facets").sync(index)
+            index.compact()  # leave a fully clustered generation for the readers
+            stats.extra = {**index.stats(), "bm25_added": lexical}
+            return stats
+        finally:
+            cache.close()
+            index.close()
+    raise ValueError(f"unknown stage {stage!r}")
+
+def stage_argparser(description: str) -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description=description)
+    ap.add_argument("--work-dir", default=PIPELINE_WORK_DIR)
+    ap.add_argument("--batch-size", type=int, default=PIPELINE_BATCH_SIZE)
+    ap.add_argument("--workers", type=int, default=PIPELINE_WORKERS,
+                    help="processes for the CPU-bound stages (normalize, chunk)")
+    ap.add_argument("--reset", action="store_true",
+                    help="forget this stage's checkpoint and output, and those of every later stage, and start over")
+    return ap
+
+def stage_main(stage: str, argv: list[str] | None = None) -> None:
+    ap = stage_argparser(f"RAG pipeline stage: {stage}")
+    if stage == "ingest":
+        ap.add_argument("--source", required=True, help="directory of reports/runbooks/*.jsonl feeds")
+    args = ap.parse_args(argv)
+    state = PipelineState(args.work_dir)
+    try:
+        if args.reset:
+            later = state.reset(stage)[1:]
+            if later:
+                print(f"reset {stage}; rerun {', '.join(later)} to rebuild from it")
+        print(run_named_stage(state, stage, source=getattr(args, "source", None),
+                              batch_size=args.batch_size, workers=args.workers))
+    finally:
+        state.close()
+
+def all_main(argv: list[str] | None = None) -> None:
+    ap = stage_argparser("RAG pipeline: ingest -> normalize -> chunk -> embed -> index")
+    ap.add_argument("--source", required=True)
+    args = ap.parse_args(argv)
+    state = PipelineState(args.work_dir)
+    try:
+        if args.reset:
+            state.reset(STAGES[0])
+        for stage in STAGES:
+            print(run_named_stage(state, stage, source=args.source, batch_size=args.batch_size,
+                                  workers=args.workers))
+    finally:
+        state.close()
@@ -0,0 +1,28 @@
+# src/utils/schema.py
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+# ---- Turn trace models (shared by the orchestrator, API and UI) ----
+class ToolCall(BaseModel):
+    name: str
+    args: Dict[str, Any] = {}
+
+class TraceStep(BaseModel):
+    step_id: str
+    agent: str
+    rationale: str
+    outputs: Dict[str, Any]
+    tool_calls: List[ToolCall] = []
+    policy_hits: List[str] = []
+    confidence: float = 0.6
+    latency_ms: Optional[float] = None  # wall time of the agent's phase
+
+class FinalDecision(BaseModel):
+    summary: str
+    risk_score: float
+    recommendations: List[str] = []
+
+class ConversationResult(BaseModel):
+    steps: List[TraceStep]
+    final: FinalDecision
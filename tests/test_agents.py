@@ -0,0 +1,66 @@
+# tests/test_agents.py
+import asyncio
+import threading
+from typing import Any
+
+import pytest
+
+from src.agents.attacker import Attacker
+from src.agents.base import Agent, AsyncAgent
+from src.orchestrator.blackboard import Blackboard
+from src.orchestrator.coordinator import PHASE_ORDER, arun_conversation
+
+class _Echo(AsyncAgent):
+    name = "echo"
+
+    async def aplan(self, user_goal: str) -> str:
+        return f"plan {user_goal}"
+
+    async def aact(self) -> dict[str, Any]:
+        return {"ok": True}
+
+class _Blocking(Agent):
+    name = "blocking"
+
+    def plan(self, user_goal: str) -> str:
+        return threading.current_thread().name
+
+    def act(self) -> dict[str, Any]:
+        return {"thread": threading.current_thread().name}
+
+def test_sync_shims_work_outside_a_loop():
+    agent = _Echo(Blackboard())
+    assert agent.plan("x") == "plan x"
+    assert agent.act() == {"ok": True}
+
+def test_sync_shims_refuse_a_running_loop():
+    agent = _Echo(Blackboard())
+
+    async def go():
+        with pytest.raises(RuntimeError, match=r"await _Echo\.aplan\(\)"):
+            agent.plan("x")
+        with pytest.raises(RuntimeError, match=r"await _Echo\.aact\(\)"):
+            agent.act()
+        return await agent.aplan("x")
+
+    assert asyncio.run(go()) == "plan x"
+
+def test_blocking_agents_leave_the_loop_and_canned_ones_stay_on_it():
+    async def go():
+        loop_thread = threading.current_thread().name
+        off = await _Blocking(Blackboard()).aplan("x")
+        inline = await Attacker(Blackboard()).aact()
+        return loop_thread, off, inline
+
+    loop_thread, off, inline = asyncio.run(go())
+    assert off != loop_thread
+    assert inline["hypothesis"]
+
+def test_arun_conversation_is_awaited_inside_a_running_loop():
+    async def go():
+        # the FastAPI path: an already running loop awaits the turn directly
+        return await arun_conversation([{"role": "user", "content": "Beaconing from 10.0.0.8 to a new domain."}])
+
+    result = asyncio.run(go())
+    assert [s["agent"] for s in result["steps"]] == PHASE_ORDER
+    assert result["final"]["summary"]
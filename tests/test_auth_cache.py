@@ -0,0 +1,150 @@
+# tests/test_auth_cache.py
+import asyncio
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.api.routers import auth as auth_router
+from app.security import auth
+from app.security.auth import UserCache, create_access_token, create_reset_token, get_current_user
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class _Users:
+    def __init__(self, docs: dict):
+        self.docs = docs
+        self.finds = 0
+
+    async def find_one(self, query, projection=None):
+        self.finds += 1
+        doc = self.docs.get(query["_id"])
+        return dict(doc) if doc else None
+
+    async def update_one(self, query, update):
+        self.docs[query["_id"]].update(update.get("$set", {}))
+
+class _FakeDB:
+    def __init__(self, *docs: dict):
+        self.users = _Users({d["_id"]: dict(d) for d in docs})
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(auth.time, "monotonic", clock)
+    return clock
+
+@pytest.fixture
+def user_cache(monkeypatch) -> UserCache:
+    cache = UserCache(ttl_sec=60, max_entries=100)
+    monkeypatch.setattr(auth, "user_cache", cache)
+    return cache
+
+def _user(is_admin: bool = False) -> dict:
+    return {"_id": ObjectId(), "email": "analyst@example.com", "name": "Analyst", "is_admin": is_admin}
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = UserCache(ttl_sec=60, max_entries=10)
+    cache.put(("u1", 1, "a"), {"id": "u1"})
+    clock.now += 59
+    assert cache.get(("u1", 1, "a")) == {"id": "u1"}
+    clock.now += 2
+    assert cache.get(("u1", 1, "a")) is None
+    assert cache.stats()["size"] == 0 and (cache.hits, cache.misses) == (1, 1)
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = UserCache(ttl_sec=60, max_entries=2)
+    cache.put(("u1", 1, "a"), {"id": "u1"})
+    cache.put(("u2", 1, "b"), {"id": "u2"})
+    assert cache.get(("u1", 1, "a"))  # u1 is now the most recent
+    cache.put(("u3", 1, "c"), {"id": "u3"})
+    assert cache.get(("u2", 1, "b")) is None
+    assert cache.get(("u1", 1, "a")) and cache.get(("u3", 1, "c"))
+    assert cache.evictions == 1 and "u2" not in cache._by_user
+
+def test_invalidate_drops_every_token_of_the_user(clock):
+    cache = UserCache(ttl_sec=60, max_entries=10)
+    cache.put(("u1", 1, "a"), {"id": "u1"})
+    cache.put(("u1", 2, "b"), {"id": "u1"})
+    cache.put(("u2", 1, "c"), {"id": "u2"})
+    cache.invalidate("u1")
+    assert cache.get(("u1", 1, "a")) is None and cache.get(("u1", 2, "b")) is None
+    assert cache.get(("u2", 1, "c")) == {"id": "u2"}
+
+def test_cached_user_is_a_copy(clock):
+    cache = UserCache(ttl_sec=60, max_entries=10)
+    cache.put(("u1", 1, "a"), {"id": "u1", "is_admin": False})
+    cache.get(("u1", 1, "a"))["is_admin"] = True
+    assert cache.get(("u1", 1, "a"))["is_admin"] is False
+
+def test_get_current_user_reads_mongo_once_per_token_until_the_ttl(clock, user_cache):
+    doc = _user()
+    db = _FakeDB(doc)
+    token = create_access_token({"sub": str(doc["_id"])})
+
+    async def go():
+        first = await get_current_user(token, db)
+        second = await get_current_user(token, db)
+        clock.now += 61
+        third = await get_current_user(token, db)
+        return first, second, third
+
+    first, second, third = asyncio.run(go())
+    assert first == second == third and first["id"] == str(doc["_id"])
+    assert db.users.finds == 2
+
+def test_get_current_user_sees_admin_change_after_invalidate(clock, user_cache):
+    doc = _user()
+    db = _FakeDB(doc)
+    token = create_access_token({"sub": str(doc["_id"])})
+
+    async def go():
+        before = await get_current_user(token, db)
+        db.users.docs[doc["_id"]]["is_admin"] = True
+        stale = await get_current_user(token, db)
+        auth.invalidate_user(doc["_id"])
+        fresh = await get_current_user(token, db)
+        return before, stale, fresh
+
+    before, stale, fresh = asyncio.run(go())
+    assert before["is_admin"] is False and stale["is_admin"] is False
+    assert fresh["is_admin"] is True
+
+def test_get_current_user_rejects_deleted_user_once_uncached(clock, user_cache):
+    doc = _user()
+    db = _FakeDB(doc)
+    token = create_access_token({"sub": str(doc["_id"])})
+
+    async def go():
+        await get_current_user(token, db)
+        del db.users.docs[doc["_id"]]
+        auth.invalidate_user(str(doc["_id"]))
+        await get_current_user(token, db)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(go())
+    assert exc.value.status_code == 401
+
+def test_password_reset_invalidates_cached_user(clock, user_cache, monkeypatch):
+    doc = _user()
+    db = _FakeDB(doc)
+    token = create_access_token({"sub": str(doc["_id"])})
+
+    async def fast_hash(p: str) -> str:
+        return f"hashed:{p}"
+    monkeypatch.setattr(auth_router, "ahash_password", fast_hash)
+
+    async def go():
+        await get_current_user(token, db)
+        assert user_cache.stats()["size"] == 1
+        data = auth_router.ResetIn(token=create_reset_token(str(doc["_id"])), new_password="n3w-secret")
+        assert await auth_router.reset_password(data, db) == {"ok": True}
+
+    asyncio.run(go())
+    assert user_cache.stats()["size"] == 0
+    assert db.users.docs[doc["_id"]]["hashed_password"] == "hashed:n3w-secret"
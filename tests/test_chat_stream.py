@@ -0,0 +1,81 @@
+# tests/test_chat_stream.py
+import asyncio
+import json
+
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import persistence
+from app.api.routers import chat
+from app.security.auth import get_current_user
+
+USER = {"id": str(ObjectId()), "email": "analyst@example.com"}
+PROMPT = "Failed SSH logins spiking from 203.0.113.45, what should we do?"
+
+class _Inserted:
+    def __init__(self):
+        self.inserted_id = ObjectId()
+
+class _Collection:
+    def __init__(self, db: "_FakeDB", name: str):
+        self.db, self.name = db, name
+
+    async def insert_one(self, doc):
+        self.db.written[self.name].append(doc)
+        return _Inserted()
+
+    async def insert_many(self, docs, ordered=True):
+        self.db.written[self.name] += list(docs)
+
+    async def bulk_write(self, ops, ordered=True):
+        self.db.written[self.name] += list(ops)
+
+class _FakeDB:
+    def __init__(self):
+        self.written = {"conversations": [], "messages": [], "traces": []}
+        for name in self.written:
+            setattr(self, name, _Collection(self, name))
+
+@pytest.fixture
+def db(monkeypatch) -> _FakeDB:
+    db = _FakeDB()
+    monkeypatch.setattr(chat, "get_db", lambda: db)
+    monkeypatch.setattr(persistence, "get_db", lambda: db)
+    return db
+
+def test_stream_frames_steps_then_final_then_done(db):
+    app = FastAPI()
+    app.include_router(chat.router)
+    app.dependency_overrides[get_current_user] = lambda: USER
+    with TestClient(app) as client:
+        res = client.post("/api/chat/stream", json={"messages": [{"role": "user", "content": PROMPT}]})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = res.text.splitlines()
+    events = [json.loads(line) for line in lines]
+    types = [e["type"] for e in events]
+    assert types[0] == "conversation" and types[-2:] == ["final", "done"]
+    assert set(types[1:-2]) == {"step"} and len(types) == 3 + 5
+    assert {e["step"]["agent"] for e in events if e["type"] == "step"} == {
+        "intel_analyst", "attacker", "defender", "toolsmith", "decider"}
+    final = events[-2]["final"]
+    assert final["summary"] and "risk_score" in final
+    # persisted before "done": the user message, the assistant summary and the trace
+    assert [m["role"] for m in db.written["messages"]] == ["user", "assistant"]
+    assert len(db.written["traces"]) == 1
+
+def test_client_disconnect_still_persists_the_exchange(db):
+    async def go():
+        req = chat.ChatRequest(messages=[chat.ChatMessage(role="user", content=PROMPT)])
+        response = await chat.chat_stream(req, USER)
+        body = response.body_iterator
+        first = json.loads(await body.__anext__())
+        assert first["type"] == "conversation"
+        await body.aclose()  # the client went away before any step arrived
+        await asyncio.gather(*chat._turns)
+
+    asyncio.run(go())
+    assert [m["role"] for m in db.written["messages"]] == ["user", "assistant"]
+    assert len(db.written["traces"]) == 1
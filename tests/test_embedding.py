@@ -0,0 +1,76 @@
+# tests/test_embedding.py
+import numpy as np
+import pytest
+
+from src.llm.runners.base import RunnerError
+from src.rag.embed_cache import EmbeddingCache
+from src.rag.embedding import EmbedStage, HashEmbedder, RunnerEmbedder, embedder_id
+from src.llm.runners.fake_server import FakeLLMServer
+from src.llm.runners.registry import _runner_class
+
+DIM = 8
+
+def _chunks(n: int) -> list[dict]:
+    return [{"sha": f"sha{i}", "text": f"chunk {i} " * 10} for i in range(n)]
+
+def test_cache_entries_belong_to_one_model(tmp_path):
+    a = EmbeddingCache(tmp_path, DIM, "ollama:nomic-embed-text")
+    a.put_many(["s1", "s2"], np.ones((2, DIM)))
+    a.close()
+
+    b = EmbeddingCache(tmp_path, DIM, "ollama:mxbai-embed-large")
+    assert b.lookup(["s1", "s2"]) == {} and len(b) == 0
+    b.put_many(["s1"], np.full((1, DIM), 2.0))
+    assert b.get_many(["s1"])[0][0] == 2.0
+    with pytest.raises(KeyError, match="mxbai"):
+        b.get_many(["s2"])
+    b.close()
+
+    again = EmbeddingCache(tmp_path, DIM, "ollama:nomic-embed-text")
+    assert set(again.lookup(["s1", "s2"])) == {"s1", "s2"}
+    assert again.get_many(["s1"])[0][0] == 1.0
+    again.close()
+
+def test_embedder_ids_match_the_embedders():
+    assert embedder_id("hash") == HashEmbedder().model_id
+    with FakeLLMServer() as srv:
+        embedder = RunnerEmbedder(_runner_class("ollama")(srv.url, "fake"), model="nomic-embed-text")
+        assert embedder.model_id == "ollama:nomic-embed-text"
+        embedder.close()
+
+class _Limited:
+    """Embedder whose backend refuses requests over `limit` texts with `error`."""
+    model_id = "test"
+
+    def __init__(self, limit: int, error: Exception):
+        self.limit, self.error = limit, error
+        self.calls: list[int] = []
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(len(texts))
+        if len(texts) > self.limit:
+            raise self.error
+        return HashEmbedder(DIM).embed(texts)
+
+@pytest.mark.parametrize("error", [
+    RunnerError("ollama 413: batch too large", 413),
+    RunnerError("openai_compat 400: input exceeds maximum context length"),
+    MemoryError(),
+])
+def test_size_errors_halve_the_batch(tmp_path, error):
+    cache = EmbeddingCache(tmp_path, DIM, "test")
+    embedder = _Limited(limit=5, error=error)
+    stage = EmbedStage(embedder, cache, batch=16)
+    stage(_chunks(20))
+    assert len(cache) == 20
+    assert embedder.calls[:3] == [16, 8, 4]
+    cache.close()
+
+def test_other_errors_are_raised_without_backing_off(tmp_path):
+    cache = EmbeddingCache(tmp_path, DIM, "test")
+    embedder = _Limited(limit=0, error=RunnerError("ollama 500: model not found"))
+    stage = EmbedStage(embedder, cache, batch=16)
+    with pytest.raises(RunnerError, match="not found"):
+        stage(_chunks(20))
+    assert embedder.calls == [16] and stage.batch == 16
+    cache.close()
@@ -0,0 +1,135 @@
+# tests/test_episodic_memory.py
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from src.memory.episodic import EpisodicMemory, Episode, fold, render_summary
+from src.rag.preprocess.chunk import count_tokens
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def _message(i: int, role: str, rng: random.Random) -> dict:
+    words = " ".join(f"w{i}x{j}" for j in range(rng.randint(5, 60)))
+    content = f"Turn {i} saw beacons to 198.51.100.{i % 250}. {words}."
+    return {"_id": ObjectId(), "role": role, "content": content, "created_at": T0 + timedelta(seconds=i)}
+
+def _window_tokens(messages: list[dict]) -> int:
+    return sum(count_tokens(m["content"]) for m in messages)
+
+def test_window_stays_in_budget_and_keeps_the_newest_user_message_whole():
+    memory = EpisodicMemory(budget=300, summary_tokens=100, recent_max=24, fetch_max=64)
+    rng = random.Random(0)
+    stored: list[dict] = []
+    state: dict = {}
+    for turn in range(40):
+        user = _message(2 * turn, "user", rng)
+        ep = Episode("c", dict(state), stored[state.get("folded", 0):])
+        window = memory.window(ep, [{"role": "user", "content": user["content"]}])
+
+        assert window.messages[-1] == {"role": "user", "content": user["content"]}
+        assert _window_tokens(window.messages) <= memory.budget
+        assert window.tokens == _window_tokens(window.messages)
+        if window.state is not None:
+            assert window.state["folded"] >= state.get("folded", 0)
+            folded = stored[window.state["folded"] - 1]
+            assert window.state["through"] == {"created_at": folded["created_at"], "id": str(folded["_id"])}
+            state = window.state
+        stored += [user, _message(2 * turn + 1, "assistant", rng)]
+
+    assert state["folded"] > 0 and state["dropped"] > 0
+    assert count_tokens(render_summary(state)) <= memory.summary_tokens + 20  # header line on top of the budget
+
+def test_oversized_newest_user_message_is_kept_whole():
+    memory = EpisodicMemory(budget=50, summary_tokens=20)
+    rng = random.Random(1)
+    tail = [_message(i, "user" if i % 2 == 0 else "assistant", rng) for i in range(6)]
+    long_request = "Investigate " + " ".join(f"host{i}.corp.example" for i in range(80))
+    window = memory.window(Episode("c", {}, tail), [{"role": "user", "content": long_request}])
+    assert window.messages[-1]["content"] == long_request
+    assert [m["role"] for m in window.messages] == ["system", "user"]
+    assert window.state["folded"] == len(tail)
+
+def test_short_thread_is_passed_through_unchanged():
+    memory = EpisodicMemory(budget=2048)
+    rng = random.Random(2)
+    tail = [_message(i, "user" if i % 2 == 0 else "assistant", rng) for i in range(4)]
+    window = memory.window(Episode("c", {}, tail), [{"role": "user", "content": "And now?"}])
+    assert [m["content"] for m in window.messages] == [m["content"] for m in tail] + ["And now?"]
+    assert window.state is None
+
+def test_fold_keeps_recent_iocs_and_drops_oldest_notes():
+    rng = random.Random(3)
+    msgs = [_message(i, "user", rng) for i in range(30)]
+    state = fold({}, msgs, summary_tokens=300)
+    assert state["folded"] == 30 and state["dropped"] > 0
+    assert state["notes"][-1].startswith("user: Turn 29 saw beacons")
+    assert state["iocs"][-1] == "198.51.100.29"
+    again = fold(state, [{"role": "user", "content": "Back to 198.51.100.5."}], summary_tokens=300)
+    assert again["iocs"][-1] == "198.51.100.5" and again["iocs"].count("198.51.100.5") == 1
+    assert again["through"] == state["through"]  # unsaved messages do not move the cursor
+
+# ---- catch-up against an in-memory messages collection ----
+def _matches(doc: dict, q: dict) -> bool:
+    for key, cond in q.items():
+        if key == "$or":
+            if not any(_matches(doc, c) for c in cond):
+                return False
+        elif key == "$and":
+            if not all(_matches(doc, c) for c in cond):
+                return False
+        elif isinstance(cond, dict):
+            v = doc[key]
+            if ("$gt" in cond and not v > cond["$gt"]) or ("$lt" in cond and not v < cond["$lt"]):
+                return False
+        elif doc.get(key) != cond:
+            return False
+    return True
+
+class _Cursor:
+    def __init__(self, docs: list[dict]):
+        self.docs = docs
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self.docs.sort(key=lambda d: d[field], reverse=direction < 0)
+        return self
+
+    def limit(self, n: int):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, n: int):
+        return self.docs[:n]
+
+class _Messages:
+    def __init__(self, docs: list[dict]):
+        self.docs = docs
+        self.finds = 0
+
+    def find(self, q: dict, projection=None):
+        self.finds += 1
+        return _Cursor([dict(d) for d in self.docs if _matches(d, q)])
+
+class _FakeDB:
+    def __init__(self, docs: list[dict]):
+        self.messages = _Messages(docs)
+
+def test_load_folds_a_long_unsummarised_thread_in_pages():
+    conv = ObjectId()
+    rng = random.Random(4)
+    docs = [{**_message(i, "user" if i % 2 == 0 else "assistant", rng), "conversation_id": conv} for i in range(200)]
+    db = _FakeDB(docs)
+    memory = EpisodicMemory(budget=400, summary_tokens=150, recent_max=8, fetch_max=20)
+
+    ep = asyncio.run(memory.load(db, {"id": str(conv)}))
+    assert ep.dirty
+    assert [m["_id"] for m in ep.tail] == [d["_id"] for d in docs[180:]]
+    assert ep.state["folded"] == 180
+    assert ep.state["through"]["id"] == str(docs[179]["_id"])
+    assert db.messages.finds == 1 + 180 // 20 + 1  # tail, full pages, the empty page that ends it
+
+    # the next turn starts from the stored state and fetches only what came after it
+    ep2 = asyncio.run(memory.load(db, {"id": str(conv), "episodic": ep.state}))
+    assert not ep2.dirty and len(ep2.tail) == 20
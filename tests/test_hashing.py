@@ -0,0 +1,58 @@
+# tests/test_hashing.py
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.security.hashing import HashPool
+
+def _wait_for(cond, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+def test_cancelled_caller_keeps_its_slot_until_the_hash_finishes():
+    pool = HashPool(workers=1, max_pending=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_hash() -> str:
+        started.set()
+        release.wait(5)
+        return "hashed"
+
+    async def go():
+        task = asyncio.create_task(pool.run(slow_hash))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert pool.in_flight == 1  # the worker is still hashing
+        with pytest.raises(HTTPException) as busy:
+            await pool.run(slow_hash)
+        assert busy.value.status_code == 503
+
+    asyncio.run(go())
+    release.set()
+    _wait_for(lambda: pool.in_flight == 0)
+    assert (pool.completed, pool.failed, pool.rejected) == (1, 0, 1)
+    pool.shutdown()
+
+def test_failures_are_counted_apart_from_completions():
+    pool = HashPool(workers=2)
+
+    def bad() -> str:
+        raise ValueError("malformed hash")
+
+    async def go():
+        assert await pool.run(str.upper, "ok") == "OK"
+        with pytest.raises(ValueError):
+            await pool.run(bad)
+
+    asyncio.run(go())
+    _wait_for(lambda: pool.in_flight == 0)
+    stats = pool.stats()
+    assert (stats["completed"], stats["failed"], stats["in_flight"]) == (1, 1, 0)
+    pool.shutdown()
@@ -0,0 +1,65 @@
+# tests/test_kv_store.py
+import asyncio
+import os
+import sqlite3
+
+import pytest
+
+from src.config.settings import DATA_DIR
+from src.memory import kv_store
+from src.memory.kv_store import KVStore
+
+def _flaky(store: KVStore, failures: int) -> list[int]:
+    """Make the store's next `failures` commits fail as a locked database would."""
+    calls = [0]
+    commit = store._commit
+
+    def _commit(batch):
+        calls[0] += 1
+        if calls[0] <= failures:
+            raise sqlite3.OperationalError("database is locked")
+        commit(batch)
+    store._commit = _commit
+    return calls
+
+def test_failed_commit_is_retried_without_further_writes(tmp_path):
+    path = str(tmp_path / "kv.sqlite")
+
+    async def go():
+        store = KVStore(path, retry_max_sec=0.05)
+        calls = _flaky(store, 2)
+        await store.set("a", {"n": 1})
+        await asyncio.sleep(0.5)  # no other write arrives to kick the writer
+        assert calls[0] == 3 and store.stats()["pending"] == 0 and store.failures == 2
+        return await KVStore(path).get("a")
+
+    assert asyncio.run(go()) == {"n": 1}
+
+def test_durable_write_reports_failure_but_close_still_commits(tmp_path):
+    path = str(tmp_path / "kv.sqlite")
+
+    async def go():
+        store = KVStore(path, retry_max_sec=0.05, close_attempts=3)
+        _flaky(store, 1)
+        with pytest.raises(sqlite3.OperationalError):
+            await store.set("a", 1, durable=True)
+        await store.mset({"b": 2, "c": 3})
+        await store.close()
+        return await KVStore(path).mget(["a", "b", "c"])
+
+    assert asyncio.run(go()) == {"a": 1, "b": 2, "c": 3}
+
+def test_close_gives_up_after_its_attempts(tmp_path):
+    async def go():
+        store = KVStore(str(tmp_path / "kv.sqlite"), retry_max_sec=0.05, close_attempts=2)
+        _flaky(store, 100)
+        await store.set("a", 1)
+        with pytest.raises(sqlite3.OperationalError):
+            await store.close()
+        return store.stats()["pending"]
+
+    assert asyncio.run(go()) == 1
+
+@pytest.mark.skipif("KV_STORE_PATH" in os.environ, reason="path set explicitly")
+def test_default_path_is_under_data_dir():
+    assert os.path.dirname(os.path.dirname(kv_store.KV_STORE_PATH)) == DATA_DIR
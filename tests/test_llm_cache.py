@@ -0,0 +1,35 @@
+# tests/test_llm_cache.py
+import asyncio
+
+from src.llm.cache import CachedRunner, ResponseCache
+from src.llm.runners.base import close_http_client
+from src.llm.runners.fake_server import FakeLLMServer
+from src.llm.runners.registry import _runner_class
+
+PROMPT = "Summarise the beaconing from 198.51.100.7"
+
+def _stream(cached: CachedRunner) -> tuple[str, dict]:
+    async def go():
+        usage: dict = {}
+        text = "".join([t async for t in cached.stream(PROMPT, agent="decider", max_tokens=6, usage=usage)])
+        await close_http_client()
+        return text, usage
+    return asyncio.run(go())
+
+def test_cached_stream_replays_the_backend_usage(tmp_path):
+    with FakeLLMServer() as srv:
+        runner = _runner_class("vllm")(srv.url, "fake", batch_window_ms=0)
+        cached = CachedRunner(runner, ResponseCache(sqlite_path=str(tmp_path / "llm.sqlite")))
+        text, usage = _stream(cached)
+        assert usage == {"prompt_tokens": 5, "completion_tokens": 6}
+
+        again, replayed = _stream(cached)
+        assert again == text
+        assert replayed == {"prompt_tokens": 5, "completion_tokens": 6, "cached": True}
+        assert len(srv.requests) == 1
+        assert cached.stats()["decider"]["saved_tokens"] == 11
+
+        # the disk tier keeps the usage too
+        cold = CachedRunner(runner, ResponseCache(sqlite_path=str(tmp_path / "llm.sqlite")))
+        assert _stream(cold)[1]["completion_tokens"] == 6
+        assert len(srv.requests) == 1
@@ -0,0 +1,94 @@
+# tests/test_llm_runner.py
+import asyncio
+
+from src.llm.runners import base
+from src.llm.runners.base import close_http_client, get_http_client
+from src.llm.runners.fake_server import FakeLLMServer
+from src.llm.runners.registry import _runner_class
+
+def test_runner_survives_successive_event_loops():
+    """Sync callers run one asyncio.run per call against the same process-wide runner."""
+    with FakeLLMServer() as srv:
+        runner = _runner_class("vllm")(srv.url, "fake", max_concurrency=1, batch_window_ms=5)
+
+        async def turn(i: int) -> tuple[list[str], int]:
+            # more callers than slots, so the semaphore is waited on and binds to this loop
+            done = await asyncio.gather(*(runner.generate(f"incident {i}.{j}", max_tokens=4) for j in range(6)))
+            return [c.text for c in done], id(get_http_client())
+
+        texts = []
+        for i in range(3):
+            out, _ = asyncio.run(turn(i))
+            texts += out
+        assert len(texts) == 18 and all(texts)
+        assert not runner._batcher._tasks and not runner._batcher._pending
+        assert runner.stats()["avg_batch"] > 1
+        # state of the finished loops is dropped, not accumulated
+        assert len(runner._slots) == 1 and len(base._clients) <= 1
+
+def test_close_http_client_closes_the_running_loops_client():
+    async def open_and_close() -> tuple[bool, bool]:
+        client = get_http_client()
+        await close_http_client()
+        return client.is_closed, asyncio.get_running_loop() in base._clients
+
+    assert asyncio.run(open_and_close()) == (True, False)
+
+def test_stream_counts_reported_tokens_not_chunks():
+    with FakeLLMServer(max_tokens=8) as srv:
+        for backend in ("ollama", "vllm"):
+            runner = _runner_class(backend)(srv.url, "fake", batch_window_ms=0)
+
+            async def consume() -> tuple[list[str], dict]:
+                usage: dict = {}
+                chunks = [t async for t in runner.stream("beacon to 198.51.100.7", max_tokens=5, usage=usage)]
+                await close_http_client()
+                return chunks, usage
+
+            chunks, usage = asyncio.run(consume())
+            assert len(chunks) == 5
+            assert usage == {"prompt_tokens": 3, "completion_tokens": 5}
+            assert (runner.stats()["completion_tokens"], runner.stats()["stream_chunks"]) == (5, 5)
+
+def test_stream_chunks_are_not_tokens():
+    class Chunky(base.Runner):
+        async def _complete_batch(self, prompts, params):
+            raise NotImplementedError
+
+        async def _stream(self, prompt, params, usage):
+            yield "two tokens "
+            yield "and three more"
+            usage["completion_tokens"] = 5
+
+    runner = Chunky("http://unused", "fake")
+
+    async def consume() -> str:
+        return "".join([t async for t in runner.stream("x")])
+
+    assert asyncio.run(consume()) == "two tokens and three more"
+    assert (runner.completion_tokens, runner.stream_chunks) == (5, 2)
+
+def test_cancelled_batch_cancels_its_waiters():
+    class Hanging(base.Runner):
+        supports_batch = True
+
+        async def _complete_batch(self, prompts, params):
+            self.entered.set()
+            await asyncio.sleep(60)
+
+        def _stream(self, prompt, params, usage):
+            raise NotImplementedError
+
+    async def go():
+        runner = Hanging("http://unused", "fake", batch_window_ms=1, max_batch=4)
+        runner.entered = asyncio.Event()
+        waiters = [asyncio.create_task(runner.generate(f"p{i}")) for i in range(2)]
+        await asyncio.wait_for(runner.entered.wait(), 1)
+        (batch,) = runner._batcher._tasks
+        batch.cancel()
+        done = await asyncio.wait_for(asyncio.gather(*waiters, return_exceptions=True), 1)
+        return batch, done
+
+    batch, done = asyncio.run(go())
+    assert batch.cancelled()
+    assert all(isinstance(d, asyncio.CancelledError) for d in done)
@@ -0,0 +1,86 @@
+# tests/test_normalizers.py
+import pytest
+
+from src.intel.normalizers import BloomFilter, IndicatorIndex, Match, classify, extract_iocs, refang
+
+def _pairs(text: str) -> list[tuple[str, str]]:
+    return [(i.kind, i.value) for i in extract_iocs(text)]
+
+@pytest.mark.parametrize("raw, expected", [
+    ("203.0.113[.]12", "203.0.113.12"),
+    ("evil(.)com", "evil.com"),
+    ("evil[dot]example{.}org", "evil.example.org"),
+    ("hxxps[://]evil.com/a", "https://evil.com/a"),
+])
+def test_refang(raw, expected):
+    assert refang(raw) == expected
+
+def test_extracts_defanged_indicators_in_canonical_form():
+    text = ("Beacon to 203.0.113[.]12 and hxxps[://]Evil[.]Example.COM/gate.php?id=1, "
+            "staged on login-update(.)net. Exploits cve-2024-3400.")
+    assert _pairs(text) == [
+        ("ipv4", "203.0.113.12"),
+        ("url", "https://evil.example.com/gate.php?id=1"),
+        ("domain", "login-update.net"),
+        ("cve", "CVE-2024-3400"),
+    ]
+
+def test_cidrs_are_masked_and_host_prefixes_are_addresses():
+    assert _pairs("ranges 198.51.100.77/24 and 192.0.2.9/32") == [
+        ("cidr", "198.51.100.0/24"), ("ipv4", "192.0.2.9")]
+    assert classify("2001:DB8:0:0::1") == ("ipv6", "2001:db8::1")
+    assert classify("2001:db8::ff/32") == ("cidr", "2001:db8::/32")
+
+def test_rejects_lookalikes():
+    # leading zeros, out-of-range octets, version strings, file names
+    assert classify("010.1.1.1") is None
+    assert _pairs("saw 256.1.1.1 in the log") == []
+    assert _pairs("upgrade to 1.2.3.4.5 today") == []
+    assert _pairs("dropped payload.exe and config.json") == []
+
+def test_hashes_by_length_and_case():
+    md5 = "D41D8CD98F00B204E9800998ECF8427E"
+    sha256 = "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+    assert _pairs(f"{md5} {sha256}") == [("md5", md5.lower()), ("sha256", sha256)]
+    assert classify("a" * 33) is None
+
+def test_idn_domains_become_punycode():
+    assert classify("bücher.example") == ("domain", "xn--bcher-kva.example")
+
+def test_unique_keeps_first_occurrence():
+    text = "1.2.3.4 then 1.2.3[.]4 again"
+    assert len(extract_iocs(text)) == 1 and len(extract_iocs(text, unique=False)) == 2
+    ioc = extract_iocs(text)[0]
+    assert text[ioc.start:ioc.end] == "1.2.3.4"
+
+@pytest.fixture
+def index() -> IndicatorIndex:
+    idx = IndicatorIndex()
+    idx.add_text("203.0.113.0/24 10.0.0.0/8 10.1.2.3", source="feed-a")
+    idx.add_text("evil.com hxxp://bad[.]org/x CVE-2021-44228 2001:db8::/48", source="feed-b")
+    return idx
+
+def test_longest_prefix_match(index):
+    assert index.lookup("10.1.2.3") == Match("ipv4", "10.1.2.3", "feed-a")
+    assert index.lookup("10.9.9.9") == Match("cidr", "10.0.0.0/8", "feed-a")
+    assert index.lookup("203.0.113[.]99") == Match("cidr", "203.0.113.0/24", "feed-a")
+    assert index.lookup("2001:db8:0:1::5") == Match("cidr", "2001:db8::/48", "feed-b")
+    assert index.lookup("192.0.2.1") is None
+
+def test_range_overlap_either_way(index):
+    assert index.lookup("203.0.113.128/25").indicator == "203.0.113.0/24"  # covered by a bad range
+    assert index.lookup("203.0.0.0/16").indicator == "203.0.113.0/24"     # contains a bad range
+    assert index.lookup("198.51.100.0/24") is None
+
+def test_domains_match_their_parents_and_urls_their_hosts(index):
+    assert index.lookup("a.b.EVIL.com") == Match("domain", "evil.com", "feed-b")
+    assert index.lookup("notevil.com") is None
+    assert index.lookup("http://bad.org/x") == Match("url", "http://bad.org/x", "feed-b")
+    assert index.lookup("https://cdn.evil.com/p") == Match("domain", "evil.com", "feed-b")
+    assert "cve-2021-44228" in index and "not an indicator" not in index
+
+def test_duplicates_are_not_counted_and_bloom_covers_exact_indicators(index):
+    assert index.add_text("10.1.2.3 evil.com", source="feed-c") == 0
+    assert len(index) == 7
+    bf = BloomFilter.from_bytes(index.bloom().to_bytes())
+    assert "ipv4:10.1.2.3" in bf and "domain:evil.com" in bf and "cve:CVE-2021-44228" in bf
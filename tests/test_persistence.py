@@ -0,0 +1,61 @@
+# tests/test_persistence.py
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from app import persistence
+from app.persistence import Exchange, WriteBehindBatcher
+
+class _Collection:
+    def __init__(self, db: "_FakeDB", name: str):
+        self.db, self.name = db, name
+
+    async def insert_many(self, docs, ordered=True):
+        self.db.written[self.name] += list(docs)
+
+    async def bulk_write(self, ops, ordered=True):
+        self.db.written[self.name] += list(ops)
+
+class _FakeDB:
+    def __init__(self):
+        self.written = {"messages": [], "traces": [], "conversations": []}
+        for name in self.written:
+            setattr(self, name, _Collection(self, name))
+
+def _exchange(text: str) -> Exchange:
+    return Exchange(ObjectId(), "2026-01-01T00:00:00+00:00", messages=[{"role": "user", "content": text}])
+
+def test_failing_flush_fails_waiters_and_keeps_running(monkeypatch):
+    def broken():
+        raise RuntimeError("mongo unavailable")
+
+    async def go():
+        w = WriteBehindBatcher()
+        monkeypatch.setattr(persistence, "get_db", broken)
+        with pytest.raises(RuntimeError, match="unavailable"):
+            await asyncio.wait_for(w.submit(_exchange("lost")), 1)
+        db = _FakeDB()
+        monkeypatch.setattr(persistence, "get_db", lambda: db)
+        await asyncio.wait_for(w.submit(_exchange("kept")), 1)
+        await w.close()
+        return w, db
+
+    w, db = asyncio.run(go())
+    assert [m["content"] for m in db.written["messages"]] == ["kept"]
+    assert w.failures == 1 and w.flushes == 2
+
+def test_restart_keeps_queued_exchanges(monkeypatch):
+    db = _FakeDB()
+    monkeypatch.setattr(persistence, "get_db", lambda: db)
+
+    async def go():
+        w = WriteBehindBatcher()
+        await w.submit(_exchange("a"), wait=False)
+        w._task.cancel()  # the writer dies before it got to the queue
+        await asyncio.sleep(0)
+        await w.submit(_exchange("b"), wait=False)
+        await asyncio.wait_for(w.submit(_exchange("c")), 1)
+
+    asyncio.run(go())
+    assert [m["content"] for m in db.written["messages"]] == ["a", "b", "c"]
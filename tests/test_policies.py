@@ -0,0 +1,18 @@
+# tests/test_policies.py
+import os
+import shutil
+
+from src.orchestrator.policies import POLICY_PATH, PolicyEngine
+
+def test_missing_policy_file_keeps_previous_policy(tmp_path):
+    path = tmp_path / "tool_allowlist.yaml"
+    shutil.copy(POLICY_PATH, path)
+    engine = PolicyEngine(str(path), reload_seconds=0)
+    before = engine.validate("nmap", {"target": "203.0.113.12", "scan": "-sS -Pn"})
+
+    os.rename(path, tmp_path / "moved.yaml")
+    assert engine.validate("nmap", {"target": "203.0.113.12", "scan": "-sS -Pn"}) == before
+    assert engine.errors == 1
+
+    os.rename(tmp_path / "moved.yaml", path)
+    assert engine.validate("nmap", {"target": "203.0.113.12", "scan": "-sS -Pn"}) == before
@@ -0,0 +1,83 @@
+# tests/test_rag_pipeline.py
+import json
+
+import pytest
+
+from src.rag.pipeline import PipelineState, run_ingest, run_stage, spool_path
+from src.rag.preprocess.chunk import chunk_docs
+from src.rag.preprocess.normalize import normalize_docs
+
+def _docs(*ids: str) -> list[dict]:
+    return [{"doc_id": i, "text": f"Report {i}: SYN scan from 203.0.113.7 against the VPN gateway."} for i in ids]
+
+def _normalize(state: PipelineState):
+    return run_stage(state, "normalize", normalize_docs, upstream="ingest", batch_size=2)
+
+def _chunk(state: PipelineState):
+    return run_stage(state, "chunk", chunk_docs, upstream="normalize", batch_size=2)
+
+def _ids(state: PipelineState, stage: str) -> list[str]:
+    with open(spool_path(state.work_dir, stage), encoding="utf-8") as f:
+        return [json.loads(line)["doc_id"] for line in f]
+
+def test_rerun_processes_only_new_documents(tmp_path):
+    state = PipelineState(tmp_path)
+    run_ingest(state, _docs("a", "b", "c"), batch_size=2)
+    assert _normalize(state).records_in == 3
+    assert _chunk(state).records_in == 3
+
+    ingest = run_ingest(state, _docs("a", "b", "c", "d"), batch_size=2)
+    assert (ingest.records_out, ingest.skipped) == (1, 3)
+    assert _normalize(state).records_in == 1
+    assert _chunk(state).records_in == 1
+    assert _ids(state, "normalize") == ["a", "b", "c", "d"]
+    state.close()
+
+def test_resume_truncates_a_torn_output_tail(tmp_path):
+    state = PipelineState(tmp_path)
+    run_ingest(state, _docs("a", "b"))
+    _normalize(state)
+    with open(spool_path(tmp_path, "normalize"), "ab") as f:
+        f.write(b'{"doc_id":"half-writ')  # crashed mid-batch, after the last checkpoint
+    run_ingest(state, _docs("a", "b", "c"))
+    _normalize(state)
+    assert _ids(state, "normalize") == ["a", "b", "c"]
+    state.close()
+
+def test_reset_clears_downstream_stages(tmp_path):
+    state = PipelineState(tmp_path)
+    run_ingest(state, _docs("a", "b", "c", "d"), batch_size=2)
+    _normalize(state)
+    _chunk(state)
+
+    assert state.reset("ingest") == ["ingest", "normalize", "chunk", "embed", "index"]
+    assert not spool_path(tmp_path, "normalize").exists()
+    assert state.checkpoint("chunk").in_offset == 0
+    run_ingest(state, _docs("x"))
+    run_ingest(state, _docs("x", "y", "z"))
+    assert _normalize(state).records_in == 3
+    assert _chunk(state).records_in == 3
+    assert _ids(state, "normalize") == ["x", "y", "z"]
+    assert _ids(state, "chunk") == ["x", "y", "z"]
+    state.close()
+
+def test_reset_keeps_upstream_stages(tmp_path):
+    state = PipelineState(tmp_path)
+    run_ingest(state, _docs("a", "b"))
+    _normalize(state)
+    _chunk(state)
+    assert state.reset("normalize") == ["normalize", "chunk", "embed", "index"]
+    assert state.checkpoint("ingest").records_out == 2
+    assert not spool_path(tmp_path, "chunk").exists()
+    assert _normalize(state).records_in == 2
+    assert _chunk(state).records_in == 2
+    state.close()
+
+def test_stale_checkpoint_is_refused(tmp_path):
+    state = PipelineState(tmp_path)
+    run_ingest(state, _docs("a", "b", "c"))
+    _normalize(state)
+    spool_path(tmp_path, "ingest").write_bytes(b"")  # upstream rewritten behind the pipeline's back
+    with pytest.raises(RuntimeError, match="--reset"):
+        _normalize(state)
+    state.close()
@@ -0,0 +1,55 @@
+# tests/test_retriever.py
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from src.rag.embedding import HashEmbedder
+from src.rag.pipeline import STAGES, PipelineState
+from src.rag.retriever import HybridRetriever, parse_filters
+from src.rag.stages import run_named_stage
+
+FIXTURES = Path(__file__).resolve().parent.parent / "pipelines" / "06_eval" / "fixtures"
+
+@pytest.fixture(scope="module")
+def index_dir(tmp_path_factory) -> Path:
+    work = tmp_path_factory.mktemp("rag")
+    state = PipelineState(work)
+    try:
+        for stage in STAGES:
+            run_named_stage(state, stage, source=str(FIXTURES / "corpus"))
+    finally:
+        state.close()
+    return work / "index"
+
+def _prompts() -> list[str]:
+    with open(FIXTURES / "cases.jsonl", encoding="utf-8") as f:
+        return [json.loads(line)["prompt"] for line in f if line.strip()]
+
+def _keys(retriever: HybridRetriever, prompt: str) -> list[str]:
+    query, filters = parse_filters(prompt)
+    return [p.chunk_id for p in retriever.search(query, 5, filters)]
+
+def test_concurrent_searches_match_sequential(index_dir):
+    retriever = HybridRetriever(index_dir, HashEmbedder())
+    prompts = _prompts() * 4
+    expected = [_keys(retriever, p) for p in prompts]
+    with ThreadPoolExecutor(8) as pool:
+        assert list(pool.map(lambda p: _keys(retriever, p), prompts)) == expected
+
+def test_searches_do_not_wait_for_each_other(index_dir, monkeypatch):
+    """Two searches are inside the vector store at the same time; a retriever-wide lock would deadlock here."""
+    retriever = HybridRetriever(index_dir, HashEmbedder())
+    inside = threading.Barrier(2, timeout=5)
+    real = retriever.store.search
+
+    def search(*args, **kw):
+        inside.wait()
+        return real(*args, **kw)
+    monkeypatch.setattr(retriever.store, "search", search)
+    prompt = _prompts()[0]
+    with ThreadPoolExecutor(2) as pool:
+        a, b = pool.map(lambda p: _keys(retriever, p), [prompt, prompt])
+    assert a == b and a
@@ -0,0 +1,68 @@
+# tests/test_scheduler.py
+import asyncio
+
+import pytest
+
+from src.orchestrator.scheduler import Phase, check_graph, run_graph
+
+def test_dependent_starts_while_consumer_is_paused():
+    async def go():
+        started = asyncio.Event()
+
+        async def first():
+            return 1
+
+        async def second():
+            started.set()
+            return 2
+
+        phases = [Phase("first", first), Phase("second", second, after=("first",))]
+        out = []
+        async for name, result in run_graph(phases):
+            out.append((name, result))
+            if name == "first":
+                # the consumer is busy (e.g. writing to a slow socket) before pulling the next step
+                await asyncio.wait_for(started.wait(), 1)
+        return out
+
+    assert asyncio.run(go()) == [("first", 1), ("second", 2)]
+
+def test_independent_phases_overlap():
+    async def go():
+        gate = asyncio.Barrier(2)
+
+        async def meet():
+            await asyncio.wait_for(gate.wait(), 1)  # only passes if both run at once
+            return True
+
+        return {n async for n, _ in run_graph([Phase("a", meet), Phase("b", meet)], max_concurrency=2)}
+
+    assert asyncio.run(go()) == {"a", "b"}
+
+def test_failure_cancels_the_rest():
+    async def go():
+        cancelled = asyncio.Event()
+
+        async def boom():
+            raise RuntimeError("agent failed")
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(RuntimeError, match="agent failed"):
+            async for _ in run_graph([Phase("boom", boom), Phase("slow", slow)]):
+                pass
+        return cancelled.is_set()
+
+    assert asyncio.run(go())
+
+def test_check_graph_rejects_cycles():
+    async def noop():
+        return None
+
+    with pytest.raises(ValueError, match="cycle"):
+        check_graph([Phase("a", noop, after=("b",)), Phase("b", noop, after=("a",))])
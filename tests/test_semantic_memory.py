@@ -0,0 +1,42 @@
+# tests/test_semantic_memory.py
+import asyncio
+import sqlite3
+
+from src.memory.semantic import SemanticMemory
+from src.utils.schema import FinalDecision
+
+GOAL = "Scanning from 203.0.113.5 against port 22 on the edge VPN, contact alice@example.com"
+REPEAT = "Scanning from 198.51.100.7 against port 22 on the edge VPN, contact alice@example.com"
+DECISION = FinalDecision(summary="Block source at edge firewall.", risk_score=0.6, recommendations=["Block."])
+
+def test_recall_is_scoped_to_owner(tmp_path):
+    async def run():
+        mem = SemanticMemory(str(tmp_path / "semantic.sqlite"))
+        await mem.remember(GOAL, DECISION, "p1", "owner-a")
+        assert await mem.recall(REPEAT, "p1", "owner-b") is None
+        assert await mem.recall(REPEAT, "p1", "") is None
+        hit = await mem.recall(REPEAT, "p1", "owner-a")
+        assert hit is not None and hit.decision == DECISION
+        # another worker reading the same file keeps the scoping
+        other = SemanticMemory(str(tmp_path / "semantic.sqlite"))
+        assert await other.recall(REPEAT, "p1", "owner-b") is None
+        assert await other.recall(REPEAT, "p1", "owner-a") is not None
+    asyncio.run(run())
+
+def test_provenance_and_stored_goal_carry_no_raw_text(tmp_path):
+    async def run():
+        path = str(tmp_path / "semantic.sqlite")
+        mem = SemanticMemory(path)
+        await mem.remember(GOAL, DECISION, "p1", "owner-a")
+        hit = await mem.recall(REPEAT, "p1", "owner-a")
+        assert set(hit.provenance()) == {"source", "memory_id", "similarity"}
+        (stored,) = sqlite3.connect(path).execute("SELECT goal FROM semantic_memory").fetchone()
+        assert "alice@example.com" not in stored
+    asyncio.run(run())
+
+def test_no_recall_under_another_policy(tmp_path):
+    async def run():
+        mem = SemanticMemory(str(tmp_path / "semantic.sqlite"))
+        await mem.remember(GOAL, DECISION, "p1", "owner-a")
+        assert await mem.recall(REPEAT, "p2", "owner-a") is None
+    asyncio.run(run())
@@ -0,0 +1,20 @@
+# tests/test_traces.py
+import re
+
+from app.traces import trace_filter
+
+def _matches(q: dict, hit: str) -> bool:
+    return re.search(q["policy_hits"]["$regex"], hit) is not None
+
+def test_policy_hit_filter_matches_rule_id_prefix():
+    q = trace_filter(policy_hit="flag_not_allowed")
+    assert q["policy_hits"]["$regex"].startswith("^")
+    assert _matches(q, "flag_not_allowed:-sU")
+    assert _matches(q, "flag_not_allowed")
+    assert not _matches(q, "flag_not_allowed_extra:-sU")
+    assert not _matches(q, "x_flag_not_allowed:-sU")
+
+def test_policy_hit_filter_with_full_value_and_regex_characters():
+    assert _matches(trace_filter(policy_hit="flag_not_allowed:-sU"), "flag_not_allowed:-sU")
+    assert _matches(trace_filter(policy_hit="prompt_guard:override_instructions"), "prompt_guard:override_instructions")
+    assert not _matches(trace_filter(policy_hit="target.*"), "target_denied:10.0.0.1")
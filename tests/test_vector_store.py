@@ -0,0 +1,83 @@
+# tests/test_vector_store.py
+import numpy as np
+import pytest
+
+from src.memory.vector_store import VectorStore
+
+DIM = 16
+
+def _vectors(n: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+def _keys(n: int) -> list[str]:
+    return [f"c{i}" for i in range(n)]
+
+@pytest.fixture(params=["f16", "int8"])
+def store(request, tmp_path):
+    s = VectorStore(tmp_path / "vectors", DIM, quant=request.param, auto_compact=False)
+    yield s
+    s.close()
+
+def _top(store: VectorStore, q, k: int = 5, **kw) -> list[str]:
+    return [h.key for h in store.search(q, k, **kw)]
+
+def test_round_trip_returns_keys_and_metadata(store, tmp_path):
+    x = _vectors(50)
+    store.add(_keys(50), x, [{"n": i} for i in range(50)])
+    assert len(store) == 50
+    for i in (0, 17, 49):
+        hit = store.search(x[i], 1)[0]
+        assert (hit.key, hit.meta) == (f"c{i}", {"n": i})
+        assert hit.score == pytest.approx(1.0, abs=0.02)
+    store.close()
+
+    reopened = VectorStore(tmp_path / "vectors", DIM, readonly=True)
+    assert _top(reopened, x[17], 1) == ["c17"] and reopened.quant == store.quant
+    with pytest.raises(RuntimeError, match="readonly"):
+        reopened.add(["x"], x[:1])
+    reopened.close()
+
+def test_deleted_and_replaced_rows_are_not_returned(store):
+    x = _vectors(20)
+    store.add(_keys(20), x)
+    assert store.delete(["c3", "missing"]) == 1
+    assert "c3" not in _top(store, x[3], 20)
+    # re-adding a key tombstones its previous row: only the new vector answers for it
+    store.add(["c5"], x[9:10])
+    hits = store.search(x[9], 20)
+    assert [h.key for h in hits].count("c5") == 1
+    assert {h.key for h in hits[:2]} == {"c5", "c9"}
+    assert len(store) == 19
+
+def test_compaction_keeps_search_results(store):
+    n = 2000  # enough rows for the compacted generation to be clustered
+    x = _vectors(n)
+    store.add(_keys(n), x)
+    store.delete(["c1", "c2"])
+    queries = _vectors(10, seed=1)
+    before = [_top(store, q, 10) for q in queries]
+    assert store.stats()["delta_rows"] == n and store.stats()["generation"] == 0
+
+    store.compact()
+    stats = store.stats()
+    assert (stats["generation"], stats["segment_rows"], stats["delta_rows"], stats["tombstones"]) == (1, n - 2, 0, 0)
+    assert stats["lists"] > 0
+    # probing every list is exact, so the answers match the pre-compaction brute force
+    assert [_top(store, q, 10, nprobe=stats["lists"]) for q in queries] == before
+    assert _top(store, x[1], 5, nprobe=stats["lists"])[0] != "c1"
+    assert _top(store, x[42], 1) == ["c42"]
+
+def test_readers_pick_up_a_new_generation(store, tmp_path):
+    x = _vectors(30)
+    store.add(_keys(30), x)
+    reader = VectorStore(tmp_path / "vectors", DIM, readonly=True)
+    assert _top(reader, x[7], 1) == ["c7"]
+    store.delete(["c7"])
+    store.compact()
+    assert "c7" not in _top(reader, x[7], 30)
+    assert reader.gen_no == 1
+    reader.close()
+
+def test_second_writer_is_refused(store, tmp_path):
+    with pytest.raises(RuntimeError, match="another process"):
+        VectorStore(tmp_path / "vectors", DIM)